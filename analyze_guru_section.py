@@ -1,85 +1,22 @@
-import requests
-from bs4 import BeautifulSoup
 import json
-import re
+import sys
 
-def analyze_guru_section():
+from section_rule_engine import run_rules
+from site_snapshot import replay_from_argv
+
+def analyze_guru_section(replay=None):
     """Analyze the guru section from original website"""
     
-    urls_to_check = [
-        "https://amritsagar.org",
-        "https://amritsagar.org/about/",
-        "https://amritsagar.org/founder/",
-        "https://amritsagar.org/guru/"
-    ]
-    
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    })
+    # Fetching, section walking and categorisation are declared in section_rules.json
+    results = run_rules(['guru_found', 'guru', 'guru_about', 'guru_team'], replay=replay)
     
     guru_section_info = {
-        'found_images': [],
-        'guru_section_images': [],
-        'about_section_images': [],
-        'team_section_images': []
+        'found_images': results['guru_found'],
+        'guru_section_images': results['guru'],
+        'about_section_images': results['guru_about'],
+        'team_section_images': results['guru_team']
     }
     
-    for url in urls_to_check:
-        try:
-            print(f"🔍 Analyzing: {url}")
-            response = session.get(url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find all sections that might contain guru information
-            sections = soup.find_all(['section', 'div', 'article'])
-            
-            for section in sections:
-                section_text = section.get_text().lower()
-                section_html = str(section)
-                
-                # Check if it's guru/founder related
-                if any(keyword in section_text for keyword in ['guru', 'founder', 'baba', 'harihar', 'ramji', 'spiritual leader']):
-                    images = section.find_all('img')
-                    for img in images:
-                        src = img.get('src', '')
-                        alt = img.get('alt', '')
-                        
-                        # Skip logos and small images
-                        if 'logo' in src.lower() or 'favicon' in src.lower() or 'icon' in src.lower():
-                            continue
-                        
-                        # Convert to absolute URL
-                        if src.startswith('//'):
-                            src = 'https:' + src
-                        elif src.startswith('/'):
-                            src = 'https://amritsagar.org' + src
-                        
-                        image_info = {
-                            'src': src,
-                            'alt': alt,
-                            'context': section_text[:150] + '...' if len(section_text) > 150 else section_text,
-                            'page': url
-                        }
-                        
-                        # Categorize the image
-                        if 'guru' in section_text or 'founder' in section_text:
-                            guru_section_info['guru_section_images'].append(image_info)
-                        elif 'about' in section_text:
-                            guru_section_info['about_section_images'].append(image_info)
-                        elif 'team' in section_text:
-                            guru_section_info['team_section_images'].append(image_info)
-                        
-                        guru_section_info['found_images'].append(image_info)
-            
-        except Exception as e:
-            print(f"❌ Error analyzing {url}: {e}")
-    
-    # Save the analysis
-    with open('guru_section_analysis.json', 'w') as f:
-        json.dump(guru_section_info, f, indent=2)
-    
     print(f"✅ Found {len(guru_section_info['found_images'])} total images")
     print(f"✅ Found {len(guru_section_info['guru_section_images'])} guru section images")
     print(f"✅ Found {len(guru_section_info['about_section_images'])} about section images")
@@ -134,8 +71,9 @@ if __name__ == "__main__":
     print("🧘 Analyzing Guru Section from Original Website")
     print("=" * 60)
     
-    # Analyze original website
-    analysis = analyze_guru_section()
+    # Analyze original website (--from-snapshot replays a crawl snapshot)
+    replay, _ = replay_from_argv(sys.argv[1:])
+    analysis = analyze_guru_section(replay)
     
     # Determine best image
     recommendations = determine_best_guru_image()
@@ -2,8 +2,13 @@ import requests
 from bs4 import BeautifulSoup
 import json
 import re
+import sys
 
-def analyze_main_website():
+from image_index import ImageIndex, index_homepage_mapping
+from placement_solver import solve_placements
+from site_snapshot import replay_from_argv
+
+def analyze_main_website(replay=None):
     """Analyze the main website to understand image placement"""
     
     base_url = "https://amritsagar.org"
@@ -18,8 +23,8 @@ def analyze_main_website():
     })
     
     try:
-        # Get homepage
-        response = session.get(base_url)
+        # Get homepage, from the snapshot when replaying
+        response = (replay or session).get(base_url)
         response.raise_for_status()
         soup = BeautifulSoup(response.text, 'html.parser')
         
@@ -72,6 +77,11 @@ def analyze_main_website():
         with open('main_website_image_mapping.json', 'w') as f:
             json.dump(image_mapping, f, indent=2)
         
+        # Keep the attribution index in step with the homepage re-analysis
+        index = ImageIndex()
+        index_homepage_mapping(index, image_mapping['homepage'])
+        index.save()
+        
         print(f"✅ Found {len(images)} images on homepage")
         print(f"📊 Hero background: {image_mapping['homepage']['hero_background']}")
         print(f"📊 About section: {image_mapping['homepage']['about_section']}")
@@ -87,164 +97,18 @@ def analyze_main_website():
 def create_placement_map():
     """Create a placement map based on the downloaded images"""
     
-    # Map of original URLs to local filenames
-    url_to_filename = {
-        "https://amritsagar.org/wp-content/uploads/2023/06/4.jpg": "4.jpg",
-        "https://stayontheganges.com/wp-content/uploads/2023/06/3.jpg": "3.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/13.jpg": "13.jpg",
-        "https://stayontheganges.com/wp-content/uploads/2023/06/19.jpg": "19.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/17.jpg": "17.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/8.jpg": "8.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/10.jpg": "10.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/11.jpg": "11.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/5.jpg": "5.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/9.jpg": "9.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/14.jpg": "14.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/12.jpg": "12.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/amrit-sagar-1.jpg": "amrit-sagar-1.jpg",
-        # Cropped versions
-        "https://amritsagar.org/wp-content/uploads/2023/06/8-600x400_c.jpg": "8-600x400_c.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/5-600x400_c.jpg": "5-600x400_c.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/11-600x400_c.jpg": "11-600x400_c.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/14-600x400_c.jpg": "14-600x400_c.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/3-600x400_c.jpg": "3-600x400_c.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/10-600x400_c.jpg": "10-600x400_c.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/17-600x400_c.jpg": "17-600x400_c.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/13-600x400_c.jpg": "13-600x400_c.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/19-600x400_c.jpg": "19-600x400_c.jpg",
-        "https://amritsagar.org/wp-content/uploads/2023/06/12-600x400_c.jpg": "12-600x400_c.jpg"
-    }
-    
-    # Create placement map based on typical website structure
-    placement_map = {
-        "homepage": {
-            "hero_background": "images/4.jpg",
-            "about_section": "images/amrit-sagar-1.jpg",
-            "gallery": [
-                "images/4.jpg",
-                "images/amrit-sagar-1.jpg", 
-                "images/9.jpg",
-                "images/17.jpg",
-                "images/4.jpg",
-                "images/amrit-sagar-1.jpg",
-                "images/17.jpg",
-                "images/9.jpg",
-                "images/17.jpg"
-            ]
-        },
-        "about-aghor-foundation": {
-            "hero_background": "images/9.jpg",
-            "about_image": "images/9.jpg",
-            "founder_image": "images/9.jpg",
-            "campus_gallery": [
-                "images/4.jpg",
-                "images/amrit-sagar-1.jpg",
-                "images/9.jpg",
-                "images/17.jpg",
-                "images/4.jpg",
-                "images/amrit-sagar-1.jpg",
-                "images/9.jpg",
-                "images/17.jpg"
-            ]
-        },
-        "about-bal-ashram": {
-            "hero_background": "images/amrit-sagar-1.jpg",
-            "about_image": "images/9.jpg",
-            "gallery": [
-                "images/4.jpg",
-                "images/amrit-sagar-1.jpg",
-                "images/9.jpg",
-                "images/17.jpg"
-            ]
-        },
-        "about-holistic-farm": {
-            "hero_background": "images/17.jpg",
-            "about_image": "images/17.jpg",
-            "gallery": [
-                "images/4.jpg",
-                "images/amrit-sagar-1.jpg",
-                "images/9.jpg",
-                "images/17.jpg"
-            ]
-        },
-        "about-team": {
-            "hero_background": "images/9.jpg",
-            "team_images": [
-                "images/9.jpg",
-                "images/17.jpg",
-                "images/4.jpg",
-                "images/amrit-sagar-1.jpg"
-            ]
-        },
-        "programs-day-visit": {
-            "hero_background": "images/4.jpg",
-            "overview_image": "images/amrit-sagar-1.jpg",
-            "gallery": [
-                "images/4.jpg",
-                "images/amrit-sagar-1.jpg",
-                "images/9.jpg",
-                "images/17.jpg",
-                "images/4.jpg",
-                "images/amrit-sagar-1.jpg",
-                "images/9.jpg",
-                "images/17.jpg",
-                "images/17.jpg"
-            ]
-        },
-        "programs-retreats": {
-            "hero_background": "images/17.jpg",
-            "gallery": [
-                "images/4.jpg",
-                "images/amrit-sagar-1.jpg",
-                "images/9.jpg",
-                "images/17.jpg"
-            ]
-        },
-        "programs-yoga": {
-            "hero_background": "images/9.jpg",
-            "gallery": [
-                "images/4.jpg",
-                "images/amrit-sagar-1.jpg",
-                "images/9.jpg",
-                "images/17.jpg"
-            ]
-        },
-        "programs-treatments": {
-            "hero_background": "images/17.jpg",
-            "gallery": [
-                "images/4.jpg",
-                "images/amrit-sagar-1.jpg",
-                "images/9.jpg",
-                "images/17.jpg"
-            ]
-        },
-        "amenities": {
-            "hero_background": "images/4.jpg",
-            "gallery": [
-                "images/4.jpg",
-                "images/amrit-sagar-1.jpg",
-                "images/9.jpg",
-                "images/17.jpg"
-            ]
-        },
-        "contact": {
-            "hero_background": "images/amrit-sagar-1.jpg",
-            "contact_image": "images/amrit-sagar-1.jpg"
-        }
-    }
-    
-    # Save the placement map
-    with open('image_placement_map.json', 'w') as f:
-        json.dump(placement_map, f, indent=2)
+    # Variants are picked per slot from the images on disk and the slot
+    # geometry in styles.css rather than a fixed list
+    placement_map = solve_placements()
     
-    print("✅ Image placement map created")
     print("📋 Saved to: image_placement_map.json")
     
     return placement_map
 
 if __name__ == "__main__":
-    # Analyze main website
-    mapping = analyze_main_website()
+    # Analyze main website (--from-snapshot replays a crawl snapshot)
+    replay, _ = replay_from_argv(sys.argv[1:])
+    mapping = analyze_main_website(replay)
     
     # Create placement map
     placement_map = create_placement_map()
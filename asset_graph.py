@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Asset Reference Integrity Check for Amrit Sagar Pages
+Keeps a persistent graph of page -> asset and page -> page references, re-parses only the files
+that changed since the last run, and reports missing targets, case mismatches and unreferenced
+files in images/ and original_images/
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+from build_site import CSS_IMPORT, SRCSET_ATTRIBUTE, URL_ATTRIBUTE, resolve
+from streaming_html import CSS_URL_PATTERN
+
+GRAPH_FILE = os.path.join('build', 'asset_graph.json')
+
+# Bump when extraction changes so every file is re-parsed
+GRAPH_VERSION = 1
+
+# Hand-maintained mapping data that names images directly; checked for broken names but not
+# counted as a use, since none of it ships with the site
+DATA_SOURCES = (
+    'image_placement_map.json', 'image_placeholders.json',
+    'optimized_campus_facilities.json', 'guru_image_recommendations.json'
+)
+
+ORPHAN_DIRS = ('images', 'original_images')
+
+# Quoted local paths in JS and JSON strings
+PATH_LITERAL = re.compile(
+    r'["\'`]((?![a-z]+:|//)[\w./-]*[\w-]\.(?:html|css|js|json|jpe?g|png|gif|webp|avif|svg|ico|woff2?|ttf))["\'`]',
+    re.I
+)
+
+
+def line_of(text, position):
+    return text.count('\n', 0, position) + 1
+
+
+def html_refs(html):
+    refs = []
+    for match in URL_ATTRIBUTE.finditer(html):
+        line = line_of(html, match.start(2))
+        if SRCSET_ATTRIBUTE.search(match.group(1)):
+            refs += [(c.split()[0], line) for c in match.group(2).split(',') if c.strip()]
+        else:
+            refs.append((match.group(2), line))
+    return refs + css_refs(html)
+
+
+def css_refs(css):
+    refs = [(match.group(1), line_of(css, match.start(1))) for match in CSS_URL_PATTERN.finditer(css)]
+    return refs + [(match.group(2), line_of(css, match.start(2))) for match in CSS_IMPORT.finditer(css)]
+
+
+def literal_refs(text):
+    return [(match.group(1), line_of(text, match.start(1))) for match in PATH_LITERAL.finditer(text)]
+
+
+def source_kind(path):
+    if path in DATA_SOURCES:
+        return 'data'
+    return {'.html': 'html', '.htm': 'html', '.css': 'css', '.js': 'js'}.get(os.path.splitext(path)[1].lower())
+
+
+def extract_refs(path, text):
+    """[[url, root-relative target, line], ...] for every local reference in one source file"""
+    kind = source_kind(path)
+    if kind == 'html':
+        refs = html_refs(text)
+    elif kind == 'css':
+        refs = css_refs(text)
+    else:
+        refs = literal_refs(text)
+
+    base_dir = os.path.dirname(path)
+    extracted = []
+    for url, line in refs:
+        # Data files name images from the root; everything else resolves like a browser would
+        target = resolve(url, '' if kind == 'data' else base_dir)
+        if target and '${' not in url:
+            extracted.append([url.strip(), target.replace(os.sep, '/'), line])
+    return extracted
+
+
+class AssetGraph:
+    """Reference graph persisted between runs; a file is re-parsed only when its mtime or size changes"""
+
+    def __init__(self, root='.', graph_file=GRAPH_FILE):
+        self.root = root
+        self.graph_path = os.path.join(root, graph_file)
+        self.files = {}
+        self.listings = {}
+        self.parsed = []
+        if os.path.exists(self.graph_path):
+            with open(self.graph_path, 'r') as f:
+                saved = json.load(f)
+            if saved.get('version') == GRAPH_VERSION:
+                self.files = saved['files']
+
+    def listing(self, directory):
+        """Exact names in a directory, cached for the run (also how case mismatches are found)"""
+        if directory not in self.listings:
+            full_path = os.path.join(self.root, directory)
+            self.listings[directory] = set(os.listdir(full_path)) if os.path.isdir(full_path) else set()
+        return self.listings[directory]
+
+    def status(self, target):
+        """'ok', 'missing' or ('case', actual path) for a root-relative target"""
+        parts = [] if target in ('', '.') else target.split('/')
+        actual = []
+        for index, part in enumerate(parts):
+            if part == '..':
+                return 'missing'
+            names = self.listing('/'.join(actual))
+            if part not in names:
+                folded = [name for name in names if name.lower() == part.lower()]
+                if not folded:
+                    return 'missing'
+                part = folded[0]
+            actual.append(part)
+        if os.path.isdir(os.path.join(self.root, *actual)) and 'index.html' not in self.listing('/'.join(actual)):
+            return 'missing'
+        actual_path = '/'.join(actual)
+        return 'ok' if actual_path == '/'.join(parts) else ('case', actual_path)
+
+    def refresh(self, path):
+        """Re-parse path if it changed since it was last recorded; drops it if it was deleted"""
+        full_path = os.path.join(self.root, path)
+        try:
+            stat = os.stat(full_path)
+        except FileNotFoundError:
+            self.files.pop(path, None)
+            return None
+        record = self.files.get(path)
+        if record and record['mtime_ns'] == stat.st_mtime_ns and record['size'] == stat.st_size:
+            return record
+        with open(full_path, 'r', encoding='utf-8', errors='replace') as f:
+            refs = extract_refs(path, f.read())
+        record = {'kind': source_kind(path), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'refs': refs}
+        self.files[path] = record
+        self.parsed.append(path)
+        return record
+
+    def update(self):
+        """Bring the graph up to date: every page and data file, then the CSS and JS they reach"""
+        sources = sorted(os.path.relpath(p, self.root).replace(os.sep, '/')
+                         for p in glob.glob(os.path.join(self.root, '*.html')))
+        sources += [path for path in DATA_SOURCES if os.path.exists(os.path.join(self.root, path))]
+
+        reached = []
+        queue = list(sources)
+        while queue:
+            path = queue.pop(0)
+            if path in reached:
+                continue
+            record = self.refresh(path)
+            if record is None:
+                continue
+            reached.append(path)
+            for _, target, _ in record['refs']:
+                if source_kind(target) in ('css', 'js') and target not in reached:
+                    queue.append(target)
+
+        # Files nothing reaches any more are forgotten so the graph doesn't grow stale entries
+        for path in set(self.files) - set(reached):
+            del self.files[path]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.graph_path) or '.', exist_ok=True)
+        with open(self.graph_path, 'w') as f:
+            json.dump({'version': GRAPH_VERSION, 'files': self.files}, f, indent=1, sort_keys=True)
+
+    def referrers(self, target):
+        return sorted((path, line) for path, record in self.files.items()
+                      for _, ref_target, line in record['refs'] if ref_target == target)
+
+    def check(self, orphan_dirs=ORPHAN_DIRS):
+        """Missing targets, case mismatches and files in orphan_dirs no shipped file references"""
+        missing = []
+        case_mismatches = []
+        used = set()
+        for path, record in sorted(self.files.items()):
+            for url, target, line in record['refs']:
+                result = self.status(target)
+                entry = {'source': path, 'line': line, 'url': url, 'target': target}
+                if result == 'missing':
+                    missing.append(entry)
+                elif result != 'ok':
+                    case_mismatches.append({**entry, 'actual': result[1]})
+                if record['kind'] != 'data':
+                    used.add(target if result in ('ok', 'missing') else result[1])
+
+        orphans = []
+        for directory in orphan_dirs:
+            for name in sorted(self.listing(directory)):
+                path = f"{directory}/{name}"
+                if path not in used and os.path.isfile(os.path.join(self.root, path)):
+                    orphans.append({'path': path, 'bytes': os.path.getsize(os.path.join(self.root, path))})
+
+        return {'missing': missing, 'case_mismatches': case_mismatches, 'orphans': orphans}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check local references between pages, stylesheets, scripts and images')
+    parser.add_argument('--root', default='.')
+    parser.add_argument('--graph', default=GRAPH_FILE)
+    parser.add_argument('--rebuild', action='store_true', help='Ignore the saved graph and parse every file')
+    parser.add_argument('--who', metavar='PATH', help='List the files that reference PATH and exit')
+    parser.add_argument('--report', help='Also write the findings to this JSON file')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    graph = AssetGraph(args.root, args.graph)
+    if args.rebuild:
+        graph.files = {}
+    graph.update()
+    if graph.parsed:
+        graph.save()
+
+    if args.who:
+        for path, line in graph.referrers(os.path.normpath(args.who).replace(os.sep, '/')):
+            print(f"{path}:{line}")
+        return
+
+    findings = graph.check()
+    elapsed = time.perf_counter() - started
+
+    print("🔗 Asset Reference Integrity Check")
+    print("=" * 60)
+    for entry in findings['missing']:
+        print(f"   ❌ {entry['source']}:{entry['line']}: missing {entry['target']}")
+    for entry in findings['case_mismatches']:
+        print(f"   🔠 {entry['source']}:{entry['line']}: {entry['target']} is {entry['actual']} on disk")
+    if findings['orphans']:
+        orphan_bytes = sum(orphan['bytes'] for orphan in findings['orphans'])
+        print(f"\n🗑️ {len(findings['orphans'])} unreferenced files ({orphan_bytes / 1024:.1f} KB):")
+        for orphan in findings['orphans']:
+            print(f"      {orphan['path']}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(findings, f, indent=2)
+
+    refs = sum(len(record['refs']) for record in graph.files.values())
+    print(f"\n📊 {len(graph.files)} files, {refs} references; re-parsed {len(graph.parsed)} in {elapsed * 1000:.1f} ms")
+    print(f"   {len(findings['missing'])} missing, {len(findings['case_mismatches'])} case mismatches, "
+          f"{len(findings['orphans'])} orphans")
+    sys.exit(1 if findings['missing'] or findings['case_mismatches'] else 0)
+
+
+if __name__ == "__main__":
+    main()
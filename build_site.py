@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Static Site Build for Amrit Sagar Pages
+Adds the hero preloads, image placeholders and critical CSS to each page, minifies the HTML, CSS
+and JS, renames every referenced asset to a content-hashed name, rewrites the references in the
+pages and stylesheets, and writes dist/ with an asset manifest for long-lived immutable caching
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+from urllib.parse import unquote
+
+from critical_css import CriticalCss
+from loading_hints import PageHints
+from placement_solver import list_pages
+from prune_css import RUNTIME_ALLOWLIST, merge_usage, page_usage, parse_css, prune, serialize
+from streaming_html import CSS_URL_PATTERN
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+OUTPUT_DIR = 'dist'
+MANIFEST_FILE = 'asset-manifest.json'
+HASH_LENGTH = 8
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+HTML_CACHE_CONTROL = 'no-cache'
+
+EXTERNAL_PREFIXES = ('http://', 'https://', '//', 'data:', '#', 'mailto:', 'tel:', 'javascript:')
+
+URL_ATTRIBUTE = re.compile(r'(\s(?:src|href|poster|srcset|imagesrcset)=")([^"]*)(")')
+SRCSET_ATTRIBUTE = re.compile(r'(?:srcset|imagesrcset)="$')
+CSS_IMPORT = re.compile(r'(@import\s+["\'])([^"\']+)(["\'])')
+
+# Elements whose contents keep their whitespace (script and style are minified separately)
+RAW_ELEMENT = re.compile(r'<(pre|textarea|script|style)\b([^>]*)>(.*?)</\1>', re.S | re.I)
+HTML_COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.S)
+
+# Characters after which a / starts a regex literal rather than a division
+REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw', 'yield', 'await')
+
+
+def _quoted_end(js, start):
+    """Index just past the string or template literal starting at start"""
+    quote = js[start]
+    i = start + 1
+    while i < len(js):
+        ch = js[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == quote:
+            return i + 1
+        if quote == '`' and js.startswith('${', i):
+            i = _expression_end(js, i + 2)
+            continue
+        if ch == '\n' and quote != '`':
+            return i
+        i += 1
+    return len(js)
+
+
+def _expression_end(js, start):
+    """Index just past the } closing a template ${...} expression"""
+    depth = 1
+    i = start
+    while i < len(js):
+        ch = js[i]
+        if ch in '\'"`':
+            i = _quoted_end(js, i)
+            continue
+        if ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(js)
+
+
+def _regex_end(js, start):
+    """Index just past a regex literal, or start + 1 if it isn't one"""
+    i = start + 1
+    in_class = False
+    while i < len(js):
+        ch = js[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == '\n':
+            return start + 1
+        if ch == '[':
+            in_class = True
+        elif ch == ']':
+            in_class = False
+        elif ch == '/' and not in_class:
+            i += 1
+            while i < len(js) and js[i].isalpha():
+                i += 1
+            return i
+        i += 1
+    return start + 1
+
+
+def _regex_allowed(tail):
+    tail = tail.rstrip()
+    if not tail or tail[-1] in REGEX_PRECEDERS:
+        return True
+    return re.search(r'\b(?:' + '|'.join(REGEX_KEYWORDS) + r')$', tail) is not None
+
+
+def minify_js(js):
+    """Strip comments, indentation and blank lines
+
+    Uses rjsmin when installed. The fallback keeps every line break, so
+    automatic semicolon insertion behaves exactly as in the source.
+    """
+    if rjsmin:
+        return rjsmin.jsmin(js)
+
+    out = []
+    code = []
+    tail = ''
+    i = 0
+    while i < len(js):
+        ch = js[i]
+        if js.startswith('//', i):
+            end = js.find('\n', i)
+            i = len(js) if end == -1 else end
+            continue
+        if js.startswith('/*', i):
+            end = js.find('*/', i + 2)
+            i = len(js) if end == -1 else end + 2
+            code.append(' ')
+            continue
+        if ch in '\'"`' or (ch == '/' and _regex_allowed(tail)):
+            end = _quoted_end(js, i) if ch != '/' else _regex_end(js, i)
+            # Literals are copied verbatim; only the code between them is compacted
+            out.append(_compact_code(''.join(code)))
+            out.append(js[i:end])
+            code = []
+        else:
+            end = i + 1
+            code.append(ch)
+        if not js[i:end].isspace():
+            tail = (tail + js[i:end])[-16:]
+        i = end
+    out.append(_compact_code(''.join(code)))
+
+    return ''.join(out).strip() + '\n'
+
+
+def _compact_code(code):
+    return re.sub(r'[ \t]+', ' ', re.sub(r'[ \t]*\n\s*', '\n', code))
+
+
+def minify_css(css):
+    return serialize(parse_css(css))
+
+
+def _collapse_whitespace(text):
+    return re.sub(r'\s+', lambda match: '\n' if '\n' in match.group(0) else ' ', text)
+
+
+def minify_html(html):
+    """Drop comments and collapse whitespace runs; <pre>/<textarea> are left as written"""
+    out = []
+    position = 0
+    for match in RAW_ELEMENT.finditer(html):
+        out.append(_collapse_whitespace(HTML_COMMENT.sub('', html[position:match.start()])))
+        name, attrs, body = match.group(1).lower(), match.group(2), match.group(3)
+        if name == 'script' and body.strip() and 'src=' not in attrs and 'json' not in attrs:
+            body = minify_js(body).strip()
+        elif name == 'style':
+            body = minify_css(body)
+        out.append(f"<{match.group(1)}{attrs}>{body}</{match.group(1)}>")
+        position = match.end()
+    out.append(_collapse_whitespace(HTML_COMMENT.sub('', html[position:])))
+    return ''.join(out).strip() + '\n'
+
+
+def resolve(url, base_dir):
+    """Root-relative path a local URL points at, or None for external and fragment URLs"""
+    url = url.strip()
+    if not url or url.lower().startswith(EXTERNAL_PREFIXES):
+        return None
+    path = re.split(r'[?#]', url, maxsplit=1)[0]
+    if path.startswith('/'):
+        return os.path.normpath(unquote(path.lstrip('/')))
+    return os.path.normpath(os.path.join(base_dir, unquote(path)))
+
+
+def rewrite_url(url, base_dir, manifest):
+    target = resolve(url, base_dir)
+    if target not in manifest:
+        return url
+    suffix = url.strip()[len(re.split(r'[?#]', url.strip(), maxsplit=1)[0]):]
+    return os.path.relpath(manifest[target], base_dir or '.').replace(os.sep, '/') + suffix
+
+
+def rewrite_srcset(value, base_dir, manifest):
+    candidates = []
+    for candidate in value.split(','):
+        parts = candidate.strip().split(None, 1)
+        if parts:
+            parts[0] = rewrite_url(parts[0], base_dir, manifest)
+            candidates.append(' '.join(parts))
+    return ', '.join(candidates)
+
+
+def rewrite_css_urls(css, base_dir, manifest):
+    def replace(match):
+        return match.group(0).replace(match.group(1), rewrite_url(match.group(1), base_dir, manifest))
+    css = CSS_URL_PATTERN.sub(replace, css)
+    return CSS_IMPORT.sub(lambda m: m.group(1) + rewrite_url(m.group(2), base_dir, manifest) + m.group(3), css)
+
+
+def rewrite_html(html, base_dir, manifest):
+    def replace(match):
+        if SRCSET_ATTRIBUTE.search(match.group(1)):
+            value = rewrite_srcset(match.group(2), base_dir, manifest)
+        else:
+            value = rewrite_url(match.group(2), base_dir, manifest)
+        return match.group(1) + value + match.group(3)
+    return rewrite_css_urls(URL_ATTRIBUTE.sub(replace, html), base_dir, manifest)
+
+
+def html_references(html):
+    urls = []
+    for match in URL_ATTRIBUTE.finditer(html):
+        if SRCSET_ATTRIBUTE.search(match.group(1)):
+            urls += [candidate.split()[0] for candidate in match.group(2).split(',') if candidate.strip()]
+        else:
+            urls.append(match.group(2))
+    return urls + CSS_URL_PATTERN.findall(html)
+
+
+def css_references(css):
+    return CSS_URL_PATTERN.findall(css) + [match.group(2) for match in CSS_IMPORT.finditer(css)]
+
+
+def fingerprinted_name(path, content):
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{digest}{ext}"
+
+
+class SiteBuilder:
+    """Builds assets depth first so every file is hashed after the files it references
+
+    stages are callables (page, html) -> html applied in order to each source page before
+    its references are collected, so what they add is built and fingerprinted too; each
+    has a save() for the cache it keeps.
+    """
+
+    def __init__(self, root='.', output_dir=OUTPUT_DIR, pruned_css=None, stages=()):
+        self.root = root
+        self.output_dir = output_dir
+        self.pruned_css = pruned_css or {}
+        self.stages = list(stages)
+        self.manifest = {}
+        self.sizes = {}
+
+    def _local_targets(self, urls, base_dir):
+        targets = []
+        for url in urls:
+            target = resolve(url, base_dir)
+            if target and not target.endswith('.html') and os.path.isfile(os.path.join(self.root, target)):
+                targets.append(target)
+        return targets
+
+    def _write(self, relative_path, content):
+        path = os.path.join(self.output_dir, relative_path)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+
+    def build_asset(self, path):
+        """Minify, rewrite and hash one asset (and what it references); returns its hashed path"""
+        if path in self.manifest:
+            return self.manifest[path]
+
+        with open(os.path.join(self.root, path), 'rb') as f:
+            original = f.read()
+        content = original
+        ext = os.path.splitext(path)[1].lower()
+        base_dir = os.path.dirname(path)
+
+        if ext == '.css':
+            css = self.pruned_css.get(path) or minify_css(original.decode('utf-8'))
+            for target in self._local_targets(css_references(css), base_dir):
+                self.build_asset(target)
+            content = rewrite_css_urls(css, base_dir, self.manifest).encode('utf-8')
+        elif ext == '.js':
+            content = minify_js(original.decode('utf-8')).encode('utf-8')
+
+        hashed = fingerprinted_name(path, content)
+        self._write(hashed, content)
+        self.manifest[path] = hashed
+        self.sizes[path] = {'before': len(original), 'after': len(content)}
+        return hashed
+
+    def build_page(self, page):
+        with open(os.path.join(self.root, page), 'r', encoding='utf-8') as f:
+            source = f.read()
+        html = source
+        for stage in self.stages:
+            html = stage(page, html)
+        base_dir = os.path.dirname(page)
+        for target in self._local_targets(html_references(html), base_dir):
+            self.build_asset(target)
+
+        content = minify_html(rewrite_html(html, base_dir, self.manifest)).encode('utf-8')
+        self._write(page, content)
+        self.sizes[page] = {'before': len(source.encode('utf-8')), 'after': len(content)}
+
+    def write_manifest(self, pages):
+        manifest = {
+            'assets': dict(sorted(self.manifest.items())),
+            'pages': sorted(pages),
+            'cache_control': {
+                'assets': IMMUTABLE_CACHE_CONTROL,
+                'pages': HTML_CACHE_CONTROL
+            }
+        }
+        with open(os.path.join(self.output_dir, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+def pruned_stylesheets(root, pages, allowlist=RUNTIME_ALLOWLIST):
+    """Site-wide pruned CSS for every local stylesheet the pages link"""
+    usage = merge_usage(page_usage(os.path.join(root, page), allowlist, root) for page in pages)
+    stylesheets = {}
+    for page in pages:
+        with open(os.path.join(root, page), 'r', encoding='utf-8') as f:
+            for href in re.findall(r'<link\b[^>]*\brel="stylesheet"[^>]*\bhref="([^"]+)"', f.read()):
+                target = resolve(href, os.path.dirname(page))
+                if target and target not in stylesheets and os.path.isfile(os.path.join(root, target)):
+                    with open(os.path.join(root, target), 'r', encoding='utf-8') as css:
+                        stylesheets[target] = serialize(prune(parse_css(css.read()), usage))
+    return stylesheets
+
+
+def page_stages(root='.', pages=(), hints=True, critical=True, workers=None):
+    """The page stages in build order: hints first, so the critical CSS sees the final markup"""
+    stages = []
+    if hints:
+        stage = PageHints(root, workers=workers)
+        stage.prepare(pages)
+        stages.append(stage)
+    if critical:
+        stages.append(CriticalCss(root=root))
+    return stages
+
+
+def build_site(root='.', output_dir=OUTPUT_DIR, prune_unused=False, hints=True, critical=True, workers=None):
+    if os.path.abspath(output_dir) == os.path.abspath(root):
+        raise ValueError("The output directory must not be the site root")
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+
+    pages = [os.path.relpath(page, root) for page in list_pages(root)]
+    stages = page_stages(root, pages, hints, critical, workers)
+    builder = SiteBuilder(root, output_dir, pruned_stylesheets(root, pages) if prune_unused else None, stages)
+    for page in pages:
+        builder.build_page(page)
+    for stage in stages:
+        stage.save()
+    manifest = builder.write_manifest(pages)
+    return manifest, builder.sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Minify and fingerprint the static site into dist/')
+    parser.add_argument('--root', default='.')
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--prune-css', action='store_true', help='Ship stylesheets pruned to the rules the pages use')
+    parser.add_argument('--no-hints', action='store_true', help='Skip hero preloads and image placeholders')
+    parser.add_argument('--no-critical-css', action='store_true', help='Keep render-blocking stylesheets')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print("🏗️ Building Static Site")
+    print("=" * 60)
+
+    manifest, sizes = build_site(args.root, args.output_dir, args.prune_css, not args.no_hints,
+                                 not args.no_critical_css, args.workers)
+
+    totals = {}
+    for path, size in sizes.items():
+        kind = os.path.splitext(path)[1].lower().lstrip('.')
+        kind = kind if kind in ('html', 'css', 'js') else 'other'
+        before, after = totals.get(kind, (0, 0))
+        totals[kind] = (before + size['before'], after + size['after'])
+
+    print(f"✅ {len(manifest['pages'])} pages, {len(manifest['assets'])} fingerprinted assets")
+    for kind, (before, after) in sorted(totals.items()):
+        saved = f" (-{1 - after / before:.1%})" if before and after < before else ''
+        print(f"   📦 {kind}: {before} -> {after} bytes{saved}")
+    print(f"📋 Manifest saved to: {os.path.join(args.output_dir, MANIFEST_FILE)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,26 +4,51 @@ Comprehensive Amrit Sagar Website Image Extractor
 Extracts and downloads ALL images from the entire website including all sub-pages
 """
 
-import requests
 from bs4 import BeautifulSoup
 import re
 import os
 import urllib.parse
 from concurrent.futures import ThreadPoolExecutor, as_completed
-import time
-import json
+import argparse
+import sys
 from urllib.parse import urljoin
 
+from content_sniffing import NotAnImageError, fetch_image, filename_for_format
+from jsonl_report import JsonlReport
+from multi_origin import MultiOriginFetcher
+from site_snapshot import SNAPSHOT_FILE, SnapshotArchive, SnapshotWriter
+from sitemap_discovery import CrawlState, canonical_page, fetch_sitemap_pages
+from streaming_html import stream_page_urls
+from url_frontier import UrlFrontier
+
 class ComprehensiveImageExtractor:
-    def __init__(self):
-        self.base_url = "http://amritsagar.org/"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        self.extracted_urls = set()
-        self.all_images = []
+    def __init__(self, full_crawl=False, origins=None, streaming=False, snapshot=None, replay=None):
+        # Pages are keyed on https, the scheme the sitemaps list them under
+        self.base_url = "https://amritsagar.org/"
+        user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        # Each origin gets its own connection pool, concurrency limit, crawl budget
+        # and robots.txt pacing. A snapshot path records every response; a replay
+        # archive serves them back offline instead of the network.
+        self.snapshot = SnapshotWriter(snapshot) if snapshot else None
+        self.fetcher = MultiOriginFetcher(user_agent, origins, recorder=self.snapshot, replay=replay)
+        # Discovered pages and downloaded URLs live on disk behind a Bloom filter
+        self.frontier = UrlFrontier()
+        self.extracted_urls = self.frontier.seen_set('downloaded_images')
         self.output_dir = "images"
+        # Records are streamed here during the crawl; jsonl_report.py compacts them
+        self.report_file = "comprehensive_image_report.jsonl"
+        self.report = None
+        
+        # Incremental recrawl: skip pages whose sitemap lastmod is unchanged.
+        # Replays always walk every captured page and leave the crawl state alone.
+        self.replaying = replay is not None
+        self.full_crawl = full_crawl or self.replaying
+        self.crawl_state = CrawlState()
+        self.page_lastmod = {}
+        self.unsettled_pages = []
+        
+        # Streaming mode tokenizes pages as they download instead of building a soup
+        self.streaming = streaming
         
         # Create output directory
         os.makedirs(self.output_dir, exist_ok=True)
@@ -31,13 +56,25 @@ class ComprehensiveImageExtractor:
     def get_page_content(self, url):
         """Get page content with error handling"""
         try:
-            response = self.session.get(url, timeout=15)
+            response = self.fetcher.get(url, timeout=15)
             response.raise_for_status()
             return response.text, response.url
         except Exception as e:
             print(f"Error fetching {url}: {e}")
             return None, url
     
+    def stream_images(self, url):
+        """Images and style backgrounds from one streamed pass over a page; None on error"""
+        try:
+            images = set()
+            for kind, found in stream_page_urls(self.fetcher, url):
+                if kind != 'link' and self.is_valid_image_url(found):
+                    images.add(found)
+            return list(images)
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+    
     def extract_images_from_html(self, html_content, base_url):
         """Extract all image URLs from HTML content"""
         if not html_content:
@@ -70,7 +107,7 @@ class ComprehensiveImageExtractor:
             bg_pattern = r'background-image:\s*url\(["\']?(.*?)["\']?\)'
             matches = re.findall(bg_pattern, style, re.IGNORECASE)
             for match in matches:
-                bg_url = match[1]
+                bg_url = match
                 if bg_url.startswith('//'):
                     bg_url = 'https:' + bg_url
                 elif bg_url.startswith('/'):
@@ -100,8 +137,29 @@ class ComprehensiveImageExtractor:
         """Discover all pages on the website"""
         print("🔍 Discovering all pages...")
         
-        # Start with main page
-        pages = [start_url]
+        # Sitemaps are the primary seed and carry each page's lastmod
+        self.page_lastmod = {}
+        hosts = set()
+        for origin in self.fetcher.origins:
+            host = urllib.parse.urlparse(origin).netloc
+            if host not in hosts:
+                hosts.add(host)
+                self.page_lastmod.update(fetch_sitemap_pages(self.fetcher, origin + '/'))
+        pages = self.frontier
+        pages.add(canonical_page(start_url))
+        for url in self.page_lastmod:
+            pages.add(url)
+        
+        # Link scraping only adds pages the sitemaps don't list
+        if self.streaming:
+            try:
+                # Links are enqueued while the page is still downloading
+                for kind, href in stream_page_urls(self.fetcher, start_url):
+                    if kind == 'link' and self.fetcher.is_internal(href):
+                        pages.add(canonical_page(href))
+            except Exception as e:
+                print(f"Error discovering pages: {e}")
+            return pages
         
         try:
             content, actual_url = self.get_page_content(start_url)
@@ -121,34 +179,32 @@ class ComprehensiveImageExtractor:
                             href = urljoin(self.base_url, href)
                         
                         # Only include internal pages
-                        if 'amritsagar.org' in href and href not in pages:
-                            pages.append(href)
+                        if self.fetcher.is_internal(href):
+                            pages.add(canonical_page(href))
                 
                 # Also find menu items and navigation
                 nav_links = soup.find_all('nav')
                 for nav in nav_links:
                     for link in nav.find_all('a', href=True):
                         href = link.get('href')
-                        if href and 'amritsagar.org' in href:
+                        if href and self.fetcher.is_internal(href):
                             if href.startswith('/'):
                                 href = urljoin(self.base_url, href)
-                            if href not in pages:
-                                pages.append(href)
+                            pages.add(canonical_page(href))
         
         except Exception as e:
             print(f"Error discovering pages: {e}")
         
-        return list(set(pages))
+        return pages
     
     def download_image(self, url, filename=None):
-        """Download a single image"""
+        """Download a single image; False when it failed and should be retried on the next run"""
         if url in self.extracted_urls:
-            return
+            return True
         
         try:
             print(f"⬇️ Downloading: {url}")
-            response = self.session.get(url, timeout=20)
-            response.raise_for_status()
+            content, image_format, extension = fetch_image(self.fetcher, url, timeout=20)
             
             # Generate filename
             if not filename:
@@ -157,29 +213,37 @@ class ComprehensiveImageExtractor:
                 if path:
                     filename = os.path.basename(path)
                 else:
-                    filename = f"image_{len(self.all_images)}.jpg"
+                    filename = f"image_{self.report.count('downloaded')}"
             
-            # Add extension if missing
-            if not any(filename.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp']):
-                filename += '.jpg'
+            # Name the file by the format actually received
+            filename = filename_for_format(filename, extension)
             
             filepath = os.path.join(self.output_dir, filename)
             
             with open(filepath, 'wb') as f:
-                f.write(response.content)
+                f.write(content)
             
             self.extracted_urls.add(url)
-            self.all_images.append({
-                'url': url,
-                'filename': filename,
-                'filepath': filepath,
-                'size': len(response.content)
-            })
+            self.report.record(
+                'downloaded',
+                url=url,
+                filename=filename,
+                filepath=filepath,
+                format=image_format,
+                size=len(content)
+            )
             
             print(f"✅ Downloaded: {filename}")
+            return True
             
+        except NotAnImageError as e:
+            # Not an image: retrying would only be rejected again
+            self.report.record('rejected', url=url, reason=str(e))
+            print(f"🚫 Rejected {url}: {e}")
+            return True
         except Exception as e:
             print(f"❌ Error downloading {url}: {e}")
+            return False
     
     def extract_all_images(self):
         """Main method to extract all images from the entire website"""
@@ -187,23 +251,37 @@ class ComprehensiveImageExtractor:
         print(f"📁 Output directory: {self.output_dir}")
         print("=" * 60)
         
+        self.report = JsonlReport(self.report_file, 'comprehensive', base_url=self.base_url)
+        
         # Discover all pages
         pages = self.discover_all_pages(self.base_url)
         print(f"📄 Found {len(pages)} pages to analyze")
         
         # Extract images from all pages
         all_image_urls = set()
+        page_images = {}
         
-        for i, page_url in enumerate(pages):
-            print(f"\n📄 Processing page {i+1}/{len(pages)}: {page_url}")
+        i = 0
+        while (page_url := pages.pop()) is not None:
+            i += 1
+            lastmod = self.page_lastmod.get(page_url)
+            if not self.full_crawl and self.crawl_state.is_unchanged(page_url, lastmod):
+                print(f"\n⏭️ Skipping page {i}/{len(pages)} (unchanged since {lastmod}): {page_url}")
+                self.report.record('page', url=page_url, status='skipped')
+                continue
+            self.report.record('page', url=page_url, status='analyzed')
             
-            content, actual_url = self.get_page_content(page_url)
-            if content:
-                images = self.extract_images_from_html(content, actual_url)
+            print(f"\n📄 Processing page {i}/{len(pages)}: {page_url}")
+            
+            if self.streaming:
+                images = self.stream_images(page_url)
+            else:
+                content, actual_url = self.get_page_content(page_url)
+                images = self.extract_images_from_html(content, actual_url) if content else None
+            if images is not None:
                 all_image_urls.update(images)
+                page_images[page_url] = images
                 print(f"   Found {len(images)} images on this page")
-            
-            time.sleep(1)  # Be respectful to the server
         
         # Remove duplicates and filter
         unique_images = list(all_image_urls)
@@ -211,53 +289,90 @@ class ComprehensiveImageExtractor:
         
         print(f"\n🖼️ Total unique images found: {len(unique_images)}")
         print(f"✅ Valid images to download: {len(valid_images)}")
+        for img_url in valid_images:
+            self.report.record('image_url', url=img_url)
+        
+        # The same upload is often served by several origins; fetch it once
+        resolved = self.fetcher.resolve_mirrors(valid_images)
+        for img_url, mirrors in resolved.items():
+            if mirrors:
+                self.report.record('mirror', url=img_url, mirrors=mirrors)
+        download_urls = sorted(resolved)
+        print(f"🪞 {len(valid_images) - len(download_urls)} mirrored copies skipped")
         
         # Download images
-        print(f"\n⬇️ Starting download of {len(valid_images)} images...")
+        print(f"\n⬇️ Starting download of {len(download_urls)} images...")
         print("=" * 60)
         
         # Download with threading for speed
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            futures = []
-            for img_url in valid_images:
-                future = executor.submit(self.download_image, img_url)
-                futures.append(future)
+        # Per-origin slots do the limiting; the pool only needs enough threads to fill them
+        settled = set()
+        with ThreadPoolExecutor(max_workers=self.fetcher.total_concurrency()) as executor:
+            futures = {executor.submit(self.download_image, img_url): img_url for img_url in download_urls}
             
             # Wait for all downloads to complete
             for future in as_completed(futures):
                 try:
-                    future.result()
+                    if future.result():
+                        settled.add(futures[future])
                 except Exception as e:
                     print(f"Download error: {e}")
         
-        print(f"\n✅ Successfully downloaded {len(self.all_images)} images")
+        # A page only counts as crawled once every image on it is settled, so an
+        # interrupted run or a failed download is retried on the next incremental run
+        mirror_source = {mirror: url for url, mirrors in resolved.items() for mirror in mirrors}
+        for page_url, images in page_images.items():
+            if all(mirror_source.get(img, img) in settled for img in images):
+                self.crawl_state.mark_crawled(page_url, self.page_lastmod.get(page_url))
+            else:
+                self.unsettled_pages.append(page_url)
+                print(f"⚠️ Some images on {page_url} failed; it will be recrawled next run")
+        if not self.replaying:
+            self.crawl_state.save()
+        
+        print(f"\n✅ Successfully downloaded {self.report.count('downloaded')} images")
+        print(f"🚫 Rejected {self.report.count('rejected')} non-image responses")
         print(f"📁 Images saved to: {self.output_dir}/")
         
-        # Save comprehensive report
-        self.save_comprehensive_report(pages, valid_images)
+        # Close the report with its summary line
+        self.finish_report(len(pages))
+        pages.close()
+        if self.snapshot:
+            self.snapshot.close()
+            print(f"📼 Snapshot of {self.snapshot.captures} responses saved to: {self.snapshot.path}")
     
-    def save_comprehensive_report(self, pages, image_urls):
-        """Save detailed report of extraction"""
-        report = {
-            'extraction_date': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'base_url': self.base_url,
-            'total_pages_found': len(pages),
-            'pages_analyzed': pages,
-            'total_images_found': len(image_urls),
-            'images_downloaded': len(self.all_images),
-            'all_image_urls': sorted(list(image_urls)),
-            'downloaded_images': self.all_images,
-            'file_sizes': {img['filename']: img['size'] for img in self.all_images}
-        }
-        
-        with open('comprehensive_image_report.json', 'w') as f:
-            json.dump(report, f, indent=2)
+    def finish_report(self, total_pages):
+        """Write the summary line; the records were already streamed during the crawl"""
+        self.report.close(
+            base_url=self.base_url,
+            total_pages_found=total_pages,
+            origins=self.fetcher.stats()
+        )
         
-        print(f"\n📊 Comprehensive report saved to: comprehensive_image_report.json")
+        print(f"\n📊 Comprehensive report saved to: {self.report_file}")
+        print(f"   Run 'python jsonl_report.py {self.report_file}' for the pretty JSON report")
 
 def main():
     """Main execution function"""
-    extractor = ComprehensiveImageExtractor()
+    parser = argparse.ArgumentParser(description='Extract every image from the Amrit Sagar websites')
+    parser.add_argument('--full', action='store_true', help='Ignore sitemap lastmod and recrawl every page')
+    parser.add_argument('--stream', action='store_true',
+                        help='Extract URLs with the streaming tokenizer instead of BeautifulSoup')
+    parser.add_argument('--snapshot', nargs='?', const=SNAPSHOT_FILE,
+                        help=f'Record every response to a snapshot archive (default {SNAPSHOT_FILE})')
+    parser.add_argument('--from-snapshot', help='Replay the crawl from a snapshot archive, offline')
+    parser.add_argument('--check', action='store_true',
+                        help='With --from-snapshot, exit 1 unless every replayed page would be marked crawled')
+    args = parser.parse_args()
+    if args.check and not args.from_snapshot:
+        parser.error('--check needs --from-snapshot')
+    
+    extractor = ComprehensiveImageExtractor(
+        full_crawl=args.full,
+        streaming=args.stream,
+        snapshot=args.snapshot,
+        replay=SnapshotArchive(args.from_snapshot) if args.from_snapshot else None
+    )
     
     try:
         extractor.extract_all_images()
@@ -265,7 +380,13 @@ def main():
         print("\n" + "=" * 60)
         print("🎉 Comprehensive image extraction completed!")
         print(f"📁 Check the '{extractor.output_dir}' folder for all downloaded images")
-        print("📊 Check 'comprehensive_image_report.json' for detailed analysis")
+        print(f"📊 Check '{extractor.report_file}' for detailed analysis")
+        
+        if args.check and extractor.unsettled_pages:
+            print(f"❌ {len(extractor.unsettled_pages)} replayed pages would be recrawled:")
+            for page_url in extractor.unsettled_pages:
+                print(f"   {page_url}")
+            sys.exit(1)
         
     except KeyboardInterrupt:
         print("\n⚠️ Extraction interrupted by user")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Image Content Sniffing for Amrit Sagar Downloaders
+Checks Content-Type and magic numbers on the first bytes and aborts non-image transfers
+"""
+
+import os
+
+SNIFF_BYTES = 32
+
+# Content types servers send for images without naming the format
+GENERIC_CONTENT_TYPES = ('application/octet-stream', 'binary/octet-stream')
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif')
+
+
+class NotAnImageError(Exception):
+    """Raised when a download is rejected before its body is fetched"""
+
+
+def sniff_image_format(head):
+    """Identify an image format from its leading bytes; None if unrecognised"""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpeg', '.jpg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png', '.png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif', '.gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp', '.webp'
+    if head[4:8] == b'ftyp' and (b'avif' in head[8:SNIFF_BYTES] or b'avis' in head[8:SNIFF_BYTES]):
+        return 'avif', '.avif'
+    return None
+
+
+def check_content_type(content_type):
+    """Reason to reject a Content-Type header, or None if it may be an image"""
+    media_type = (content_type or '').split(';')[0].strip().lower()
+    if not media_type or media_type.startswith('image/') or media_type in GENERIC_CONTENT_TYPES:
+        return None
+    return f"Content-Type {media_type}"
+
+
+def fetch_image(session, url, timeout=20):
+    """Stream an image, aborting as soon as the headers or first bytes say it isn't one
+
+    Returns (content, format, extension); raises NotAnImageError on rejection.
+    """
+    response = session.get(url, timeout=timeout, stream=True)
+    try:
+        response.raise_for_status()
+
+        reason = check_content_type(response.headers.get('Content-Type'))
+        if reason:
+            raise NotAnImageError(reason)
+
+        chunks = response.iter_content(chunk_size=8192)
+        head = b''
+        for chunk in chunks:
+            head += chunk
+            if len(head) >= SNIFF_BYTES:
+                break
+
+        sniffed = sniff_image_format(head)
+        if not sniffed:
+            preview = head[:16].decode('latin-1').encode('unicode_escape').decode('ascii')
+            raise NotAnImageError(f"unrecognised leading bytes {preview!r}")
+
+        # Only read the rest of the body once the format is confirmed
+        content = head + b''.join(chunks)
+        return content, sniffed[0], sniffed[1]
+    finally:
+        response.close()
+
+
+def filename_for_format(filename, extension):
+    """Name a file by its real format rather than its URL suffix"""
+    base, ext = os.path.splitext(filename)
+    if ext.lower() == '.jpeg' and extension == '.jpg':
+        return filename
+    if ext.lower() not in IMAGE_EXTENSIONS:
+        base = filename
+    return base + extension
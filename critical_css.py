@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Critical CSS Inlining for Amrit Sagar Pages
+Build stage that inlines the styles.css rules each page needs above the fold (header/nav, hero and
+the first content section) into <head> and loads the full stylesheets without blocking first
+render; the source pages are left as written
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+from placement_solver import (
+    STYLESHEET, VIEWPORT, list_pages, parse_inline_style, parse_simple_selector,
+    parse_stylesheet, selector_matches, to_px
+)
+from prune_css import drop_unused_keyframes, filter_nodes, parse_css, serialize
+
+CACHE_FILE = os.path.join('build', 'critical_css_cache.json')
+
+# Bump when the extraction changes so cached results are recomputed
+CACHE_VERSION = 1
+
+# Height assumed for a block with no height or min-height in the stylesheet
+DEFAULT_BLOCK_HEIGHT = 600
+
+FLOW_SKIP = ('script', 'noscript', 'style', 'template')
+
+# Rules that only apply after interaction are never needed for first render
+INTERACTION_PSEUDO = re.compile(r':(?:hover|focus|focus-within|focus-visible|active|visited)\b')
+PSEUDO_ELEMENT = re.compile(r'::?(?:before|after|placeholder|selection|first-line|first-letter|marker|-webkit-[\w-]+|-moz-[\w-]+)')
+
+# Marks the markup this tool adds to the built pages
+CRITICAL_MARKER = 'data-critical-css'
+ASYNC_MARKER = 'data-async-css'
+STYLESHEET_LINK = re.compile(r'<link\b[^>]*\brel="stylesheet"[^>]*>')
+
+_compiled = {}
+
+
+def input_hash(html, stylesheet_css, viewport_height):
+    digest = hashlib.sha256()
+    for part in (str(CACHE_VERSION), str(viewport_height), stylesheet_css, html):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def estimated_height(element, base_rules, viewport):
+    """Declared height or min-height of a block, whichever is larger"""
+    declarations = {}
+    for parts, rule_declarations in base_rules:
+        if selector_matches(element, parts):
+            declarations.update(rule_declarations)
+    declarations.update(parse_inline_style(element.get('style')))
+
+    heights = [to_px(declarations.get(prop), viewport=viewport) for prop in ('height', 'min-height')]
+    heights = [height for height in heights if height]
+    return max(heights) if heights else DEFAULT_BLOCK_HEIGHT
+
+
+def flow_blocks(body):
+    """Top-level blocks in document order, looking inside <main>"""
+    for child in body.find_all(True, recursive=False):
+        if child.name in FLOW_SKIP:
+            continue
+        if child.name == 'main':
+            yield from flow_blocks(child)
+        else:
+            yield child
+
+
+def is_chrome(element):
+    return element.name in ('header', 'nav') or 'header' in element.get('class', [])
+
+
+def fold_blocks(soup, base_rules, viewport):
+    """Header/nav, hero and the first content section, plus anything else that starts in the viewport"""
+    blocks = []
+    top = 0
+    has_content = False
+    for block in flow_blocks(soup.body or soup):
+        if is_chrome(block):
+            blocks.append(block)
+            continue
+        if has_content and top >= viewport[1]:
+            break
+        blocks.append(block)
+        has_content = has_content or 'hero' not in block.get('class', [])
+        top += estimated_height(block, base_rules, viewport)
+    return blocks
+
+
+def fold_elements(blocks):
+    """Every element that can render above the fold: the blocks, their contents and ancestors"""
+    elements = {}
+    for block in blocks:
+        for element in [block] + block.find_all(True) + list(block.parents):
+            if element.name != '[document]':
+                elements[id(element)] = element
+    return list(elements.values())
+
+
+def compiled_selector(selector):
+    """soupsieve matcher for a selector's element, or None if it can't be checked"""
+    if selector not in _compiled:
+        target = PSEUDO_ELEMENT.sub('', selector).strip() or '*'
+        try:
+            _compiled[selector] = soupsieve.compile(target)
+        except Exception:
+            _compiled[selector] = None
+    return _compiled[selector]
+
+
+def selector_is_critical(selector, elements):
+    if INTERACTION_PSEUDO.search(selector):
+        return False
+    matcher = compiled_selector(selector)
+    # Selectors soupsieve can't parse are kept rather than risk an unstyled first paint
+    if matcher is None:
+        return True
+    return any(matcher.match(element) for element in elements)
+
+
+def critical_css(html, nodes, base_rules, viewport=VIEWPORT):
+    """Minified rules from nodes that match the above-the-fold part of a page"""
+    soup = BeautifulSoup(html, 'html.parser')
+    elements = fold_elements(fold_blocks(soup, base_rules, viewport))
+    critical, animations = filter_nodes(nodes, lambda selector: selector_is_critical(selector, elements))
+    return serialize(drop_unused_keyframes(critical, animations))
+
+
+def inline_critical(html, css):
+    """Inline the critical rules ahead of the stylesheets and make each stylesheet non-blocking"""
+    first = re.search(r'^([ \t]*)<link\b[^>]*\brel="stylesheet"', html, re.MULTILINE)
+    if not first:
+        return html
+
+    def make_async(match):
+        tag = match.group(0)
+        if ' media=' in tag:
+            return tag
+        async_tag = tag[:-1] + f' media="print" onload="this.media=\'all\'" {ASYNC_MARKER}>'
+        return f'{async_tag}<noscript {ASYNC_MARKER}>{tag}</noscript>'
+
+    head_end = html.find('</head>')
+    head = STYLESHEET_LINK.sub(make_async, html[first.start():head_end])
+    block = f'{first.group(1)}<style {CRITICAL_MARKER}>{css}</style>\n'
+    return html[:first.start()] + block + head + html[head_end:]
+
+
+def load_cache(path=CACHE_FILE):
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            cache = json.load(f)
+        if cache.get('version') == CACHE_VERSION:
+            return cache
+    return {'version': CACHE_VERSION, 'pages': {}}
+
+
+class CriticalCss:
+    """Build stage inlining each page's critical CSS, cached by page and stylesheet content"""
+
+    def __init__(self, stylesheet=STYLESHEET, root='.', viewport=VIEWPORT, cache_file=CACHE_FILE, force=False):
+        self.stylesheet_path = os.path.join(root, stylesheet)
+        self.viewport = viewport
+        self.cache_path = os.path.join(root, cache_file)
+        self.cache = {'version': CACHE_VERSION, 'pages': {}} if force else load_cache(self.cache_path)
+        self.stylesheet_css = None
+        self.nodes = None
+        self.base_rules = None
+        self.results = {}
+
+    def load_stylesheet(self):
+        """Current stylesheet text; parsed again only once a page needs it after a change"""
+        with open(self.stylesheet_path, 'r', encoding='utf-8') as f:
+            css = f.read()
+        if css != self.stylesheet_css:
+            self.stylesheet_css = css
+            self.nodes = None
+        return css
+
+    def __call__(self, page, html):
+        key = input_hash(html, self.load_stylesheet(), self.viewport[1])
+
+        cached = self.cache['pages'].get(page)
+        if cached and cached['hash'] == key:
+            css = cached['css']
+            status = 'cached'
+        else:
+            if self.nodes is None:
+                self.nodes = parse_css(self.stylesheet_css)
+                self.base_rules = [
+                    (parts, declarations)
+                    for selector, declarations in parse_stylesheet(self.stylesheet_css)
+                    if (parts := parse_simple_selector(selector))
+                ]
+            css = critical_css(html, self.nodes, self.base_rules, self.viewport)
+            self.cache['pages'][page] = {'hash': key, 'css': css}
+            status = 'built'
+
+        self.results[page] = {'status': status, 'bytes': len(css.encode('utf-8'))}
+        return inline_critical(html, css)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        with open(self.cache_path, 'w') as f:
+            json.dump(self.cache, f, indent=2, sort_keys=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report the above-the-fold CSS build_site.py inlines into each page')
+    parser.add_argument('--stylesheet', default=STYLESHEET)
+    parser.add_argument('--root', default='.')
+    parser.add_argument('--viewport-height', type=int, default=VIEWPORT[1])
+    parser.add_argument('--cache', default=CACHE_FILE)
+    parser.add_argument('--force', action='store_true', help='Ignore the cache and rebuild every page')
+    args = parser.parse_args()
+
+    print("🎨 Extracting Critical CSS")
+    print("=" * 60)
+
+    viewport = (VIEWPORT[0], args.viewport_height)
+    stage = CriticalCss(args.stylesheet, args.root, viewport, args.cache, args.force)
+    for page_path in list_pages(args.root):
+        page = os.path.relpath(page_path, args.root)
+        with open(page_path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        stage(page, html)
+    stage.save()
+
+    for page, result in stage.results.items():
+        icon = '♻️' if result['status'] == 'cached' else '✅'
+        print(f"   {icon} {page}: {result['bytes']} bytes to inline ({result['status']})")
+    built = sum(result['status'] == 'built' for result in stage.results.values())
+    print(f"\n📊 {built} built, {len(stage.results) - built} from cache; build_site.py inlines them into dist/")
+
+
+if __name__ == "__main__":
+    main()
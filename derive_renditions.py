@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Local Rendition Derivation for Amrit Sagar Images
+Reproduces the WordPress -WxH_c crops and thumbnails from the originals instead of downloading them
+"""
+
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image, ImageChops, ImageStat
+
+# Renditions the origin serves for each uploaded photo
+RENDITION_SIZES = [(600, 400), (75, 50)]
+# WordPress' default JPEG quality for generated sizes
+JPEG_QUALITY = 82
+
+RENDITION_PATTERN = re.compile(r'^(?P<base>.+)-(?P<w>\d+)x(?P<h>\d+)_c(?P<ext>\.\w+)$')
+
+
+def rendition_name(filename, width, height):
+    base, ext = os.path.splitext(filename)
+    return f"{base}-{width}x{height}_c{ext}"
+
+
+def crop_box(orig_w, orig_h, dest_w, dest_h):
+    """Source region WordPress keeps for a centered hard crop"""
+    ratio = max(dest_w / orig_w, dest_h / orig_h)
+    crop_w = round(dest_w / ratio)
+    crop_h = round(dest_h / ratio)
+    left = (orig_w - crop_w) // 2
+    top = (orig_h - crop_h) // 2
+    return left, top, left + crop_w, top + crop_h
+
+
+def derive(original_path, width, height):
+    """Center-crop and resample an original to the rendition size"""
+    with Image.open(original_path) as img:
+        img = img.convert('RGB')
+        box = crop_box(img.width, img.height, width, height)
+        return img.resize((width, height), Image.LANCZOS, box=box)
+
+
+def pixel_difference(derived, reference_path):
+    """Mean and max per-channel difference against an origin rendition"""
+    with Image.open(reference_path) as reference:
+        reference = reference.convert('RGB')
+        if reference.size != derived.size:
+            return {'size_mismatch': [reference.size, derived.size]}
+        diff = ImageChops.difference(derived, reference)
+        stat = ImageStat.Stat(diff)
+        return {
+            'mean': round(sum(stat.mean) / len(stat.mean), 3),
+            'max': max(high for _, high in diff.getextrema())
+        }
+
+
+def process_rendition(original_path, width, height, overwrite=False, check=False):
+    """Worker job: derive one rendition, then compare it or write it if absent"""
+    directory, filename = os.path.split(original_path)
+    target = os.path.join(directory, rendition_name(filename, width, height))
+    result = {'original': original_path, 'rendition': target, 'written': False}
+
+    derived = derive(original_path, width, height)
+
+    # Checking only compares against what the origin produced; nothing is written
+    if check:
+        if os.path.exists(target):
+            result['difference'] = pixel_difference(derived, target)
+        return result
+
+    if overwrite or not os.path.exists(target):
+        derived.save(target, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+        result['written'] = True
+        result['bytes'] = os.path.getsize(target)
+
+    return result
+
+
+def find_originals(directory):
+    """Originals are the JPEGs that are not themselves renditions or suffix copies"""
+    names = set(os.listdir(directory))
+    originals = []
+    for name in sorted(names):
+        if not name.lower().endswith(('.jpg', '.jpeg')) or RENDITION_PATTERN.match(name):
+            continue
+        base, ext = os.path.splitext(name)
+        # Downloader suffix copies (4_23.jpg) duplicate an original
+        if '_' in base and base.rsplit('_', 1)[1].isdigit() and base.rsplit('_', 1)[0] + ext in names:
+            continue
+        originals.append(os.path.join(directory, name))
+    return originals
+
+
+def derive_all(originals, sizes=RENDITION_SIZES, overwrite=False, check=False, workers=None):
+    """Derive every rendition of every original in a process pool"""
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(process_rendition, path, w, h, overwrite, check): (path, w, h)
+            for path in originals
+            for w, h in sizes
+        }
+        for future in as_completed(futures):
+            path, w, h = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"❌ Error deriving {w}x{h} from {path}: {e}")
+
+    return sorted(results, key=lambda r: r['rendition'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Derive crop and thumbnail renditions locally')
+    parser.add_argument('directories', nargs='*', default=['original_images'])
+    parser.add_argument('--overwrite', action='store_true', help='Replace existing renditions')
+    parser.add_argument('--check', action='store_true',
+                        help='Only report pixel difference against renditions already on disk')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print("🖼️ Deriving Renditions from Originals")
+    print("=" * 60)
+
+    for directory in args.directories:
+        originals = find_originals(directory)
+        print(f"📁 {directory}: {len(originals)} originals")
+
+        results = derive_all(originals, overwrite=args.overwrite, check=args.check, workers=args.workers)
+
+        for result in results:
+            name = os.path.basename(result['rendition'])
+            if 'difference' in result:
+                diff = result['difference']
+                if 'size_mismatch' in diff:
+                    print(f"   ⚠️ {name}: size differs from origin rendition {diff['size_mismatch']}")
+                else:
+                    print(f"   📊 {name}: mean diff {diff['mean']}, max diff {diff['max']}")
+            if result['written']:
+                print(f"   ✅ Wrote {name} ({result['bytes']} bytes)")
+
+        print(f"✅ {sum(r['written'] for r in results)} renditions written in {directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,15 @@
 import requests
 import os
+import sys
 from urllib.parse import urlparse
 
-# List of image URLs from the main website
+from content_sniffing import NotAnImageError, fetch_image, filename_for_format
+from derive_renditions import derive_all, find_originals
+from politeness import PolitenessScheduler
+from site_snapshot import replay_from_argv
+
+# List of original image URLs from the main website; the -600x400_c crops and
+# -75x50_c thumbnails are derived locally by derive_renditions.py
 image_urls = [
     "https://amritsagar.org/wp-content/uploads/2023/06/4.jpg",
     "https://stayontheganges.com/wp-content/uploads/2023/06/3.jpg",
@@ -27,43 +34,28 @@ image_urls = [
     "https://amritsagar.org/wp-content/uploads/2023/06/12.jpg",
     "https://amritsagar.org/wp-content/uploads/2023/06/3.jpg",
     "https://amritsagar.org/wp-content/uploads/2023/06/4.jpg",
-    "https://amritsagar.org/wp-content/uploads/2023/06/amrit-sagar-1.jpg",
-    "https://amritsagar.org/wp-content/uploads/2023/06/8-600x400_c.jpg",
-    "https://amritsagar.org/wp-content/uploads/2023/06/5-600x400_c.jpg",
-    "https://amritsagar.org/wp-content/uploads/2023/06/11-600x400_c.jpg",
-    "https://amritsagar.org/wp-content/uploads/2023/06/14-600x400_c.jpg",
-    "https://amritsagar.org/wp-content/uploads/2023/06/3-600x400_c.jpg",
-    "https://amritsagar.org/wp-content/uploads/2023/06/10-600x400_c.jpg",
-    "https://amritsagar.org/wp-content/uploads/2023/06/17-600x400_c.jpg",
-    "https://amritsagar.org/wp-content/uploads/2023/06/13-600x400_c.jpg",
-    "https://amritsagar.org/wp-content/uploads/2023/06/19-600x400_c.jpg",
-    "https://amritsagar.org/wp-content/uploads/2023/06/12-600x400_c.jpg",
-    "https://stayontheganges.com/wp-content/uploads/2023/06/17-75x50_c.jpg",
-    "https://stayontheganges.com/wp-content/uploads/2023/06/8-75x50_c.jpg",
-    "https://stayontheganges.com/wp-content/uploads/2023/06/10-75x50_c.jpg",
-    "https://stayontheganges.com/wp-content/uploads/2023/06/5-75x50_c.jpg",
-    "https://stayontheganges.com/wp-content/uploads/2023/06/14-75x50_c.jpg",
-    "https://stayontheganges.com/wp-content/uploads/2023/06/19-75x50_c.jpg",
-    "https://stayontheganges.com/wp-content/uploads/2023/06/3-75x50_c.jpg",
-    "https://stayontheganges.com/wp-content/uploads/2023/06/13-75x50_c.jpg",
-    "https://stayontheganges.com/wp-content/uploads/2023/06/11-75x50_c.jpg",
-    "https://stayontheganges.com/wp-content/uploads/2023/06/12-75x50_c.jpg"
+    "https://amritsagar.org/wp-content/uploads/2023/06/amrit-sagar-1.jpg"
 ]
 
-def download_image(url, filename):
+def download_image(url, filename, rejected=None, session=requests):
     """Download an image from URL"""
     try:
-        response = requests.get(url, timeout=20)
-        response.raise_for_status()
+        content, _, extension = fetch_image(session, url, timeout=20)
         
+        filename = filename_for_format(filename, extension)
         with open(filename, 'wb') as f:
-            f.write(response.content)
+            f.write(content)
         
         print(f"✅ Downloaded: {filename}")
-        return True
+        return filename
+    except NotAnImageError as e:
+        if rejected is not None:
+            rejected.append({'url': url, 'reason': str(e)})
+        print(f"🚫 Rejected {url}: {e}")
+        return None
     except Exception as e:
         print(f"❌ Failed to download {url}: {e}")
-        return False
+        return None
 
 def main():
     """Main function to download all images"""
@@ -74,6 +66,12 @@ def main():
     os.makedirs("original_images", exist_ok=True)
     
     downloaded_files = []
+    rejected = []
+    
+    # --from-snapshot copies the originals out of a crawl snapshot instead;
+    # live downloads are paced per origin by robots.txt
+    replay, _ = replay_from_argv(sys.argv[1:])
+    scheduler = replay or PolitenessScheduler(requests.Session())
     
     for i, url in enumerate(image_urls, 1):
         # Extract filename from URL
@@ -89,8 +87,9 @@ def main():
         filepath = os.path.join("original_images", filename)
         
         print(f"[{i}/{len(image_urls)}] Downloading: {filename}")
-        if download_image(url, filepath):
-            downloaded_files.append(filename)
+        saved = download_image(url, filepath, rejected, scheduler)
+        if saved:
+            downloaded_files.append(os.path.basename(saved))
     
     print(f"\n✅ Successfully downloaded {len(downloaded_files)} images")
     print(f"📁 Images saved to: original_images/")
@@ -101,6 +100,17 @@ def main():
             f.write(f"{filename}\n")
     
     print("📋 Downloaded images list saved to: downloaded_images_list.txt")
+    
+    if rejected:
+        with open("rejected_images_list.txt", "w") as f:
+            for entry in rejected:
+                f.write(f"{entry['url']}\t{entry['reason']}\n")
+        print(f"🚫 {len(rejected)} rejected URLs saved to: rejected_images_list.txt")
+    
+    # Crops and thumbnails come from the originals rather than the origin
+    renditions = derive_all(find_originals("original_images"))
+    written = sum(r['written'] for r in renditions)
+    print(f"🖼️ Derived {written} renditions locally ({len(renditions) - written} already present)")
 
 if __name__ == "__main__":
     main()
@@ -8,22 +8,32 @@ import requests
 from bs4 import BeautifulSoup
 import re
 import os
+import sys
 import urllib.parse
 from urllib.parse import urljoin, urlparse
-import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
-import json
+
+from content_sniffing import NotAnImageError, fetch_image, filename_for_format
+from jsonl_report import JsonlReport
+from politeness import PolitenessScheduler
+from site_snapshot import replay_from_argv
 
 class AmritSagarImageExtractor:
-    def __init__(self):
+    def __init__(self, replay=None):
         self.base_url = "http://amritsagar.org/"
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.128 Safari/537.36'
         })
+        # Pages and images share per-origin pacing derived from robots.txt,
+        # unless they are replayed from a crawl snapshot
+        self.scheduler = replay or PolitenessScheduler(self.session)
         self.extracted_urls = set()
-        self.downloaded_images = []
+        self.downloaded_images = set()
         self.output_dir = "images"
+        # Records are streamed here during the run; jsonl_report.py compacts them
+        self.report_file = "image_extraction_report.jsonl"
+        self.report = None
         
         # Create output directory
         os.makedirs(self.output_dir, exist_ok=True)
@@ -31,7 +41,7 @@ class AmritSagarImageExtractor:
     def get_page_content(self, url):
         """Get page content with error handling"""
         try:
-            response = self.session.get(url, timeout=10)
+            response = self.scheduler.get(url, timeout=10)
             response.raise_for_status()
             return response.text, response.url
         except Exception as e:
@@ -149,8 +159,7 @@ class AmritSagarImageExtractor:
         
         try:
             print(f"Downloading: {url}")
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
+            content, _, extension = fetch_image(self.scheduler, url, timeout=15)
             
             # Generate filename
             if not filename:
@@ -159,20 +168,23 @@ class AmritSagarImageExtractor:
                 if path:
                     filename = os.path.basename(path)
                 else:
-                    filename = f"image_{len(self.downloaded_images)}.jpg"
+                    filename = f"image_{self.report.count('downloaded')}"
             
-            # Add extension if missing
-            if not any(filename.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp']):
-                filename += '.jpg'
+            # Name the file by the format actually received
+            filename = filename_for_format(filename, extension)
             
             filepath = os.path.join(self.output_dir, filename)
             
             with open(filepath, 'wb') as f:
-                f.write(response.content)
+                f.write(content)
             
-            self.downloaded_images.append(url)
+            self.downloaded_images.add(url)
+            self.report.record('downloaded', url=url, filename=filename)
             print(f"✅ Downloaded: {filename}")
             
+        except NotAnImageError as e:
+            self.report.record('rejected', url=url, reason=str(e))
+            print(f"🚫 Rejected {url}: {e}")
         except Exception as e:
             print(f"❌ Error downloading {url}: {e}")
     
@@ -182,6 +194,8 @@ class AmritSagarImageExtractor:
         print(f"📁 Output directory: {self.output_dir}")
         print("=" * 60)
         
+        self.report = JsonlReport(self.report_file, 'extraction', base_url=self.base_url)
+        
         # Start with main page
         main_url = self.base_url
         print(f"🌐 Analyzing main page: {main_url}")
@@ -212,8 +226,6 @@ class AmritSagarImageExtractor:
                 all_images.extend(bg_images)
                 
                 print(f"   Found {len(images)} images on this page")
-            
-            time.sleep(1)  # Be respectful to the server
         
         # Remove duplicates and filter
         unique_images = list(set(all_images))
@@ -221,6 +233,8 @@ class AmritSagarImageExtractor:
         
         print(f"\n🖼️ Total unique images found: {len(unique_images)}")
         print(f"✅ Valid images to download: {len(valid_images)}")
+        for img_url in valid_images:
+            self.report.record('image_url', url=img_url)
         
         # Download images
         print(f"\n⬇️ Starting download of {len(valid_images)} images...")
@@ -241,29 +255,24 @@ class AmritSagarImageExtractor:
                     print(f"Download error: {e}")
         
         print(f"\n✅ Successfully downloaded {len(self.downloaded_images)} images")
+        print(f"🚫 Rejected {self.report.count('rejected')} non-image responses")
         print(f"📁 Images saved to: {self.output_dir}/")
         
-        # Save report
-        self.save_report(valid_images)
+        # Close the report with its summary line
+        self.finish_report()
     
-    def save_report(self, image_urls):
-        """Save extraction report"""
-        report = {
-            'extraction_date': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'total_images_found': len(image_urls),
-            'images_downloaded': len(self.downloaded_images),
-            'image_urls': image_urls,
-            'downloaded_files': [f for f in os.listdir(self.output_dir) if f.endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp'))]
-        }
-        
-        with open('image_extraction_report.json', 'w') as f:
-            json.dump(report, f, indent=2)
+    def finish_report(self):
+        """Write the summary line; the records were already streamed during the run"""
+        self.report.close(images_downloaded=len(self.downloaded_images))
         
-        print(f"\n📊 Report saved to: image_extraction_report.json")
+        print(f"\n📊 Report saved to: {self.report_file}")
+        print(f"   Run 'python jsonl_report.py {self.report_file}' for the pretty JSON report")
 
 def main():
     """Main execution function"""
-    extractor = AmritSagarImageExtractor()
+    # --from-snapshot replays pages and images from a crawl snapshot
+    replay, _ = replay_from_argv(sys.argv[1:])
+    extractor = AmritSagarImageExtractor(replay)
     
     try:
         extractor.extract_all_images()
@@ -271,7 +280,7 @@ def main():
         print("\n" + "=" * 60)
         print("🎉 Image extraction completed!")
         print(f"📁 Check the '{extractor.output_dir}' folder for all downloaded images")
-        print("📊 Check 'image_extraction_report.json' for detailed report")
+        print(f"📊 Check '{extractor.report_file}' for detailed report")
         
     except KeyboardInterrupt:
         print("\n⚠️ Extraction interrupted by user")
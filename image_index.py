@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Image Attribution Index for Amrit Sagar Website
+Persisted inverted index of page x section x image built from the analyzer outputs
+"""
+
+import argparse
+import json
+import os
+from urllib.parse import urlparse
+
+INDEX_FILE = 'image_index.json'
+RULES_FILE = 'section_rules.json'
+
+# analyze_main_website.py reads the homepage slots from this page
+HOMEPAGE_URL = 'https://amritsagar.org'
+
+# Legacy analyzer outputs: file -> {key in file: section category}
+LEGACY_SOURCES = {
+    'guru_section_analysis.json': {
+        'guru_section_images': 'guru',
+        'about_section_images': 'guru_about',
+        'team_section_images': 'guru_team'
+    },
+    'campus_facilities_mapping.json': {
+        'campus_gallery': 'campus',
+        'facilities_gallery': 'facilities'
+    },
+    'team_section_images.json': {None: 'team'},
+    'original_guru_sections.json': {None: 'guru_sections'}
+}
+
+
+def rule_pages(config_path=RULES_FILE):
+    """Section category -> the pages its rule reads, from the rule engine config"""
+    if not os.path.exists(config_path):
+        return {}
+    with open(config_path, 'r') as f:
+        return {name: rule.get('pages', []) for name, rule in json.load(f).get('categories', {}).items()}
+
+
+def image_filename(url):
+    """Basename of an image URL, used for local file lookups"""
+    return os.path.basename(urlparse(url).path)
+
+
+def entries_from_records(records, page=None):
+    """Flatten rule engine records (image or section shaped) into index entries
+
+    Records without a page of their own are attributed to page, which stays None when the
+    page can't be known; such entries are indexed but left out of per-page queries.
+    """
+    entries = []
+    for record in records:
+        if 'images' in record:
+            for img in record['images']:
+                entries.append({
+                    'image': img['src'],
+                    'alt': img.get('alt', ''),
+                    'context': record.get('text', ''),
+                    'page': record.get('page', page)
+                })
+        else:
+            entries.append({
+                'image': record['src'],
+                'alt': record.get('alt', ''),
+                'context': record.get('context', ''),
+                'page': record.get('page', page)
+            })
+    return entries
+
+
+class ImageIndex:
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        # Primary store: page -> section category -> entries
+        self.pages = {}
+        # Entries whose page is unknown: section category -> entries
+        self.unattributed = {}
+        # Inverted maps kept in step with self.pages
+        self.images = {}
+        self.sections = {}
+        self.filenames = {}
+
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                data = json.load(f)
+            self.pages = data.get('pages', {})
+            self.unattributed = data.get('unattributed', {})
+            self.images = data.get('images', {})
+            self.sections = data.get('sections', {})
+            self.filenames = data.get('filenames', {})
+
+    def save(self):
+        """Persist the index"""
+        with open(self.path, 'w') as f:
+            json.dump({
+                'pages': self.pages,
+                'unattributed': self.unattributed,
+                'images': self.images,
+                'sections': self.sections,
+                'filenames': self.filenames
+            }, f, indent=2)
+
+    def _store(self, page):
+        """section category -> entries for a page, or for unattributed entries when page is None"""
+        return self.unattributed if page is None else self.pages.get(page, {})
+
+    def _remove(self, page, section):
+        for entry in self._store(page).get(section, []):
+            url = entry['image']
+
+            postings = [
+                p for p in self.images.get(url, [])
+                if not (p['page'] == page and p['section'] == section)
+            ]
+            if postings:
+                self.images[url] = postings
+            else:
+                self.images.pop(url, None)
+                name = image_filename(url)
+                urls = [u for u in self.filenames.get(name, []) if u != url]
+                if urls:
+                    self.filenames[name] = urls
+                else:
+                    self.filenames.pop(name, None)
+
+            section_pages = self.sections.get(section, {}).get(url)
+            if section_pages and page in section_pages:
+                section_pages.remove(page)
+                if not section_pages:
+                    del self.sections[section][url]
+            if section in self.sections and not self.sections[section]:
+                del self.sections[section]
+
+        self._store(page).pop(section, None)
+        if page in self.pages and not self.pages[page]:
+            del self.pages[page]
+
+    def update_page(self, page, section, entries):
+        """Replace one page's entries for one section category"""
+        self._remove(page, section)
+        if not entries:
+            return
+
+        store = self.unattributed if page is None else self.pages.setdefault(page, {})
+        store[section] = [
+            {'image': e['image'], 'alt': e.get('alt', ''), 'context': e.get('context', '')}
+            for e in entries
+        ]
+
+        for entry in entries:
+            url = entry['image']
+            posting = {'page': page, 'section': section, 'alt': entry.get('alt', '')}
+            postings = self.images.setdefault(url, [])
+            if posting not in postings:
+                postings.append(posting)
+
+            section_pages = self.sections.setdefault(section, {}).setdefault(url, [])
+            if page not in section_pages:
+                section_pages.append(page)
+
+            urls = self.filenames.setdefault(image_filename(url), [])
+            if url not in urls:
+                urls.append(url)
+
+    def update_from_records(self, section, records, page=None):
+        """Index rule engine records for a category, grouped by their page (see entries_from_records)"""
+        by_page = {}
+        for entry in entries_from_records(records, page):
+            by_page.setdefault(entry['page'], []).append(entry)
+
+        # Pages that no longer yield anything for this category are cleared
+        for indexed in list(self.pages):
+            if section in self.pages[indexed] and indexed not in by_page:
+                self._remove(indexed, section)
+        if section in self.unattributed and None not in by_page:
+            self._remove(None, section)
+
+        for indexed, entries in by_page.items():
+            self.update_page(indexed, section, entries)
+
+    def _resolve(self, image):
+        if image in self.images:
+            return [image]
+        return self.filenames.get(image_filename(image) or image, [])
+
+    def where_used(self, image):
+        """Pages, sections and alt texts for an image URL or filename"""
+        usages = []
+        for url in self._resolve(image):
+            for posting in self.images.get(url, []):
+                usages.append(dict(posting, image=url))
+        return usages
+
+    def section_images(self, section):
+        """Image URLs found in a section category"""
+        return list(self.sections.get(section, {}))
+
+    def page_images(self, page):
+        """Image URLs found on a page across all categories"""
+        urls = []
+        for entries in self.pages.get(page, {}).values():
+            for entry in entries:
+                if entry['image'] not in urls:
+                    urls.append(entry['image'])
+        return urls
+
+    def alt_texts(self, image):
+        """Distinct non-empty alt texts recorded for an image"""
+        texts = []
+        for usage in self.where_used(image):
+            if usage['alt'] and usage['alt'] not in texts:
+                texts.append(usage['alt'])
+        return texts
+
+    def stats(self):
+        return {
+            'pages': len(self.pages),
+            'unattributed': sum(len(entries) for entries in self.unattributed.values()),
+            'images': len(self.images),
+            'sections': {name: len(urls) for name, urls in self.sections.items()}
+        }
+
+
+def index_homepage_mapping(index, homepage):
+    """Index the homepage slot mapping written by analyze_main_website"""
+    for slot, value in homepage.items():
+        items = value if isinstance(value, list) else [value] if value else []
+        records = [
+            item if isinstance(item, dict) else {'src': item}
+            for item in items
+        ]
+        index.update_from_records(f"homepage_{slot}", records, HOMEPAGE_URL)
+
+
+def build_from_legacy(index):
+    """Ingest the analyzer JSON files already on disk
+
+    Older outputs don't record the page of each image; a category whose rule reads a single
+    page is attributed to it, the rest are indexed unattributed.
+    """
+    pages = rule_pages()
+    for filename, keys in LEGACY_SOURCES.items():
+        if not os.path.exists(filename):
+            continue
+        with open(filename, 'r') as f:
+            data = json.load(f)
+        for key, section in keys.items():
+            records = data if key is None else data.get(key, [])
+            read = pages.get(section, [])
+            index.update_from_records(section, records, read[0] if len(read) == 1 else None)
+        print(f"📥 Indexed: {filename}")
+
+    if os.path.exists('main_website_image_mapping.json'):
+        with open('main_website_image_mapping.json', 'r') as f:
+            index_homepage_mapping(index, json.load(f).get('homepage', {}))
+        print("📥 Indexed: main_website_image_mapping.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the image attribution index')
+    parser.add_argument('--index', default=INDEX_FILE, help='Index file path')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('build', help='Rebuild from analyzer JSON outputs')
+    image_cmd = sub.add_parser('image', help='Where an image (URL or filename) is used')
+    image_cmd.add_argument('image')
+    section_cmd = sub.add_parser('section', help='Images in a section category')
+    section_cmd.add_argument('section')
+    page_cmd = sub.add_parser('page', help='Images on a page')
+    page_cmd.add_argument('page')
+    sub.add_parser('stats', help='Index summary')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        if os.path.exists(args.index):
+            os.remove(args.index)
+        index = ImageIndex(args.index)
+        build_from_legacy(index)
+        index.save()
+        print(f"✅ Index saved to: {args.index}")
+        return
+
+    index = ImageIndex(args.index)
+
+    if args.command == 'image':
+        for usage in index.where_used(args.image):
+            print(f"{usage['image']}\t{usage['page'] or '-'}\t{usage['section']}\t{usage['alt']}")
+    elif args.command == 'section':
+        for url in index.section_images(args.section):
+            print(url)
+    elif args.command == 'page':
+        for url in index.page_images(args.page):
+            print(url)
+    elif args.command == 'stats':
+        print(json.dumps(index.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Streaming JSONL Reports for Amrit Sagar Extractors
+Writes report records as the crawl runs and compacts them into the pretty JSON reports on demand
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
+
+class JsonlReport:
+    """Append-only report: a header line, one line per record, a summary line on close
+
+    Every line is flushed as it is written, so a crashed run still leaves a
+    readable partial report.
+    """
+
+    def __init__(self, path, report, **header):
+        self.path = path
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.file = open(path, 'w')
+        self._write({
+            'type': 'header',
+            'report': report,
+            'extraction_date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            **header
+        })
+
+    def _write(self, record):
+        self.file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self.file.flush()
+
+    def record(self, record_type, **fields):
+        with self.lock:
+            self.counts[record_type] = self.counts.get(record_type, 0) + 1
+            self._write({'type': record_type, **fields})
+
+    def count(self, record_type):
+        return self.counts.get(record_type, 0)
+
+    def close(self, **summary):
+        with self.lock:
+            self._write({'type': 'summary', 'counts': self.counts, **summary})
+            self.file.close()
+
+
+def read_records(path):
+    """Yield records one line at a time; a torn final line from a crash is skipped"""
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"⚠️ Skipping incomplete record in {path}")
+
+
+def compact_comprehensive(records):
+    header, summary = {}, {}
+    pages, skipped, image_urls = [], [], []
+    downloaded, rejected, mirrored = [], [], {}
+
+    for record in records:
+        kind = record.pop('type')
+        if kind == 'header':
+            header = record
+        elif kind == 'summary':
+            summary = record
+        elif kind == 'page':
+            (skipped if record['status'] == 'skipped' else pages).append(record['url'])
+        elif kind == 'image_url':
+            image_urls.append(record['url'])
+        elif kind == 'downloaded':
+            downloaded.append(record)
+        elif kind == 'rejected':
+            rejected.append(record)
+        elif kind == 'mirror':
+            mirrored[record['url']] = record['mirrors']
+
+    return {
+        'extraction_date': header.get('extraction_date'),
+        'base_url': header.get('base_url'),
+        'total_pages_found': summary.get('total_pages_found', len(pages) + len(skipped)),
+        'pages_analyzed': pages,
+        'pages_skipped_unchanged': skipped,
+        'total_images_found': len(image_urls),
+        'images_downloaded': len(downloaded),
+        'all_image_urls': sorted(image_urls),
+        'downloaded_images': downloaded,
+        'rejected_images': rejected,
+        'mirrored_images': mirrored,
+        'origins': summary.get('origins', {}),
+        'file_sizes': {img['filename']: img['size'] for img in downloaded}
+    }
+
+
+def compact_extraction(records):
+    header, summary = {}, {}
+    image_urls, downloaded, rejected = [], [], []
+
+    for record in records:
+        kind = record.pop('type')
+        if kind == 'header':
+            header = record
+        elif kind == 'summary':
+            summary = record
+        elif kind == 'image_url':
+            image_urls.append(record['url'])
+        elif kind == 'downloaded':
+            downloaded.append(record)
+        elif kind == 'rejected':
+            rejected.append(record)
+
+    return {
+        'extraction_date': header.get('extraction_date'),
+        'total_images_found': len(image_urls),
+        'images_downloaded': len(downloaded),
+        'image_urls': image_urls,
+        'downloaded_files': [record['filename'] for record in downloaded],
+        'rejected_images': rejected
+    }
+
+
+COMPACTORS = {
+    'comprehensive': compact_comprehensive,
+    'extraction': compact_extraction
+}
+
+
+def compact(jsonl_path, json_path=None):
+    """Rebuild the pretty JSON report from a JSONL report; returns the JSON path"""
+    json_path = json_path or os.path.splitext(jsonl_path)[0] + '.json'
+
+    records = read_records(jsonl_path)
+    header = next(records, None)
+    if not header or header.get('type') != 'header':
+        raise ValueError(f"{jsonl_path} does not start with a report header")
+    if header['report'] not in COMPACTORS:
+        raise ValueError(f"Unknown report type: {header['report']}")
+
+    finished = {'summary': False}
+
+    def with_header():
+        yield header
+        for record in records:
+            finished['summary'] = record['type'] == 'summary'
+            yield record
+
+    report = COMPACTORS[header['report']](with_header())
+    if not finished['summary']:
+        print(f"⚠️ {jsonl_path} has no summary; the run did not finish, compacting what was written")
+
+    with open(json_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    return json_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compact JSONL extraction reports into pretty JSON')
+    parser.add_argument('reports', nargs='+', help='JSONL report files')
+    parser.add_argument('--output', help='JSON path (single report only)')
+    args = parser.parse_args()
+
+    if args.output and len(args.reports) > 1:
+        parser.error('--output takes a single report')
+
+    for path in args.reports:
+        output = compact(path, args.output)
+        print(f"📊 {path} -> {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Hero Preload Hints and Image Placeholders for Amrit Sagar Pages
+Build stage that adds a <link rel="preload"> for each page's hero and a blurred LQIP plus dominant
+colour behind hero and gallery images, driven by image_placement_map.json; the source pages are
+left as written
+"""
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup
+from PIL import Image, ImageFilter
+
+from placement_solver import OUTPUT_FILE as PLACEMENT_FILE, URL_PATTERN, list_pages, slot_name
+from streaming_html import image_set_spans, split_top_level
+
+PLACEHOLDER_FILE = 'image_placeholders.json'
+
+# Placeholders must stay small enough to inline in every page
+LQIP_MAX_BYTES = 1024
+LQIP_WIDTHS = (24, 16, 12, 8)
+LQIP_QUALITY = 40
+LQIP_BLUR = 1.2
+
+# Marks the tags and classes this tool adds to the built pages
+PRELOAD_MARKER = 'data-hero-preload'
+PLACEHOLDER_MARKER = 'data-placeholders'
+PLACEHOLDER_PREFIX = 'lqip-'
+IMAGE_SET_OPTION = re.compile(
+    r'url\(\s*["\']?([^"\')]+)["\']?\s*\)(?:\s*type\(\s*["\']([^"\']+)["\']\s*\))?(?:\s*([\d.]+)x)?'
+)
+
+
+def dominant_color(img):
+    """Most common colour after reducing the image to a small palette"""
+    small = img.convert('RGB').resize((64, 64))
+    palette = small.quantize(colors=5)
+    counts = sorted(palette.getcolors(), reverse=True)
+    r, g, b = palette.getpalette()[counts[0][1] * 3:counts[0][1] * 3 + 3]
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def make_lqip(img):
+    """Blurred thumbnail JPEG as a data URI, shrunk until it fits LQIP_MAX_BYTES"""
+    img = img.convert('RGB')
+    for width in LQIP_WIDTHS:
+        height = max(1, round(img.height * width / img.width))
+        thumb = img.resize((width, height), Image.LANCZOS).filter(ImageFilter.GaussianBlur(LQIP_BLUR))
+        buffer = io.BytesIO()
+        thumb.save(buffer, 'JPEG', quality=LQIP_QUALITY, optimize=True)
+        uri = 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+        if len(uri) <= LQIP_MAX_BYTES:
+            return uri
+    return None
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def make_placeholder(path):
+    """Worker job: LQIP and dominant colour for one image"""
+    with Image.open(path) as img:
+        lqip = make_lqip(img)
+        return {
+            'color': dominant_color(img),
+            'lqip': lqip,
+            'lqip_bytes': len(lqip) if lqip else 0,
+            'sha1': file_digest(path)
+        }
+
+
+def load_placeholders(path=PLACEHOLDER_FILE):
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return {}
+
+
+def build_placeholders(images, cache=None, workers=None, root='.'):
+    """Placeholders for every image, regenerating only those changed since the cache"""
+    cache = cache or {}
+    placeholders = {}
+    stale = []
+    for image in sorted(set(images)):
+        path = os.path.join(root, image)
+        cached = cache.get(image)
+        if cached and cached.get('sha1') == file_digest(path):
+            placeholders[image] = cached
+        else:
+            stale.append(image)
+
+    if stale:
+        paths = [os.path.join(root, image) for image in stale]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for image, placeholder in zip(stale, executor.map(make_placeholder, paths, chunksize=4)):
+                placeholders[image] = placeholder
+
+    return placeholders
+
+
+def preload_tag(hero):
+    attrs = f'rel="preload" as="image" href="{hero["src"]}"'
+    if hero.get('srcset'):
+        attrs += f' imagesrcset="{hero["srcset"]}"'
+    elif hero.get('src_2x') and hero['src_2x'] != hero['src']:
+        attrs += f' imagesrcset="{hero["src"]} 1x, {hero["src_2x"]} 2x"'
+    if hero.get('type'):
+        attrs += f' type="{hero["type"]}"'
+    return f'<link {attrs} fetchpriority="high" {PRELOAD_MARKER}>'
+
+
+def inject_preload(html, hero):
+    """Put the hero preload ahead of the stylesheets so it is requested first"""
+    match = re.search(r'^([ \t]*)<(?:style data-critical-css|link rel="stylesheet")', html, re.MULTILINE) or re.search(r'^([ \t]*)</head>', html, re.MULTILINE)
+    if not match:
+        return html
+    indent = match.group(1)
+    line = f"{indent}{preload_tag(hero)}\n"
+    return html[:match.start()] + line + html[match.start():]
+
+
+def image_set_preload(value):
+    """Preload matching what an image-set() picks in its preferred format, or None without one"""
+    for start, end in image_set_spans(value):
+        options = IMAGE_SET_OPTION.findall(value[start:end])
+        if not options:
+            continue
+        mime = options[0][1]
+        picks = [(url, dpr or '1') for url, option_mime, dpr in options if option_mime == mime]
+        hero = {'src': picks[0][0]}
+        if len(picks) > 1:
+            hero['srcset'] = ', '.join(f"{url} {dpr}x" for url, dpr in picks)
+        # Only browsers that can decode the preferred format fetch the preload
+        if mime and mime != 'image/jpeg':
+            hero['type'] = mime
+        return hero
+    return None
+
+
+def hero_layers(value, hero, placeholder):
+    """A background value with the LQIP layered right under the layer that loads the hero"""
+    for start, layer in split_top_level(value, ','):
+        sets = image_set_spans(layer)
+        if sets:
+            layer_end = start + sets[0][1] + 1
+        else:
+            match = URL_PATTERN.search(layer)
+            if not match or match.group(1).startswith('data:'):
+                continue
+            layer_end = start + match.end()
+            if hero.get('src_2x') and hero['src_2x'] != hero['src'] and match.group(1) == hero['src']:
+                # Match the preload's candidates so the browser reuses the preloaded response
+                image_set = f"image-set(url('{hero['src']}') 1x, url('{hero['src_2x']}') 2x)"
+                value = value[:start + match.start()] + image_set + value[layer_end:]
+                layer_end = start + match.start() + len(image_set)
+        return value[:layer_end] + f", url('{placeholder['lqip']}')" + value[layer_end:]
+    return value
+
+
+def hero_style(style, hero, placeholder):
+    """Layer the LQIP under the hero image in each background declaration and set the dominant colour behind both"""
+    if not placeholder.get('lqip'):
+        return style.rstrip() + f" background-color: {placeholder['color']};"
+    declarations = []
+    for _, declaration in split_top_level(style, ';'):
+        prop, colon, value = declaration.partition(':')
+        if colon and prop.strip().lower() in ('background', 'background-image'):
+            declaration = prop + colon + hero_layers(value, hero, placeholder)
+        declarations.append(declaration)
+    return ';'.join(declarations).rstrip() + f" background-color: {placeholder['color']};"
+
+
+def hero_preload(style, hero):
+    """The hero's preload: what the last background declaration loads, else the placement map's pick"""
+    preload = None
+    for _, declaration in split_top_level(style or '', ';'):
+        prop, _, value = declaration.partition(':')
+        if prop.strip().lower() in ('background', 'background-image'):
+            preload = image_set_preload(value) or preload
+    return preload or hero
+
+
+def placeholder_class(placeholder):
+    return PLACEHOLDER_PREFIX + placeholder['sha1'][:10]
+
+
+def placeholder_rule(placeholder):
+    return (f".{placeholder_class(placeholder)}{{background:{placeholder['color']} url('{placeholder['lqip']}') "
+            f"center/cover no-repeat}}")
+
+
+def inject_placeholders(html, rules):
+    """One rule per placeholder image, just before </head>"""
+    match = re.search(r'^([ \t]*)</head>', html, re.MULTILINE)
+    if not match or not rules:
+        return html
+    indent = match.group(1) + '    '
+    block = f"{indent}<style {PLACEHOLDER_MARKER}>{''.join(rules)}</style>\n"
+    return html[:match.start()] + block + html[match.start():]
+
+
+def line_offsets(text):
+    offsets = [0]
+    for line in text.splitlines(keepends=True):
+        offsets.append(offsets[-1] + len(line))
+    return offsets
+
+
+def set_attribute(tag_html, name, value):
+    """Replace or add one attribute on a start tag's source text"""
+    pattern = re.compile(r'\s' + name + r'="[^"]*"')
+    attribute = f' {name}="{value}"'
+    if pattern.search(tag_html):
+        return pattern.sub(lambda _: attribute, tag_html, count=1)
+    end = -2 if tag_html.endswith('/>') else -1
+    return tag_html[:end] + attribute + tag_html[end:]
+
+
+def placeholder_targets(html):
+    """(offset, tag, image) for the hero section and gallery images, in source order"""
+    soup = BeautifulSoup(html, 'html.parser')
+    offsets = line_offsets(html)
+    targets = []
+
+    for element in soup.find_all(True):
+        if element.name == 'img' and slot_name(element) == 'gallery':
+            image = element.get('src', '')
+        elif 'hero' in element.get('class', []):
+            match = URL_PATTERN.search(element.get('style', '') or '')
+            image = match.group(1) if match else ''
+        else:
+            continue
+        if image and not image.startswith(('http://', 'https://', 'data:')):
+            targets.append((offsets[element.sourceline - 1] + element.sourcepos, element, image))
+
+    return targets
+
+
+def apply_hints(html, page_map, placeholders):
+    """Return the page with the hero preload and placeholders added"""
+    hero = page_map['slots'].get('hero_background')
+    preload = hero
+    rules = {}
+
+    # Edit from the end so earlier offsets stay valid
+    for offset, element, image in reversed(placeholder_targets(html)):
+        if element.name != 'img' and hero:
+            preload = hero_preload(element.get('style'), hero)
+        placeholder = placeholders.get(image)
+        if not placeholder:
+            continue
+        end = html.index('>', offset) + 1
+        tag_html = html[offset:end]
+        if element.name == 'img':
+            if not placeholder.get('lqip'):
+                continue
+            # Repeats of an image share one rule instead of each inlining the LQIP
+            rules[image] = placeholder_rule(placeholder)
+            tag_html = set_attribute(tag_html, 'class', ' '.join(element.get('class', []) + [placeholder_class(placeholder)]))
+        else:
+            tag_html = set_attribute(tag_html, 'style', hero_style(element.get('style', ''), hero or {'src': image}, placeholder))
+        html = html[:offset] + tag_html + html[end:]
+
+    html = inject_placeholders(html, [rules[image] for image in sorted(rules)])
+    if preload:
+        html = inject_preload(html, preload)
+    return html
+
+
+class PageHints:
+    """Build stage adding the hero preload and placeholders to each mapped page as it is built"""
+
+    def __init__(self, root='.', placement_file=PLACEMENT_FILE, placeholder_file=PLACEHOLDER_FILE, workers=None):
+        self.root = root
+        self.placement_file = placement_file
+        self.placeholder_path = os.path.join(root, placeholder_file)
+        self.workers = workers
+        self.placement_map = {}
+        self.placeholders = load_placeholders(self.placeholder_path)
+        self.load_map()
+
+    def load_map(self):
+        path = os.path.join(self.root, self.placement_file)
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.placement_map = json.load(f)
+        return self.placement_map
+
+    def prepare(self, pages):
+        """Bring the placeholders of the images these pages use up to date; returns the images regenerated"""
+        images = set()
+        for page in pages:
+            if page not in self.placement_map:
+                continue
+            with open(os.path.join(self.root, page), 'r', encoding='utf-8') as f:
+                html = f.read()
+            for _, _, image in placeholder_targets(html):
+                if os.path.exists(os.path.join(self.root, image)):
+                    images.add(image)
+
+        fresh = build_placeholders(images, self.placeholders, self.workers, self.root)
+        regenerated = sorted(image for image, placeholder in fresh.items() if self.placeholders.get(image) != placeholder)
+        # Images of pages left out keep their cached placeholders
+        self.placeholders = dict(sorted({**self.placeholders, **fresh}.items()))
+        return regenerated
+
+    def save(self):
+        with open(self.placeholder_path, 'w') as f:
+            json.dump(self.placeholders, f, indent=2)
+
+    def __call__(self, page, html):
+        if page not in self.placement_map:
+            return html
+        return apply_hints(html, self.placement_map[page], self.placeholders)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh the image placeholders used by the build')
+    parser.add_argument('--placements', default=PLACEMENT_FILE)
+    parser.add_argument('--placeholders', default=PLACEHOLDER_FILE)
+    parser.add_argument('--root', default='.')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print("🖼️ Generating Hero Preloads and Placeholders")
+    print("=" * 60)
+
+    hints = PageHints(args.root, args.placements, args.placeholders, args.workers)
+    pages = [os.path.relpath(page, args.root) for page in list_pages(args.root)]
+    hints.prepare(pages)
+    hints.save()
+
+    largest = max((p['lqip_bytes'] for p in hints.placeholders.values()), default=0)
+    print(f"✅ {len(hints.placeholders)} placeholders (largest LQIP {largest} bytes) saved to: {args.placeholders}")
+    print(f"📄 {sum(page in hints.placement_map for page in pages)} pages get them when build_site.py runs")
+
+
+if __name__ == "__main__":
+    main()
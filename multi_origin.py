@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Multi-Origin Fetching for Amrit Sagar Crawlers
+Per-host connection pools, concurrency limits and crawl budgets, plus mirror detection
+so an asset served identically by several hosts is downloaded once from the fastest
+"""
+
+import base64
+import hashlib
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from politeness import PolitenessScheduler
+
+# The site's pages and uploads are split across these hosts; limits apply per host,
+# whatever scheme a URL uses
+DEFAULT_ORIGINS = {
+    'https://amritsagar.org': {'concurrency': 4, 'budget': 2000},
+    'https://stayontheganges.com': {'concurrency': 4, 'budget': 1000}
+}
+
+# Limits for hosts outside the configured set (CDNs, embeds)
+EXTERNAL_LIMITS = {'concurrency': 2, 'budget': 200}
+
+# Weight of the newest sample in each origin's latency average
+LATENCY_SMOOTHING = 0.3
+
+# Leading bytes compared between mirrors before falling back to hashing whole bodies
+MIRROR_SAMPLE_BYTES = 65536
+
+
+class CrawlBudgetExceeded(Exception):
+    """Raised when an origin has used up its request budget"""
+
+
+def host_of(url):
+    return urlparse(url).netloc.lower()
+
+
+def strong_etag(headers):
+    """The ETag when it promises byte-identical content (weak W/ tags don't)"""
+    etag = headers.get('ETag')
+    return etag if etag and not etag.startswith('W/') else None
+
+
+def sample_response(url, probe):
+    """A probe whose sample holds the whole file, as the plain 200 response a GET would give"""
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = 'OK'
+    response.url = url
+    response.headers = CaseInsensitiveDict(probe['headers'])
+    response.headers['Content-Length'] = str(len(probe['sample']))
+    response._content = probe['sample']
+    response._content_consumed = True
+    return response
+
+
+class OriginPool:
+    def __init__(self, host, user_agent, concurrency, budget):
+        self.host = host
+        self.budget = budget
+        self.requests_made = 0
+        self.latency = None
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': user_agent})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def charge(self):
+        with self.lock:
+            if self.requests_made >= self.budget:
+                raise CrawlBudgetExceeded(f"{self.host} used its budget of {self.budget} requests")
+            self.requests_made += 1
+
+    def record_latency(self, seconds):
+        with self.lock:
+            if self.latency is None:
+                self.latency = seconds
+            else:
+                self.latency += LATENCY_SMOOTHING * (seconds - self.latency)
+
+
+class MultiOriginFetcher:
+    """Routes each request to its origin's pool; usable wherever a session is expected"""
+
+    def __init__(self, user_agent, origins=None, recorder=None, replay=None):
+        self.user_agent = user_agent
+        self.origins = origins or DEFAULT_ORIGINS
+        # Optional SnapshotWriter capturing every response, or SnapshotArchive
+        # answering every request from disk instead of the network
+        self.recorder = recorder
+        self.replay = replay
+        self.pools = {}
+        self.lock = threading.Lock()
+        # One scheduler for every pool, so each host has a single token bucket and robots.txt
+        robots_session = requests.Session()
+        robots_session.headers.update({'User-Agent': user_agent})
+        self.scheduler = PolitenessScheduler(robots_session, user_agent)
+        self.host_limits = {host_of(origin): limits for origin, limits in self.origins.items()}
+        # Bodies already transferred while resolving mirrors, served to the next plain GET
+        self.prefetched = {}
+
+    @property
+    def headers(self):
+        return {'User-Agent': self.user_agent}
+
+    def pool(self, url):
+        host = host_of(url)
+        with self.lock:
+            if host not in self.pools:
+                limits = self.host_limits.get(host, EXTERNAL_LIMITS)
+                self.pools[host] = OriginPool(host, self.user_agent, limits['concurrency'], limits['budget'])
+            return self.pools[host]
+
+    def is_internal(self, url):
+        """True for URLs on any configured origin or its subdomains, whatever the scheme"""
+        host = urlparse(url).netloc.lower()
+        for origin in self.origins:
+            origin_host = urlparse(origin).netloc.lower()
+            if host == origin_host or host.endswith('.' + origin_host):
+                return True
+        return False
+
+    def total_concurrency(self):
+        return sum(limits['concurrency'] for limits in self.host_limits.values())
+
+    def get(self, url, **kwargs):
+        """Fetch through the host's budget, concurrency slots and politeness bucket"""
+        if not kwargs.get('headers'):
+            with self.lock:
+                prefetched = self.prefetched.pop(url, None)
+            if prefetched is not None:
+                return prefetched
+
+        pool = self.pool(url)
+        if self.replay is not None:
+            # Replays skip politeness and budgets but keep the recorded latencies,
+            # so mirror choices come out the same as in the captured crawl
+            response = self.replay.get(url, **kwargs)
+            pool.record_latency(response.elapsed.total_seconds())
+            return response
+
+        pool.charge()
+        with pool.slots:
+            self.scheduler.wait(url)
+            # Timed from after the politeness wait, so a throttled host doesn't look slow
+            started = time.monotonic()
+            response = pool.session.get(url, **kwargs)
+            elapsed = time.monotonic() - started
+            pool.record_latency(elapsed)
+            if self.recorder is not None:
+                self.recorder.record(url, response, elapsed)
+            return response
+
+    def probe(self, url, timeout=10):
+        """Length, strong ETag, Content-MD5 and leading bytes of a URL from one ranged request"""
+        response = self.get(url, timeout=timeout, stream=True,
+                            headers={'Range': f"bytes=0-{MIRROR_SAMPLE_BYTES - 1}"})
+        try:
+            response.raise_for_status()
+            sample = b''
+            for chunk in response.iter_content(chunk_size=8192):
+                sample += chunk
+                if len(sample) >= MIRROR_SAMPLE_BYTES:
+                    break
+            sample = sample[:MIRROR_SAMPLE_BYTES]
+
+            headers = CaseInsensitiveDict(response.headers)
+            if response.status_code == 206:
+                # Content-Range: bytes 0-65535/<total>; a Content-MD5 here covers only the part
+                total = headers.pop('Content-Range', '').rpartition('/')[2]
+                length = total if total.isdigit() else None
+                content_md5 = None
+            else:
+                length = headers.get('Content-Length')
+                content_md5 = headers.get('Content-MD5')
+            return {
+                'length': length,
+                'etag': strong_etag(headers),
+                'md5': content_md5,
+                'sample': sample,
+                # Small files arrive whole in the sample
+                'complete': length is not None and len(sample) == int(length),
+                'headers': headers
+            }
+        finally:
+            response.close()
+
+    def resolve_mirrors(self, urls, timeout=10):
+        """Collapse URLs sharing a path across hosts when they serve identical bytes
+
+        Returns {url to download: [mirror urls it stands in for]}. Mirrors must
+        match on length, then on a strong ETag or Content-MD5, then on their first
+        MIRROR_SAMPLE_BYTES; only when the samples match but don't cover the file
+        are the full bodies hashed. The host with the lowest measured latency is
+        kept, and any body already transferred for it is reused by the download.
+        """
+        by_path = {}
+        for url in urls:
+            parsed = urlparse(url)
+            key = parsed.path + ('?' + parsed.query if parsed.query else '')
+            by_path.setdefault(key, []).append(url)
+
+        resolved = {}
+        for group in by_path.values():
+            if len(group) == 1:
+                resolved[group[0]] = []
+                continue
+
+            probes = {}
+            for url in group:
+                try:
+                    probes[url] = self.probe(url, timeout)
+                except Exception as e:
+                    print(f"⚠️ Could not probe {url}: {e}")
+                    probes[url] = None
+
+            bodies = {}
+            digests = {}
+
+            def digest(url):
+                if url not in digests:
+                    try:
+                        response = self.get(url, timeout=timeout)
+                        response.raise_for_status()
+                        bodies[url] = response
+                        digests[url] = base64.b64encode(hashlib.md5(response.content).digest()).decode('ascii')
+                    except Exception as e:
+                        print(f"⚠️ Could not hash {url}: {e}")
+                        digests[url] = None
+                return digests[url]
+
+            def same(a, b):
+                # Without a length there is nothing to compare, so keep them apart
+                if not probes[a] or not probes[b] or probes[a]['length'] is None:
+                    return False
+                if probes[a]['length'] != probes[b]['length']:
+                    return False
+                if probes[a]['etag'] and probes[a]['etag'] == probes[b]['etag']:
+                    return True
+                if probes[a]['md5'] and probes[b]['md5']:
+                    return probes[a]['md5'] == probes[b]['md5']
+                if probes[a]['sample'] != probes[b]['sample']:
+                    return False
+                return probes[a]['complete'] or (digest(a) is not None and digest(a) == digest(b))
+
+            clusters = []
+            for url in group:
+                cluster = next((cluster for cluster in clusters if same(cluster[0], url)), None)
+                if cluster:
+                    cluster.append(url)
+                else:
+                    clusters.append([url])
+
+            for members in clusters:
+                fastest = min(members, key=lambda u: self.pool(u).latency or float('inf'))
+                resolved[fastest] = [u for u in members if u != fastest]
+                # Never transfer the kept copy twice
+                if fastest in bodies:
+                    self.prefetched[fastest] = bodies[fastest]
+                elif probes[fastest] and probes[fastest]['complete']:
+                    self.prefetched[fastest] = sample_response(fastest, probes[fastest])
+
+        return resolved
+
+    def stats(self):
+        return {
+            host: {
+                'requests': pool.requests_made,
+                'budget': pool.budget,
+                'latency_ms': round(pool.latency * 1000) if pool.latency is not None else None
+            }
+            for host, pool in self.pools.items()
+        }
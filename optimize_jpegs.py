@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Lossless JPEG Optimization for Amrit Sagar Images
+Re-encodes JPEGs with optimized Huffman tables and progressive scans, strips metadata except
+ICC and orientation, and keeps a result only when it is pixel-identical and smaller
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import struct
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image, ImageChops
+
+try:
+    import mozjpeg_lossless_optimization
+except ImportError:
+    mozjpeg_lossless_optimization = None
+
+REPORT_FILE = 'jpeg_optimization_report.json'
+
+ORIENTATION_TAG = 0x0112
+
+
+def transcode(data):
+    """Lossless coefficient-level re-encode, keeping only the ICC profile
+
+    Uses MozJPEG through mozjpeg-lossless-optimization when installed,
+    otherwise the jpegtran command line tool.
+    """
+    if mozjpeg_lossless_optimization:
+        return mozjpeg_lossless_optimization.optimize(data, copy=mozjpeg_lossless_optimization.COPY_MARKERS.ICC)
+
+    jpegtran = shutil.which('jpegtran')
+    if not jpegtran:
+        raise RuntimeError("Install mozjpeg-lossless-optimization or jpegtran to optimize JPEGs")
+    result = subprocess.run(
+        [jpegtran, '-copy', 'icc', '-optimize', '-progressive'],
+        input=data, capture_output=True, check=True
+    )
+    return result.stdout
+
+
+def orientation_segment(orientation):
+    """Minimal EXIF APP1 segment carrying only the orientation tag"""
+    tiff = b'MM\x00\x2a' + struct.pack('>I', 8)
+    tiff += struct.pack('>H', 1)
+    tiff += struct.pack('>HHIHH', ORIENTATION_TAG, 3, 1, orientation, 0)
+    tiff += struct.pack('>I', 0)
+    payload = b'Exif\x00\x00' + tiff
+    return b'\xff\xe1' + struct.pack('>H', len(payload) + 2) + payload
+
+
+def pixels_identical(original_path, data):
+    with Image.open(original_path) as before, Image.open(io.BytesIO(data)) as after:
+        if before.size != after.size or before.mode != after.mode:
+            return False
+        return ImageChops.difference(before, after).getbbox() is None
+
+
+def optimize_file(path, dry_run=False):
+    """Worker job: transcode one JPEG, verify it, and replace it only when smaller"""
+    with open(path, 'rb') as f:
+        original = f.read()
+    result = {'file': path, 'before': len(original), 'after': len(original), 'kept': False}
+
+    with Image.open(path) as img:
+        orientation = img.getexif().get(ORIENTATION_TAG, 1)
+
+    optimized = transcode(original)
+    # Stripping EXIF must not un-rotate portrait photos
+    if orientation != 1:
+        optimized = optimized[:2] + orientation_segment(orientation) + optimized[2:]
+
+    if not pixels_identical(path, optimized):
+        result['reason'] = 'pixels differ'
+        return result
+    if len(optimized) >= len(original):
+        result['reason'] = 'not smaller'
+        return result
+
+    result['after'] = len(optimized)
+    result['kept'] = True
+    if not dry_run:
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(optimized)
+        os.replace(temp_path, path)
+    return result
+
+
+def find_jpegs(directory):
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.lower().endswith(('.jpg', '.jpeg'))
+    ]
+
+
+def optimize_all(paths, dry_run=False, workers=None):
+    """Optimize every JPEG in a process pool"""
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(optimize_file, path, dry_run): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"❌ Error optimizing {futures[future]}: {e}")
+
+    return sorted(results, key=lambda r: r['file'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Losslessly optimize JPEGs in place')
+    parser.add_argument('directories', nargs='*', default=['images'])
+    parser.add_argument('--dry-run', action='store_true', help='Report savings without replacing files')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--report', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    print("🗜️ Lossless JPEG Optimization")
+    print("=" * 60)
+
+    results = []
+    for directory in args.directories:
+        paths = find_jpegs(directory)
+        print(f"📁 {directory}: {len(paths)} JPEGs")
+        results.extend(optimize_all(paths, dry_run=args.dry_run, workers=args.workers))
+
+    for result in results:
+        name = result['file']
+        if result['kept']:
+            saved = result['before'] - result['after']
+            print(f"   ✅ {name}: {result['before']} -> {result['after']} bytes (-{saved / result['before']:.1%})")
+        else:
+            print(f"   ⏭️ {name}: kept original ({result['reason']})")
+
+    before = sum(r['before'] for r in results)
+    after = sum(r['after'] for r in results)
+    report = {
+        'dry_run': args.dry_run,
+        'files': len(results),
+        'optimized': sum(r['kept'] for r in results),
+        'bytes_before': before,
+        'bytes_after': after,
+        'bytes_saved': before - after,
+        'results': results
+    }
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if before:
+        print(f"\n📊 {before} -> {after} bytes, saved {before - after} ({(before - after) / before:.1%})")
+    print(f"📋 Report saved to: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
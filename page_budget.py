@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Page-Weight Budget Audit for Amrit Sagar Pages
+Resolves every image, background image, stylesheet, script and font each page loads to a file
+on disk, sums the bytes per resource class and fails when a page type's budget is exceeded
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import re
+import sys
+import time
+
+from build_site import css_references, resolve
+from placement_solver import URL_PATTERN, list_pages
+from prune_css import (
+    RUNTIME_ALLOWLIST, apply_allowlist, collect_script_usage, new_usage, parse_css, selector_can_match
+)
+from streaming_html import image_set_spans
+
+BUDGETS_FILE = 'page_budgets.json'
+
+RESOURCE_CLASSES = ('html', 'css', 'js', 'image', 'font')
+FONT_EXTENSIONS = ('.woff2', '.woff', '.ttf', '.otf', '.eot')
+
+# Offending resources listed under each exceeded budget
+TOP_OFFENDERS = 5
+
+# A regex scan is an order of magnitude faster than building a tree, which keeps the hook instant
+TAG_PATTERN = re.compile(r'<([a-zA-Z][\w-]*)((?:\s+[^\s=>/]+(?:\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s>]+))?)*)\s*/?>')
+ATTRIBUTE_PATTERN = re.compile(r'([^\s=>/]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+RAW_TEXT = re.compile(r'<(script|style)\b([^>]*)>(.*?)</\1>', re.S | re.I)
+
+# One image-set() option: its url() and, if given, its type()
+IMAGE_SET_OPTION = re.compile(r'url\(\s*["\']?([^"\')]+)["\']?\s*\)(?:\s*type\(\s*["\']([^"\']+)["\']\s*\))?')
+
+
+def parse_attributes(text):
+    attributes = {}
+    for match in ATTRIBUTE_PATTERN.finditer(text):
+        value = next((group for group in match.groups()[1:] if group is not None), '')
+        attributes[match.group(1).lower()] = value
+    return attributes
+
+
+def scan_html(html):
+    """(tag, attributes) for every start tag, plus the text of inline <script> and <style> blocks"""
+    inline = {'script': [], 'style': []}
+    for match in RAW_TEXT.finditer(html):
+        if 'src=' not in match.group(2):
+            inline[match.group(1).lower()].append(match.group(3))
+    # Drop script bodies so markup inside string literals isn't read as tags
+    markup = RAW_TEXT.sub(lambda match: f'<{match.group(1)}{match.group(2)}>', html)
+    tags = [(match.group(1).lower(), parse_attributes(match.group(2))) for match in TAG_PATTERN.finditer(markup)]
+    return tags, inline
+
+
+def srcset_urls(value):
+    return [candidate.split()[0] for candidate in value.split(',') if candidate.strip()]
+
+
+def url_groups(block):
+    """The URLs a declaration block loads, grouped so each group costs one fetch
+
+    A block with an image-set() overrides the plain url() fallback declared before it, and a
+    browser that supports image-set() picks among the candidates of its first type.
+    """
+    groups = []
+    for start, end in image_set_spans(block):
+        options = IMAGE_SET_OPTION.findall(block[start:end])
+        if options:
+            groups.append([url for url, mime in options if mime == options[0][1]])
+    return groups or [[url] for url in URL_PATTERN.findall(block)]
+
+
+def classify(path):
+    lower = path.lower()
+    if lower.endswith(FONT_EXTENSIONS):
+        return 'font'
+    if lower.endswith('.css'):
+        return 'css'
+    if lower.endswith(('.js', '.mjs')):
+        return 'js'
+    if lower.endswith(('.html', '.htm')):
+        return 'html'
+    return 'image'
+
+
+class PageWeigher:
+    """Weighs pages against the files on disk, caching sizes and parsed assets across pages"""
+
+    def __init__(self, root='.', allowlist=RUNTIME_ALLOWLIST):
+        self.root = root
+        self.allowlist = allowlist
+        self.sizes = {}
+        self.stylesheets = {}
+        self.script_usage = {}
+
+    def size(self, path):
+        if path not in self.sizes:
+            full_path = os.path.join(self.root, path)
+            self.sizes[path] = os.path.getsize(full_path) if os.path.isfile(full_path) else None
+        return self.sizes[path]
+
+    def read(self, path):
+        with open(os.path.join(self.root, path), 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+
+    def stylesheet(self, path):
+        if path not in self.stylesheets:
+            self.stylesheets[path] = parse_css(self.read(path)) if self.size(path) is not None else []
+        return self.stylesheets[path]
+
+    def usage(self, tags, inline, scripts):
+        """Everything the page and its scripts can put in the DOM, as prune_css sees it"""
+        usage = new_usage()
+        for tag, attributes in tags:
+            usage['tags'].add(tag)
+            usage['classes'].update(attributes.get('class', '').split())
+            if attributes.get('id'):
+                usage['ids'].add(attributes['id'])
+            usage['attributes'].update(attributes)
+        for js in inline['script']:
+            collect_script_usage(js, usage)
+        for path in scripts:
+            if path not in self.script_usage:
+                script_usage = new_usage()
+                if self.size(path) is not None:
+                    collect_script_usage(self.read(path), script_usage)
+                self.script_usage[path] = script_usage
+            usage['names'] |= self.script_usage[path]['names']
+            usage['prefixes'] |= self.script_usage[path]['prefixes']
+        apply_allowlist(usage, self.allowlist)
+        return usage
+
+    def css_urls(self, nodes, usage):
+        """URL groups (see url_groups) loaded by the rules this page can match, @font-face sources and @imports"""
+        groups = []
+        for node in nodes:
+            if node['type'] == 'group':
+                groups += self.css_urls(node['rules'], usage)
+            elif node['type'] == 'at' and node['prelude'].lower() == '@font-face':
+                # Browsers stop at the first src they support, which is listed first
+                groups += [[url] for url in URL_PATTERN.findall(node['body'])[:1]]
+            elif node['type'] == 'rule' and any(selector_can_match(s, usage) for s in node['selectors']):
+                groups += url_groups(node['body'])
+            elif node['type'] == 'statement':
+                groups += [[url] for url in css_references(node['text'])]
+        return groups
+
+    def weigh(self, page_path):
+        """Resources one page loads: {'resources': {path: entry}, 'missing': [...], 'external': [...]}"""
+        page = os.path.relpath(page_path, self.root)
+        base_dir = os.path.dirname(page)
+        tags, inline = scan_html(self.read(page))
+        resources = {}
+        missing = []
+        external = []
+
+        def add(url, base, resource_class=None, alternatives=()):
+            candidates = [path for path in (resolve(u, base) for u in (url,) + tuple(alternatives)) if path]
+            if not candidates:
+                if url.strip().lower().startswith(('http://', 'https://', '//')) and url not in external:
+                    external.append(url.strip())
+                return None
+            present = [path for path in candidates if self.size(path) is not None]
+            missing.extend(path for path in candidates if self.size(path) is None and path not in missing)
+            if not present:
+                return None
+            # Of several candidates the browser fetches one; budget for the heaviest
+            path = max(present, key=self.size)
+            if path not in resources:
+                resources[path] = {'path': path, 'class': resource_class or classify(path), 'bytes': self.size(path)}
+            return path
+
+        add(page, '')
+        scripts = []
+        stylesheets = []
+        sources = []
+        for tag, attributes in tags:
+            if tag == 'picture':
+                sources = []
+            elif tag == 'source' and attributes.get('srcset'):
+                sources.append(attributes['srcset'])
+            elif tag == 'img' and (attributes.get('src') or attributes.get('srcset')):
+                # In a <picture> the browser takes the first <source> whose type it supports
+                if sources:
+                    urls = srcset_urls(sources[0])
+                else:
+                    urls = ([attributes['src']] if attributes.get('src') else []) + srcset_urls(attributes.get('srcset', ''))
+                add(urls[0], base_dir, 'image', urls[1:])
+                sources = []
+            elif tag == 'script' and attributes.get('src'):
+                path = add(attributes['src'], base_dir, 'js')
+                if path:
+                    scripts.append(path)
+            elif tag == 'link' and attributes.get('href'):
+                rel = attributes.get('rel', '').lower().split()
+                if 'stylesheet' in rel:
+                    path = add(attributes['href'], base_dir, 'css')
+                    if path and path not in stylesheets:
+                        stylesheets.append(path)
+                elif 'icon' in rel or 'apple-touch-icon' in rel:
+                    add(attributes['href'], base_dir, 'image')
+                elif 'preload' in rel:
+                    as_class = {'image': 'image', 'font': 'font', 'style': 'css', 'script': 'js'}.get(attributes.get('as'))
+                    add(attributes['href'], base_dir, as_class, srcset_urls(attributes.get('imagesrcset', '')))
+            if attributes.get('style'):
+                for urls in url_groups(attributes['style']):
+                    add(urls[0], base_dir, 'image', urls[1:])
+
+        usage = self.usage(tags, inline, scripts)
+        sheets = [(parse_css(css), base_dir) for css in inline['style']]
+        while stylesheets:
+            path = stylesheets.pop(0)
+            sheets.append((self.stylesheet(path), os.path.dirname(path)))
+        seen = set()
+        while sheets:
+            nodes, css_dir = sheets.pop(0)
+            for urls in self.css_urls(nodes, usage):
+                path = add(urls[0], css_dir, None, urls[1:])
+                if path and classify(path) == 'css' and path not in seen:
+                    seen.add(path)
+                    sheets.append((self.stylesheet(path), os.path.dirname(path)))
+
+        return {'resources': resources, 'missing': missing, 'external': external}
+
+
+def load_budgets(path=BUDGETS_FILE):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def page_type(page, budgets):
+    """First page type whose patterns match the page name, or 'default'"""
+    for name, page_type_budget in budgets.get('page_types', {}).items():
+        if any(fnmatch.fnmatch(page, pattern) for pattern in page_type_budget.get('pages', [])):
+            return name
+    return 'default'
+
+
+def budgets_for(page_type_name, budgets):
+    limits = dict(budgets.get('default', {}))
+    limits.update(budgets.get('page_types', {}).get(page_type_name, {}).get('budgets', {}))
+    return limits
+
+
+def totals(resources):
+    by_class = {resource_class: 0 for resource_class in RESOURCE_CLASSES}
+    for resource in resources.values():
+        by_class[resource['class']] = by_class.get(resource['class'], 0) + resource['bytes']
+    by_class['total'] = sum(resource['bytes'] for resource in resources.values())
+    return by_class
+
+
+def check_page(page, weight, budgets):
+    """Budgets the page exceeds, each with the resources responsible, heaviest first"""
+    page_type_name = page_type(page, budgets)
+    limits = budgets_for(page_type_name, budgets)
+    page_totals = totals(weight['resources'])
+    heaviest = sorted(weight['resources'].values(), key=lambda r: (-r['bytes'], r['path']))
+
+    violations = []
+    for resource_class, limit in limits.items():
+        if page_totals.get(resource_class, 0) > limit:
+            offenders = [r for r in heaviest if resource_class == 'total' or r['class'] == resource_class]
+            violations.append({
+                'page': page, 'type': page_type_name, 'budget': resource_class, 'limit': limit,
+                'bytes': page_totals[resource_class], 'over': page_totals[resource_class] - limit,
+                'offenders': offenders[:TOP_OFFENDERS]
+            })
+
+    for resource_class, limit in budgets.get('max_resource_bytes', {}).items():
+        for resource in heaviest:
+            if resource['class'] == resource_class and resource['bytes'] > limit:
+                violations.append({
+                    'page': page, 'type': page_type_name, 'budget': f"single {resource_class}", 'limit': limit,
+                    'bytes': resource['bytes'], 'over': resource['bytes'] - limit, 'offenders': [resource]
+                })
+
+    return page_totals, violations
+
+
+def audit(root='.', budgets_file=BUDGETS_FILE, pages=None):
+    """Weigh every page and check it against its budgets; returns (results, violations)"""
+    budgets = load_budgets(os.path.join(root, budgets_file))
+    weigher = PageWeigher(root)
+    results = {}
+    violations = []
+    for page_path in pages or list_pages(root):
+        page = os.path.relpath(page_path, root)
+        weight = weigher.weigh(page_path)
+        page_totals, page_violations = check_page(page, weight, budgets)
+        results[page] = {
+            'type': page_type(page, budgets), 'totals': page_totals,
+            'missing': weight['missing'], 'external': weight['external']
+        }
+        violations += page_violations
+    violations.sort(key=lambda v: (-v['over'], v['page'], v['budget']))
+    return results, violations
+
+
+def kb(size):
+    return f"{size / 1024:.1f} KB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fail when a page exceeds its page-weight budget')
+    parser.add_argument('pages', nargs='*', help='Pages to audit (default: every page)')
+    parser.add_argument('--root', default='.')
+    parser.add_argument('--budgets', default=BUDGETS_FILE)
+    parser.add_argument('--report', help='Also write the totals and violations to this JSON file')
+    parser.add_argument('--quiet', action='store_true', help='Only print violations')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    # Pre-commit passes every staged file; only pages are audited on their own
+    pages = [os.path.join(args.root, p) for p in args.pages if p.endswith('.html')] if args.pages else None
+    if args.pages and not pages:
+        pages = list_pages(args.root)
+    results, violations = audit(args.root, args.budgets, pages)
+    elapsed = time.perf_counter() - started
+
+    if not args.quiet:
+        print("⚖️ Page-Weight Budget Audit")
+        print("=" * 60)
+        for page, result in results.items():
+            icon = '❌' if any(v['page'] == page for v in violations) else '✅'
+            breakdown = ', '.join(f"{c} {kb(result['totals'][c])}" for c in RESOURCE_CLASSES if result['totals'][c])
+            print(f"   {icon} {page} [{result['type']}]: {kb(result['totals']['total'])} ({breakdown})")
+            for path in result['missing']:
+                print(f"      ⚠️ Missing on disk: {path}")
+
+    if violations:
+        print(f"\n❌ {len(violations)} budget(s) exceeded:")
+        for violation in violations:
+            print(f"   {violation['page']} {violation['budget']}: {kb(violation['bytes'])} "
+                  f"> {kb(violation['limit'])} (+{kb(violation['over'])})")
+            for offender in violation['offenders']:
+                print(f"      {kb(offender['bytes']):>10}  {offender['path']}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'pages': results, 'violations': violations}, f, indent=2)
+
+    if not args.quiet or violations:
+        print(f"\n📊 {len(results)} pages audited in {elapsed * 1000:.0f} ms")
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Offline Page-Load Simulator for Amrit Sagar Pages
+Builds each page's resource graph (render-blocking, deferred, lazy, per origin) and simulates
+loading it over configurable network profiles with HTTP/1.1 or HTTP/2, estimating first
+render, LCP and bytes so CI can catch regressions before deploy
+
+Measures the pages as they ship, so build first:
+    python build_site.py && python page_load_sim.py --baseline
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+from build_site import OUTPUT_DIR
+from page_budget import url_groups
+from placement_solver import list_pages
+from prune_css import RUNTIME_ALLOWLIST, page_usage, parse_css, selector_can_match
+from service_worker import picture_url
+from site_snapshot import SnapshotArchive
+from streaming_html import CSS_URL_PATTERN
+
+REPORT_FILE = 'page_load_report.json'
+BASELINE_FILE = 'page_load_baseline.json'
+
+# Where the pages are served from; local paths resolve against it
+SITE_ORIGIN = 'https://amritsagar.org/'
+
+# rtt in ms, downlink in kbit/s
+NETWORK_PROFILES = {
+    '3g-india': {'rtt': 400, 'downlink': 750},
+    '4g': {'rtt': 170, 'downlink': 9000},
+    'cable': {'rtt': 28, 'downlink': 5000},
+}
+PROTOCOLS = ('h1', 'h2')
+
+# Connection setup in round trips: DNS, TCP, TLS 1.3
+SETUP_RTTS = 3
+H1_CONNECTIONS_PER_ORIGIN = 6
+
+# Fetch priority by how a resource is loaded; lower goes first
+PRIORITIES = {'blocking': 0, 'preload': 0, 'deferred': 1, 'async': 1, 'normal': 2, 'lazy': 3}
+SERVER_TIME = 0.03
+RESPONSE_OVERHEAD = 400
+
+# Regression gate: allowed slowdown over the baseline, relative and absolute (seconds)
+MAX_REGRESSION = 0.10
+REGRESSION_SLACK = 0.05
+
+# Transfer sizes for third-party resources when no snapshot is given
+# (url substring -> compressed bytes, plus the files that CSS pulls in)
+EXTERNAL_ESTIMATES = {
+    'fonts.googleapis.com/css': {'bytes': 1200, 'kind': 'stylesheet', 'font_bytes': 24000},
+    'font-awesome/6.4.0/css/all.min.css': {
+        'bytes': 20500,
+        'kind': 'stylesheet',
+        'children': [
+            ('https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/webfonts/fa-solid-900.woff2', 150124),
+            ('https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/webfonts/fa-brands-400.woff2', 117852),
+        ]
+    },
+}
+DEFAULT_EXTERNAL_BYTES = 20000
+
+FONT_EXTENSIONS = ('.woff2', '.woff', '.ttf', '.otf')
+TEXT_EXTENSIONS = ('.html', '.css', '.js', '.json', '.svg')
+
+
+class ResourceSizer:
+    """Transfer sizes from disk (gzipped text) or from a recorded snapshot"""
+
+    def __init__(self, root='.', snapshot=None):
+        self.root = root
+        self.snapshot = snapshot
+        self.cache = {}
+
+    def local_path(self, url):
+        if not url.startswith(SITE_ORIGIN):
+            return None
+        return os.path.join(self.root, urlparse(url).path.lstrip('/'))
+
+    def body(self, url):
+        """Response body, or None when neither the tree nor the snapshot has it"""
+        path = self.local_path(url)
+        if path and os.path.isfile(path):
+            with open(path, 'rb') as f:
+                return f.read()
+        if self.snapshot is not None and url in self.snapshot:
+            return self.snapshot.get(url).content
+        return None
+
+    def size(self, url):
+        if url not in self.cache:
+            body = self.body(url)
+            if body is None:
+                self.cache[url] = None
+            elif urlparse(url).path.lower().endswith(TEXT_EXTENSIONS) or b'<html' in body[:512].lower():
+                self.cache[url] = len(gzip.compress(body, compresslevel=6))
+            else:
+                self.cache[url] = len(body)
+        return self.cache[url]
+
+
+def kind_of(url):
+    path = urlparse(url).path.lower()
+    if path.endswith(FONT_EXTENSIONS):
+        return 'font'
+    if path.endswith('.css') or 'fonts.googleapis.com/css' in url:
+        return 'stylesheet'
+    if path.endswith('.js'):
+        return 'script'
+    return 'image'
+
+
+def resource(url, kind, mode, size, children=None):
+    return {'url': url, 'kind': kind, 'mode': mode, 'bytes': size, 'children': children or []}
+
+
+def external_stylesheet(url, sizer):
+    """A third-party stylesheet and the fonts it loads, from the snapshot or the estimates"""
+    body = sizer.body(url)
+    if body is not None:
+        children = [
+            resource(child, kind_of(child), 'normal', sizer.size(child) or DEFAULT_EXTERNAL_BYTES)
+            for child in sorted(set(urljoin(url, u) for u in CSS_URL_PATTERN.findall(body.decode('utf-8', 'replace'))))
+            if kind_of(child) == 'font'
+        ]
+        return sizer.size(url), children
+
+    for pattern, estimate in EXTERNAL_ESTIMATES.items():
+        if pattern in url:
+            if 'font_bytes' in estimate:
+                families = re.findall(r'family=([^&]+)', url)
+                weights = sum(len(f.split('@', 1)[1].split(';')) if '@' in f else 1 for f in families)
+                fonts = [(f"{url}#font-{i}", estimate['font_bytes']) for i in range(weights)]
+            else:
+                fonts = estimate.get('children', [])
+            return estimate['bytes'], [resource(font, 'font', 'normal', size) for font, size in fonts]
+    return DEFAULT_EXTERNAL_BYTES, []
+
+
+def local_stylesheet_children(url, sizer, usage):
+    """Images and fonts a local stylesheet loads for the rules this page can match"""
+    body = sizer.body(url)
+    if body is None:
+        return []
+
+    urls = []
+
+    def walk(nodes):
+        for node in nodes:
+            if node['type'] == 'group':
+                walk(node['rules'])
+            elif node['type'] == 'at' and node['prelude'].lower() == '@font-face':
+                urls.extend(CSS_URL_PATTERN.findall(node['body'])[:1])
+            elif node['type'] == 'rule' and any(selector_can_match(s, usage) for s in node['selectors']):
+                # One fetch per image-set(), of its preferred candidate
+                urls.extend(group[0] for group in url_groups(node['body']))
+
+    walk(parse_css(body.decode('utf-8', 'replace')))
+    children = []
+    for child in dict.fromkeys(urljoin(url, u) for u in urls if not u.startswith('data:')):
+        children.append(resource(child, kind_of(child), 'normal', sizer.size(child) or 0))
+    return children
+
+
+def in_noscript(element):
+    return any(parent.name == 'noscript' for parent in element.parents)
+
+
+def page_graph(page, sizer, allowlist=RUNTIME_ALLOWLIST):
+    """Resource tree for one page: the document and everything it and its CSS load"""
+    with open(page, 'r', encoding='utf-8') as f:
+        html = f.read()
+    soup = BeautifulSoup(html, 'html.parser')
+    page_url = urljoin(SITE_ORIGIN, os.path.relpath(page, sizer.root).replace(os.sep, '/'))
+    usage = page_usage(page, allowlist, sizer.root)
+
+    children = {}
+    preconnects = []
+    lcp_url = None
+
+    def add(url, kind, mode):
+        url = urljoin(page_url, url.strip())
+        if url.startswith('data:') or urlparse(url).scheme not in ('http', 'https'):
+            return None
+        if url in children:
+            # A preload and the tag that uses it are one fetch, at the earlier priority
+            if children[url]['mode'] in ('lazy', 'normal') and mode not in ('lazy', 'normal'):
+                children[url]['mode'] = mode
+            return url
+        if kind == 'stylesheet' and not url.startswith(SITE_ORIGIN):
+            size, css_children = external_stylesheet(url, sizer)
+        elif kind == 'stylesheet':
+            size, css_children = sizer.size(url) or 0, local_stylesheet_children(url, sizer, usage)
+        else:
+            size, css_children = sizer.size(url) or (0 if url.startswith(SITE_ORIGIN) else DEFAULT_EXTERNAL_BYTES), []
+        children[url] = resource(url, kind, mode, size, css_children)
+        return url
+
+    # A <picture>'s <source>s are fetched through its <img>
+    for element in soup.find_all(['link', 'script', 'img']):
+        if in_noscript(element):
+            continue
+        rel = [value.lower() for value in element.get('rel', [])]
+        if element.name == 'link' and 'preconnect' in rel and element.get('href'):
+            preconnects.append(urljoin(page_url, element['href']))
+        elif element.name == 'link' and 'stylesheet' in rel and element.get('href'):
+            media = (element.get('media') or 'all').lower()
+            add(element['href'], 'stylesheet', 'blocking' if media in ('all', 'screen') else 'async')
+        elif element.name == 'link' and 'preload' in rel and element.get('href'):
+            url = add(element['href'], kind_of(element['href']) if element.get('as') != 'image' else 'image', 'preload')
+            if element.get('as') == 'image' and lcp_url is None:
+                lcp_url = url
+        elif element.name == 'script' and element.get('src'):
+            mode = 'async' if element.has_attr('async') else 'deferred' if element.has_attr('defer') else 'blocking'
+            add(element['src'], 'script', mode)
+        elif element.name == 'img' and picture_url(element):
+            url = add(picture_url(element), 'image', 'lazy' if element.get('loading') == 'lazy' else 'normal')
+            if lcp_url is None and element.get('loading') != 'lazy' and not element.find_parent(['header', 'nav']):
+                lcp_url = url
+
+    for element in soup.find_all(style=True):
+        for urls in url_groups(element['style']):
+            added = add(urls[0], 'image', 'normal')
+            if added and lcp_url is None and 'hero' in element.get('class', []):
+                lcp_url = added
+
+    document = resource(page_url, 'document', 'blocking', sizer.size(page_url) or len(html.encode('utf-8')),
+                        list(children.values()))
+    document['preconnects'] = preconnects
+    document['lcp'] = lcp_url
+    return document
+
+
+def priority(request):
+    if request['kind'] in ('document', 'stylesheet', 'font') and request['mode'] != 'async':
+        return 0
+    return PRIORITIES[request['mode']]
+
+
+class Connection:
+    def __init__(self, ready_at):
+        self.ready_at = ready_at
+        self.busy = False
+
+
+class NetworkSimulation:
+    """Fluid model: in-flight responses share the downlink equally
+
+    Each origin pays DNS + TCP + TLS round trips per connection. HTTP/2 uses
+    one multiplexed connection per origin; HTTP/1.1 opens up to six and sends
+    one request at a time on each.
+    """
+
+    def __init__(self, profile, protocol):
+        self.rtt = profile['rtt'] / 1000
+        self.bandwidth = profile['downlink'] * 1000 / 8
+        self.protocol = protocol
+        self.connections = {}
+
+    def origin_connections(self, origin):
+        return self.connections.setdefault(origin, [])
+
+    def connect(self, origin, now):
+        connection = Connection(now + SETUP_RTTS * self.rtt)
+        self.origin_connections(origin).append(connection)
+        return connection
+
+    def preconnect(self, url, now):
+        origin = urlparse(url).netloc
+        if not self.origin_connections(origin):
+            self.connect(origin, now)
+
+    def assign(self, request, now):
+        """Connection and first-byte time for a waiting request; None if it must keep waiting"""
+        origin = urlparse(request['url']).netloc
+        connections = self.origin_connections(origin)
+        if self.protocol == 'h2':
+            connection = connections[0] if connections else self.connect(origin, now)
+        else:
+            idle = [c for c in connections if not c.busy]
+            if idle:
+                connection = min(idle, key=lambda c: c.ready_at)
+            elif len(connections) < H1_CONNECTIONS_PER_ORIGIN:
+                connection = self.connect(origin, now)
+            else:
+                return None
+            connection.busy = True
+        return connection, max(now, connection.ready_at) + self.rtt + SERVER_TIME
+
+    def rates(self, transferring, active):
+        """Downlink share per in-flight response
+
+        HTTP/1.1 connections split the link evenly. HTTP/2 streams follow
+        priorities, so only the most important responses in flight progress.
+        """
+        if not transferring:
+            return {}
+        urls = list(transferring)
+        if self.protocol == 'h2':
+            top = min(priority(active[url][0]) for url in urls)
+            urls = [url for url in urls if priority(active[url][0]) == top]
+        return {url: (self.bandwidth / len(urls) if url in urls else 0) for url in transferring}
+
+    def simulate(self, document):
+        """{url: {'start', 'first_byte', 'end'}} for every non-lazy resource in the tree"""
+        timings = {}
+        waiting = [(0.0, document)]
+        requested = {}
+        transferring = {}
+        active = {}
+        now = 0.0
+
+        while waiting or requested or transferring:
+            still_waiting = []
+            # Browsers send render-critical requests ahead of images
+            waiting.sort(key=lambda item: priority(item[1]))
+            for discovered_at, request in waiting:
+                url = request['url']
+                if url in timings:
+                    # Already fetched or in flight; the browser reuses it
+                    continue
+                assigned = self.assign(request, now) if discovered_at <= now else None
+                if assigned:
+                    active[url] = (request, assigned[0])
+                    requested[url] = assigned[1]
+                    timings[url] = {'start': discovered_at}
+                else:
+                    still_waiting.append((discovered_at, request))
+            waiting = still_waiting
+
+            events = list(requested.values()) + [t for t, _ in waiting if t > now]
+            rates = self.rates(transferring, active)
+            events += [now + transferring[url] / rate for url, rate in rates.items() if rate]
+            if not events:
+                break
+            step = max(min(events), now) - now
+
+            for url, rate in rates.items():
+                transferring[url] -= rate * step
+            now += step
+
+            for url in [u for u, first_byte in requested.items() if first_byte <= now]:
+                del requested[url]
+                transferring[url] = active[url][0]['bytes'] + RESPONSE_OVERHEAD
+                timings[url]['first_byte'] = now
+                if url == document['url']:
+                    for origin_url in document.get('preconnects', []):
+                        self.preconnect(origin_url, now)
+
+            for url in [u for u, remaining in transferring.items() if remaining <= 1e-6]:
+                del transferring[url]
+                request, connection = active.pop(url)
+                timings[url]['end'] = now
+                connection.busy = False
+                for child in request['children']:
+                    if child['mode'] != 'lazy':
+                        waiting.append((now, child))
+
+        return timings
+
+
+def flatten(request):
+    yield request
+    for child in request['children']:
+        yield from flatten(child)
+
+
+def page_metrics(document, timings):
+    """First render, LCP, load and bytes from simulated timings"""
+    document_end = timings[document['url']]['end']
+    blocking = [r for r in document['children'] if r['mode'] == 'blocking' and r['url'] in timings]
+    first_render = max([document_end] + [timings[r['url']]['end'] for r in blocking])
+
+    lcp = first_render
+    if document['lcp'] and document['lcp'] in timings:
+        lcp = max(first_render, timings[document['lcp']]['end'])
+
+    loaded = [r for r in flatten(document) if r['url'] in timings]
+    origins = {urlparse(r['url']).netloc for r in loaded}
+    return {
+        'first_render': round(first_render, 3),
+        'lcp': round(lcp, 3),
+        'load': round(max(timings[r['url']]['end'] for r in loaded), 3),
+        'bytes': sum(r['bytes'] for r in loaded),
+        'blocking_bytes': sum(r['bytes'] for r in blocking) + document['bytes'],
+        'requests': len(loaded),
+        'origins': len(origins),
+        'lcp_resource': document['lcp']
+    }
+
+
+def simulate_site(root=OUTPUT_DIR, profiles=None, protocols=PROTOCOLS, snapshot=None):
+    """{page: {profile: {protocol: metrics}}} for every page"""
+    profiles = profiles or list(NETWORK_PROFILES)
+    sizer = ResourceSizer(root, snapshot)
+    results = {}
+    for page in list_pages(root):
+        document = page_graph(page, sizer)
+        page_results = results.setdefault(os.path.basename(page), {})
+        for profile in profiles:
+            for protocol in protocols:
+                timings = NetworkSimulation(NETWORK_PROFILES[profile], protocol).simulate(document)
+                page_results.setdefault(profile, {})[protocol] = page_metrics(document, timings)
+    return results
+
+
+def regressions(results, baseline, max_regression=MAX_REGRESSION):
+    """(page, profile, protocol, metric, before, after) that got slower than the gate allows"""
+    found = []
+    for page, profiles in results.items():
+        for profile, protocols in profiles.items():
+            for protocol, metrics in protocols.items():
+                before = baseline.get(page, {}).get(profile, {}).get(protocol)
+                if not before:
+                    continue
+                for metric in ('first_render', 'lcp'):
+                    limit = before[metric] * (1 + max_regression) + REGRESSION_SLACK
+                    if metrics[metric] > limit:
+                        found.append((page, profile, protocol, metric, before[metric], metrics[metric]))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate page loads over mobile and fixed networks')
+    parser.add_argument('--root', default=OUTPUT_DIR, help=f'Built site to measure (default {OUTPUT_DIR}/)')
+    parser.add_argument('--profile', action='append', choices=sorted(NETWORK_PROFILES), help='Network profile (repeatable)')
+    parser.add_argument('--protocol', action='append', choices=PROTOCOLS, help='HTTP version (repeatable)')
+    parser.add_argument('--from-snapshot', metavar='PATH', help='Take third-party sizes from a recorded snapshot')
+    parser.add_argument('--report', default=REPORT_FILE)
+    parser.add_argument('--baseline', nargs='?', const=BASELINE_FILE,
+                        help=f'Fail when first render or LCP regress against this report (default {BASELINE_FILE})')
+    parser.add_argument('--max-regression', type=float, default=MAX_REGRESSION)
+    parser.add_argument('--update-baseline', action='store_true', help='Write the results to --baseline')
+    args = parser.parse_args()
+
+    print("⏱️ Simulating Page Loads")
+    print("=" * 60)
+
+    if not list_pages(args.root):
+        print(f"❌ No pages in {args.root}/; run build_site.py first")
+        sys.exit(1)
+
+    snapshot = SnapshotArchive(args.from_snapshot) if args.from_snapshot else None
+    results = simulate_site(args.root, args.profile, args.protocol or PROTOCOLS, snapshot)
+    if snapshot:
+        snapshot.close()
+
+    for page, profiles in results.items():
+        print(f"📄 {page}")
+        for profile, protocols in profiles.items():
+            for protocol, m in protocols.items():
+                print(f"   {profile:9} {protocol}: render {m['first_render']:.2f}s, LCP {m['lcp']:.2f}s, "
+                      f"load {m['load']:.2f}s, {m['bytes'] / 1024:.0f} KB in {m['requests']} requests")
+
+    with open(args.report, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📋 Report saved to: {args.report}")
+
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline updated: {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        found = regressions(results, baseline, args.max_regression)
+        if found:
+            print(f"❌ {len(found)} regressions against {args.baseline}:")
+            for page, profile, protocol, metric, before, after in found:
+                print(f"   {page} {profile} {protocol} {metric}: {before:.2f}s -> {after:.2f}s")
+            sys.exit(1)
+        print(f"✅ No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+Bytes-Aware Image Placement Solver for Amrit Sagar Website
+Sizes every hero and image slot from styles.css and the page markup, then assigns
+each slot the lightest image variant that still covers it at 1x and 2x DPR
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import struct
+
+from bs4 import BeautifulSoup
+
+from image_index import INDEX_FILE, ImageIndex
+
+IMAGE_DIR = 'images'
+STYLESHEET = 'styles.css'
+OUTPUT_FILE = 'image_placement_map.json'
+
+VIEWPORT = (1440, 900)
+ROOT_FONT_SIZE = 16
+
+# A variant may be this much smaller than the slot before it counts as upscaled
+UPSCALE_TOLERANCE = 0.05
+# Auto-height slots take the variant's shape, so crops must keep the original's
+ASPECT_TOLERANCE = 0.02
+# A repeated URL loads once, so a repeated family is only swapped for an unused one when that
+# adds at most this many bytes, or to break up a visible duplicate within the same section
+# while the page stays no heavier than its current markup
+SUBSTITUTE_MAX_BYTES = 32 * 1024
+
+VARIANT_PATTERN = re.compile(r'^(?P<base>.+)-(?P<w>\d+)x(?P<h>\d+)_c(?P<ext>\.\w+)$')
+DUPLICATE_PATTERN = re.compile(r'^(?P<base>.+)_\d+(?P<ext>\.\w+)$')
+URL_PATTERN = re.compile(r'url\(\s*["\']?([^"\')]+)["\']?\s*\)')
+
+
+def read_image_size(path):
+    """Read (width, height) from a JPEG or PNG header, None if not an image"""
+    with open(path, 'rb') as f:
+        head = f.read(26)
+        if head.startswith(b'\x89PNG\r\n\x1a\n'):
+            return struct.unpack('>II', head[16:24])
+        if not head.startswith(b'\xff\xd8'):
+            return None
+
+        f.seek(2)
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            # Start-of-frame markers carry the dimensions
+            if marker[1] in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+                f.read(3)
+                height, width = struct.unpack('>HH', f.read(4))
+                return width, height
+            length = struct.unpack('>H', f.read(2))[0]
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def discover_variants(image_dir=IMAGE_DIR):
+    """Group image files into families of the original and its crops"""
+    files = {os.path.basename(p): p for p in glob.glob(os.path.join(image_dir, '*')) if os.path.isfile(p)}
+    families = {}
+
+    for name, path in sorted(files.items()):
+        # Downloader suffix copies (4_23.jpg) are byte-identical duplicates
+        dup = DUPLICATE_PATTERN.match(name)
+        if dup and dup.group('base') + dup.group('ext') in files:
+            original = files[dup.group('base') + dup.group('ext')]
+            if os.path.getsize(original) == os.path.getsize(path):
+                continue
+
+        size = read_image_size(path)
+        if not size or not name.lower().endswith(('.jpg', '.jpeg')):
+            continue
+
+        crop = VARIANT_PATTERN.match(name)
+        family = crop.group('base') + crop.group('ext') if crop else name
+        families.setdefault(family, []).append({
+            'src': f"{image_dir}/{name}",
+            'width': size[0],
+            'height': size[1],
+            'bytes': os.path.getsize(path),
+            'crop': bool(crop)
+        })
+
+    # Crops without a local original cannot anchor a family
+    return {
+        family: variants for family, variants in families.items()
+        if any(not v['crop'] for v in variants)
+    }
+
+
+def parse_stylesheet(css):
+    """Collect base (non-@media) rules as selector -> declarations in source order"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    rules = []
+    depth = 0
+    start = 0
+    skip_depth = None
+
+    for i, ch in enumerate(css):
+        if ch == '{':
+            prelude = css[start:i].strip()
+            if depth == 0 and prelude.startswith('@'):
+                skip_depth = depth
+            depth += 1
+            selector_text = prelude
+            start = i + 1
+        elif ch == '}':
+            depth -= 1
+            if skip_depth is not None and depth == skip_depth:
+                skip_depth = None
+            elif skip_depth is None and depth == 0:
+                body = css[start:i]
+                declarations = {}
+                for decl in body.split(';'):
+                    if ':' in decl:
+                        prop, value = decl.split(':', 1)
+                        declarations[prop.strip().lower()] = value.strip()
+                for selector in selector_text.split(','):
+                    rules.append((selector.strip(), declarations))
+            start = i + 1
+
+    return rules
+
+
+def parse_simple_selector(selector):
+    """Parse a descendant selector of tag/class compounds; None if unsupported"""
+    if any(ch in selector for ch in ':>+~[#*'):
+        return None
+    parts = []
+    for compound in selector.split():
+        match = re.fullmatch(r'([a-zA-Z][\w-]*)?((?:\.[\w-]+)*)', compound)
+        if not match:
+            return None
+        tag = match.group(1)
+        classes = [c for c in match.group(2).split('.') if c]
+        parts.append((tag, set(classes)))
+    return parts or None
+
+
+def compound_matches(element, compound):
+    tag, classes = compound
+    if tag and element.name != tag:
+        return False
+    return classes.issubset(element.get('class', []))
+
+
+def selector_matches(element, parts):
+    if not compound_matches(element, parts[-1]):
+        return False
+    ancestor = element.parent
+    for compound in reversed(parts[:-1]):
+        while ancestor is not None and not compound_matches(ancestor, compound):
+            ancestor = ancestor.parent
+        if ancestor is None:
+            return False
+        ancestor = ancestor.parent
+    return True
+
+
+def parse_inline_style(style):
+    declarations = {}
+    for decl in (style or '').split(';'):
+        if ':' in decl:
+            prop, value = decl.split(':', 1)
+            declarations[prop.strip().lower()] = value.strip()
+    return declarations
+
+
+def to_px(value, reference=None, viewport=VIEWPORT):
+    """Convert a CSS length to px; None for auto/unsupported units"""
+    match = re.fullmatch(r'(-?[\d.]+)(px|rem|em|%|vh|vw)?', (value or '').strip())
+    if not match:
+        return None
+    number, unit = float(match.group(1)), match.group(2) or 'px'
+    if unit == 'px':
+        return number
+    if unit in ('rem', 'em'):
+        return number * ROOT_FONT_SIZE
+    if unit == 'vw':
+        return viewport[0] * number / 100
+    if unit == 'vh':
+        return viewport[1] * number / 100
+    return reference * number / 100 if reference is not None else None
+
+
+def horizontal_padding(padding, width):
+    values = (padding or '').split()
+    if not values:
+        return 0
+    right = values[1] if len(values) > 1 else values[0]
+    left = values[3] if len(values) > 3 else right
+    return (to_px(left, width) or 0) + (to_px(right, width) or 0)
+
+
+def grid_columns(template, gap, width):
+    """Column widths for a grid template at a given container width"""
+    auto = re.fullmatch(r'repeat\(\s*auto-(?:fit|fill)\s*,\s*minmax\(\s*([^,]+),\s*1fr\s*\)\s*\)', template)
+    if auto:
+        minimum = to_px(auto.group(1), width) or width
+        count = max(1, int((width + gap) // (minimum + gap)))
+        return [(width - (count - 1) * gap) / count] * count
+
+    fixed = re.fullmatch(r'repeat\(\s*(\d+)\s*,\s*([\d.]+)fr\s*\)', template)
+    if fixed:
+        count = int(fixed.group(1))
+        return [(width - (count - 1) * gap) / count] * count
+
+    tracks = template.split()
+    fractions = [float(t[:-2]) for t in tracks if t.endswith('fr')]
+    if len(fractions) != len(tracks):
+        return [width]
+    free = width - (len(tracks) - 1) * gap
+    return [free * fr / sum(fractions) for fr in fractions]
+
+
+class SlotGeometry:
+    """Approximate desktop layout engine over the stylesheet's base rules"""
+
+    def __init__(self, css, viewport=VIEWPORT):
+        self.viewport = viewport
+        self.rules = []
+        for selector, declarations in parse_stylesheet(css):
+            parts = parse_simple_selector(selector)
+            if parts:
+                self.rules.append((parts, declarations))
+        self._widths = {}
+
+    def computed(self, element):
+        """Declarations for an element, later rules and inline style winning"""
+        style = {}
+        for parts, declarations in self.rules:
+            if selector_matches(element, parts):
+                style.update(declarations)
+        style.update(parse_inline_style(element.get('style')))
+        return style
+
+    def border_box_width(self, element):
+        if element is None or element.name in (None, '[document]', 'html', 'body'):
+            return float(self.viewport[0])
+        key = id(element)
+        if key in self._widths:
+            return self._widths[key]
+
+        parent = element.parent
+        available = self.content_width(parent)
+        parent_style = self.computed(parent) if parent is not None and parent.name else {}
+
+        if parent_style.get('display') == 'grid' and 'grid-template-columns' in parent_style:
+            gap = to_px((parent_style.get('gap') or '0').split()[-1], available) or 0
+            columns = grid_columns(parent_style['grid-template-columns'], gap, available)
+            siblings = [c for c in parent.find_all(recursive=False)]
+            available = columns[siblings.index(element) % len(columns)]
+
+        style = self.computed(element)
+        width = to_px(style.get('width'), available) if style.get('width') else None
+        width = available if width is None else width
+        max_width = to_px(style.get('max-width'), available)
+        if max_width is not None:
+            width = min(width, max_width)
+
+        self._widths[key] = width
+        return width
+
+    def content_width(self, element):
+        if element is None or element.name in (None, '[document]'):
+            return float(self.viewport[0])
+        width = self.border_box_width(element)
+        return width - horizontal_padding(self.computed(element).get('padding'), width)
+
+    def hero_box(self, element):
+        """Rendered size of a background-covered hero section"""
+        style = self.computed(element)
+        width = self.border_box_width(element)
+        height = to_px(style.get('height'), viewport=self.viewport) or 0
+        min_height = to_px(style.get('min-height'), viewport=self.viewport) or 0
+        return width, max(height, min_height) or None
+
+    def image_box(self, img):
+        """Rendered size of an <img>; height None when it follows the image's aspect"""
+        width = self.border_box_width(img)
+        style = self.computed(img)
+        height = style.get('height', 'auto')
+
+        if height.endswith('%'):
+            # height: 100% inside an aspect-ratio box (gallery cards)
+            for ancestor in img.parents:
+                ratio = self.computed(ancestor).get('aspect-ratio') if ancestor.name else None
+                if ratio:
+                    w, _, h = ratio.partition('/')
+                    box_width = self.border_box_width(ancestor)
+                    return width, box_width * float(h or 1) / float(w)
+            return width, None
+
+        return width, to_px(height, viewport=self.viewport)
+
+
+def covers(variant, width, height, dpr):
+    need_w = width * dpr * (1 - UPSCALE_TOLERANCE)
+    need_h = height * dpr * (1 - UPSCALE_TOLERANCE) if height else 0
+    return variant['width'] >= need_w and variant['height'] >= need_h
+
+
+def pick_variant(variants, width, height, dpr, loaded=()):
+    """Lightest variant covering the slot, else the largest available
+
+    Variants whose src is in loaded already load on the page and cost nothing.
+    """
+    original = next(v for v in variants if not v['crop'])
+    candidates = variants
+    if not height:
+        aspect = original['width'] / original['height']
+        candidates = [
+            v for v in variants
+            if abs(v['width'] / v['height'] - aspect) / aspect <= ASPECT_TOLERANCE
+        ]
+
+    covering = [v for v in candidates if covers(v, width, height, dpr)]
+    if covering:
+        return min(covering, key=lambda v: 0 if v['src'] in loaded else v['bytes'])
+    largest = max(v['width'] * v['height'] for v in candidates)
+    return min((v for v in candidates if v['width'] * v['height'] == largest), key=lambda v: v['bytes'])
+
+
+def family_of(src, families):
+    name = os.path.basename(src)
+    if name in families:
+        return name
+    for pattern in (VARIANT_PATTERN, DUPLICATE_PATTERN):
+        match = pattern.match(name)
+        if match and match.group('base') + match.group('ext') in families:
+            return match.group('base') + match.group('ext')
+    return None
+
+
+def slot_name(img):
+    """Name a slot after the nearest classed wrapper (gallery cards share one list)"""
+    for ancestor in img.parents:
+        classes = ancestor.get('class', []) if ancestor.name else []
+        if any('gallery' in c for c in classes):
+            return 'gallery'
+        if classes:
+            return classes[0].replace('-', '_')
+    return 'content_images'
+
+
+def find_slots(html, geometry, families):
+    """Locate local image slots in document order with their rendered boxes"""
+    soup = BeautifulSoup(html, 'html.parser')
+    slots = []
+
+    for element in soup.find_all(True):
+        if element.name == 'img':
+            src = element.get('src', '')
+            family = family_of(src, families)
+            if family is None or 'logo' in src:
+                continue
+            width, height = geometry.image_box(element)
+            slots.append({
+                'slot': slot_name(element), 'current': src, 'family': family,
+                'width': width, 'height': height, 'alt': element.get('alt', '')
+            })
+        elif 'hero' in element.get('class', []):
+            match = URL_PATTERN.search(element.get('style', '') or '')
+            family = family_of(match.group(1), families) if match else None
+            if family is None:
+                continue
+            width, height = geometry.hero_box(element)
+            slots.append({
+                'slot': 'hero_background', 'current': match.group(1), 'family': family,
+                'width': width, 'height': height, 'alt': ''
+            })
+
+    return slots
+
+
+def file_bytes(src, image_dir=IMAGE_DIR):
+    path = os.path.join(image_dir, os.path.basename(src))
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def solve_page(slots, families, index=None, image_dir=IMAGE_DIR):
+    """Assign variants to slots, swapping repeated families for unused ones when it is worth the bytes"""
+    used = set()
+    sections = {}
+    current_srcs = set()
+    loaded = set()
+    # Bytes the page has saved so far against its current markup
+    slack = 0
+    assignments = []
+
+    def added_bytes(variant):
+        return 0 if variant['src'] in loaded else variant['bytes']
+
+    for slot in slots:
+        family = slot['family']
+        substituted = False
+        if slot['current'] not in current_srcs:
+            current_srcs.add(slot['current'])
+            slack += file_bytes(slot['current'], image_dir)
+
+        if family in used:
+            unused = [f for f in sorted(families) if f not in used]
+            if unused:
+                # Lightest unused family that fits the slot, against what repeating would add
+                candidate = min(
+                    unused,
+                    key=lambda f: pick_variant(families[f], slot['width'], slot['height'], 1)['bytes']
+                )
+                extra = (pick_variant(families[candidate], slot['width'], slot['height'], 1)['bytes']
+                         - added_bytes(pick_variant(families[family], slot['width'], slot['height'], 1, loaded)))
+                duplicate = family in sections.get(slot['slot'], set())
+                if extra <= SUBSTITUTE_MAX_BYTES or (duplicate and extra <= slack):
+                    family = candidate
+                    substituted = True
+        used.add(family)
+        sections.setdefault(slot['slot'], set()).add(family)
+
+        variant_1x = pick_variant(families[family], slot['width'], slot['height'], 1, loaded)
+        variant_2x = pick_variant(families[family], slot['width'], slot['height'], 2, loaded)
+        slack -= added_bytes(variant_1x)
+        loaded.add(variant_1x['src'])
+        assignment = {
+            'slot': slot['slot'],
+            'src': variant_1x['src'],
+            'src_2x': variant_2x['src'],
+            'current': slot['current'],
+            'width': round(slot['width']),
+            'height': round(slot['height']) if slot['height'] else None,
+            'bytes': variant_1x['bytes'],
+            'bytes_2x': variant_2x['bytes']
+        }
+        if substituted and index is not None:
+            alts = index.alt_texts(family)
+            if alts:
+                assignment['alt_hint'] = alts[0]
+        assignments.append(assignment)
+
+    return assignments
+
+
+def page_byte_totals(assignments, image_dir=IMAGE_DIR):
+    """Unique bytes per page before and after; repeated URLs load once"""
+    def total(srcs):
+        return sum(
+            os.path.getsize(os.path.join(image_dir, os.path.basename(src)))
+            for src in set(srcs)
+            if os.path.exists(os.path.join(image_dir, os.path.basename(src)))
+        )
+
+    current = total(a['current'] for a in assignments)
+    optimized = total(a['src'] for a in assignments)
+    optimized_2x = total(a['src_2x'] for a in assignments)
+    return {
+        'current': current,
+        'optimized': optimized,
+        'optimized_2x': optimized_2x,
+        'saved': current - optimized
+    }
+
+
+def list_pages(root='.'):
+    """Full HTML pages (partials without an <html> element are skipped)"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(root, '*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            if '<html' in f.read(2048).lower():
+                pages.append(path)
+    return pages
+
+
+def solve_placements(viewport=VIEWPORT, output_file=OUTPUT_FILE, image_dir=IMAGE_DIR):
+    """Build image_placement_map.json from slot geometry and available variants"""
+    with open(STYLESHEET, 'r', encoding='utf-8') as f:
+        geometry_css = f.read()
+
+    families = discover_variants(image_dir)
+    index = ImageIndex(INDEX_FILE) if os.path.exists(INDEX_FILE) else None
+    placement_map = {}
+
+    for path in list_pages():
+        page = os.path.basename(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+
+        geometry = SlotGeometry(geometry_css, viewport)
+        assignments = solve_page(find_slots(html, geometry, families), families, index, image_dir)
+
+        slots = {}
+        for assignment in assignments:
+            name = assignment.pop('slot')
+            if name == 'hero_background':
+                slots[name] = assignment
+            else:
+                slots.setdefault(name, []).append(assignment)
+
+        placement_map[page] = {
+            'slots': slots,
+            'bytes': page_byte_totals(assignments, image_dir)
+        }
+
+    if output_file:
+        with open(output_file, 'w') as f:
+            json.dump(placement_map, f, indent=2)
+        print(f"📁 Saved as: {output_file}")
+
+    print(f"✅ Image placement map created for {len(placement_map)} pages")
+    for page, entry in placement_map.items():
+        totals = entry['bytes']
+        print(f"   {page}: {totals['current'] // 1024} KB -> {totals['optimized'] // 1024} KB "
+              f"(2x: {totals['optimized_2x'] // 1024} KB)")
+
+    return placement_map
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Solve image placements from slot sizes')
+    parser.add_argument('--viewport', default=f"{VIEWPORT[0]}x{VIEWPORT[1]}",
+                        help='Reference viewport as WIDTHxHEIGHT')
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.viewport.lower().split('x'))
+    solve_placements((width, height), args.output)
+
+
+if __name__ == "__main__":
+    main()
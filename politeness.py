@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Politeness Scheduler for Amrit Sagar Crawlers
+Per-host robots.txt rules (allow/disallow, Crawl-delay, Request-rate) enforced with token buckets
+"""
+
+import threading
+import time
+from urllib import robotparser
+from urllib.parse import urlparse
+
+# Pace for origins whose robots.txt sets no Crawl-delay or Request-rate
+DEFAULT_RATE = 4.0
+DEFAULT_BURST = 4
+
+
+class DisallowedByRobots(Exception):
+    """Raised when robots.txt does not allow fetching a URL"""
+
+
+def parse_request_rate(value):
+    """Requests per second from a Request-rate value such as 1/5, 1/10s or 30/1m"""
+    requests_part, _, period = value.partition('/')
+    period = period.strip().lower()
+    unit = 1
+    for suffix, seconds in (('s', 1), ('m', 60), ('h', 3600)):
+        if period.endswith(suffix):
+            period, unit = period[:-1], seconds
+            break
+    return float(requests_part) / (float(period) * unit)
+
+
+def parse_rate_limits(lines, user_agent):
+    """Crawl-delay (seconds) and Request-rate (req/s) for a user agent
+
+    Handles fractional delays and unit suffixes that robotparser ignores.
+    A group naming this crawler replaces the wildcard group entirely, even one
+    with only Allow/Disallow lines, which leaves (None, None).
+    """
+    agent = user_agent.split('/')[0].lower()
+    groups = {}
+    group = []
+    in_rules = False
+
+    for line in lines:
+        line = line.split('#', 1)[0].strip()
+        if ':' not in line:
+            continue
+        field, value = (part.strip() for part in line.split(':', 1))
+        field = field.lower()
+        if field == 'user-agent':
+            if in_rules:
+                group = []
+                in_rules = False
+            group.append(value.lower())
+            groups.setdefault(value.lower(), {})
+            continue
+        in_rules = True
+        try:
+            if field == 'crawl-delay':
+                limit = ('delay', float(value))
+            elif field == 'request-rate':
+                limit = ('rate', parse_request_rate(value))
+            else:
+                continue
+        except (ValueError, ZeroDivisionError):
+            continue
+        for name in group:
+            groups.setdefault(name, {})[limit[0]] = limit[1]
+
+    for name, limits in groups.items():
+        if name != '*' and name in agent:
+            return limits.get('delay'), limits.get('rate')
+    limits = groups.get('*', {})
+    return limits.get('delay'), limits.get('rate')
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class PolitenessScheduler:
+    """Drop-in for session.get that paces every request by its host's rules
+
+    State is kept per host, so http:// and https:// URLs of one site share one
+    token bucket; robots.txt is read from the scheme of the first URL seen.
+    """
+
+    def __init__(self, session, user_agent=None, default_rate=DEFAULT_RATE, default_burst=DEFAULT_BURST):
+        self.session = session
+        self.user_agent = user_agent or session.headers.get('User-Agent', '*')
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.origins = {}
+        # Guards self.origins only; each host's robots.txt loads under its own lock
+        self.lock = threading.Lock()
+
+    def _load_robots(self, origin):
+        parser = robotparser.RobotFileParser(origin + '/robots.txt')
+        try:
+            response = self.session.get(origin + '/robots.txt', timeout=10)
+            if response.status_code >= 500:
+                # Unreachable robots.txt means a full disallow until it recovers
+                parser.disallow_all = True
+            elif response.status_code >= 400:
+                parser.allow_all = True
+            else:
+                lines = response.text.splitlines()
+                parser.parse(lines)
+                parser.rate_limits = parse_rate_limits(lines, self.user_agent)
+        except Exception as e:
+            print(f"⚠️ robots.txt unreachable for {origin}: {e}")
+            parser.disallow_all = True
+        return parser
+
+    def _bucket_for(self, parser):
+        delay, request_rate = getattr(parser, 'rate_limits', (None, None))
+        rates = []
+        if delay:
+            rates.append(1.0 / delay)
+        if request_rate:
+            rates.append(request_rate)
+
+        if rates:
+            # Restricted origins get no burst beyond a single request
+            return TokenBucket(min(rates), 1)
+        return TokenBucket(self.default_rate, self.default_burst)
+
+    def origin_state(self, url):
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        with self.lock:
+            state = self.origins.setdefault(parsed.netloc.lower(), {'lock': threading.Lock()})
+        # A slow robots.txt only holds up requests to its own host
+        with state['lock']:
+            if 'robots' not in state:
+                parser = self._load_robots(origin)
+                state['bucket'] = self._bucket_for(parser)
+                state['robots'] = parser
+                print(f"🤖 {origin}: {state['bucket'].rate:.2f} req/s, burst {state['bucket'].capacity}")
+        return state
+
+    def allowed(self, url):
+        return self.origin_state(url)['robots'].can_fetch(self.user_agent, url)
+
+    def wait(self, url):
+        """Block until the host's token bucket allows url; refuses robots-disallowed URLs"""
+        state = self.origin_state(url)
+        if not state['robots'].can_fetch(self.user_agent, url):
+            raise DisallowedByRobots(f"robots.txt disallows {url}")
+        state['bucket'].acquire()
+
+    def get(self, url, **kwargs):
+        """Fetch through the host's token bucket with this scheduler's session"""
+        self.wait(url)
+        return self.session.get(url, **kwargs)
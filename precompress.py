@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Precompressed Static Assets for Amrit Sagar Pages
+Writes max-quality .br and .gz siblings for every text asset in the build so the server or CDN
+can send precompressed bytes instead of compressing on each request
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from build_site import OUTPUT_DIR
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Compressed results keyed by content hash, so unchanged files are never recompressed across builds
+CACHE_DIR = os.path.join('build', 'compress_cache')
+
+TEXT_EXTENSIONS = ('.html', '.css', '.js', '.json', '.svg', '.xml', '.txt', '.map', '.webmanifest', '.ico')
+
+# A sibling is only worth serving if it is meaningfully smaller than the original
+MIN_SIZE = 256
+MIN_SAVING = 0.05
+
+SKIP_MARKER = b''
+
+
+def encodings():
+    """(extension, compress function) for each codec available here"""
+    codecs = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli:
+        codecs.insert(0, ('.br', lambda data: brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)))
+    return codecs
+
+
+def find_assets(directory):
+    assets = []
+    for dirpath, _, filenames in os.walk(directory):
+        for name in sorted(filenames):
+            if name.lower().endswith(TEXT_EXTENSIONS):
+                assets.append(os.path.join(dirpath, name))
+    return sorted(assets)
+
+
+def cache_path(cache_dir, digest, ext):
+    return os.path.join(cache_dir, digest[:2], digest + ext)
+
+
+def same_content(path, data):
+    if os.path.getsize(path) != len(data):
+        return False
+    with open(path, 'rb') as f:
+        return f.read() == data
+
+
+def compress_file(path, cache_dir=CACHE_DIR):
+    """Worker job: write (or remove) each compressed sibling of one file; returns its sizes"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    result = {'file': path, 'bytes': len(data), 'written': {}, 'cached': 0}
+
+    for ext, compress in encodings():
+        cached = cache_path(cache_dir, digest, ext)
+        if os.path.exists(cached):
+            with open(cached, 'rb') as f:
+                compressed = f.read()
+            result['cached'] += 1
+        else:
+            compressed = compress(data)
+            if len(data) < MIN_SIZE or len(compressed) > len(data) * (1 - MIN_SAVING):
+                compressed = SKIP_MARKER
+            os.makedirs(os.path.dirname(cached), exist_ok=True)
+            temp_path = cached + f'.{os.getpid()}.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(temp_path, cached)
+
+        sibling = path + ext
+        if compressed == SKIP_MARKER:
+            if os.path.exists(sibling):
+                os.remove(sibling)
+            continue
+        if not os.path.exists(sibling) or not same_content(sibling, compressed):
+            shutil.copyfile(cached, sibling)
+        result['written'][ext] = len(compressed)
+
+    return result
+
+
+def precompress(directory=OUTPUT_DIR, cache_dir=CACHE_DIR, workers=None):
+    """Compress every text asset under directory in a process pool"""
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(compress_file, path, cache_dir): path for path in find_assets(directory)}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"❌ Error compressing {futures[future]}: {e}")
+    return sorted(results, key=lambda r: r['file'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write .br and .gz siblings for the built text assets')
+    parser.add_argument('directory', nargs='?', default=OUTPUT_DIR)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print("🗜️ Precompressing Static Assets")
+    print("=" * 60)
+    if not brotli:
+        print("⚠️ brotli is not installed; writing .gz only (pip install brotli)")
+
+    results = precompress(args.directory, args.cache_dir, args.workers)
+
+    original = sum(r['bytes'] for r in results)
+    for ext, _ in encodings():
+        compressed = [r for r in results if ext in r['written']]
+        before = sum(r['bytes'] for r in compressed)
+        after = sum(r['written'][ext] for r in compressed)
+        saved = f" (-{1 - after / before:.1%})" if before else ''
+        print(f"   📦 {ext}: {len(compressed)} files, {before} -> {after} bytes{saved}")
+
+    skipped = sum(not r['written'] for r in results)
+    cached = sum(r['cached'] for r in results)
+    print(f"\n📊 {len(results)} text assets ({original} bytes), {skipped} not worth compressing, {cached} results from cache")
+
+
+if __name__ == "__main__":
+    main()
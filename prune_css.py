@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Unused CSS Pruning for Amrit Sagar Pages
+Drops styles.css rules whose selectors can never match the page set (HTML plus the classes
+the page scripts add at runtime) and writes minified stylesheets, site-wide or per page
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+
+from bs4 import BeautifulSoup
+
+from placement_solver import STYLESHEET, list_pages
+
+BUILD_DIR = os.path.join('build', 'css')
+REPORT_FILE = 'css_prune_report.json'
+
+# Classes that only exist at runtime and can't be seen in a string literal (set from
+# variables, data attributes or third-party code). A trailing * keeps a whole prefix.
+RUNTIME_ALLOWLIST = (
+    'active',
+    'animated',
+    'loaded',
+    'scrolled',
+    'notification-*',
+)
+
+# At-rules whose contents are rules to prune; any other block at-rule is kept whole
+GROUPING_AT_RULES = ('@media', '@supports', '@layer', '@container')
+
+# Pseudo-classes taking a selector argument; what they match is not a requirement
+SELECTOR_PSEUDO_ARGS = re.compile(r':(?:not|is|where|has|matches|nth-[\w-]+|lang|dir)\([^()]*\)')
+PSEUDO = re.compile(r'::?[\w-]+')
+ATTRIBUTE = re.compile(r'\[\s*([\w-]+)[^\]]*\]')
+COMBINATORS = re.compile(r'\s*[>+~]\s*|\s+')
+COMPOUND_TOKEN = re.compile(r'([#.]?)(-?[_a-zA-Z][\w-]*|\*)')
+
+# String literals and comments in JS; comments are matched so their text is skipped
+JS_TOKEN = re.compile(
+    r'//[^\n]*|/\*.*?\*/|\'(?:\\.|[^\'\\\n])*\'|"(?:\\.|[^"\\\n])*"|`(?:\\.|[^`\\])*`',
+    re.S
+)
+JS_NAME = re.compile(r'-?[_a-zA-Z][\w-]*')
+# `notification-${type}`: every class with this prefix may appear
+TEMPLATE_PREFIX = re.compile(r'(-?[_a-zA-Z][\w-]*-)\$\{')
+
+ANIMATION_PROPERTY = re.compile(r'(?:^|;)\s*animation(?:-name)?\s*:([^;]*)', re.I)
+
+
+def parse_css(css):
+    """Parse a stylesheet into nodes, nesting the rules of @media and friends
+
+    Nodes are dicts: {'type': 'rule', 'selectors', 'body'}, {'type': 'group',
+    'prelude', 'rules'} for grouping at-rules, {'type': 'at', 'prelude', 'body'}
+    for other block at-rules (@keyframes, @font-face) and {'type': 'statement',
+    'text'} for @import/@charset.
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    nodes, _ = _parse_block(css, 0)
+    return nodes
+
+
+def _matching_brace(css, start):
+    """Index of the } closing the { at start, skipping strings"""
+    depth = 0
+    i = start
+    while i < len(css):
+        ch = css[i]
+        if ch in '"\'':
+            i = css.find(ch, i + 1)
+            if i == -1:
+                return len(css)
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return len(css)
+
+
+def _parse_block(css, position):
+    nodes = []
+    while position < len(css):
+        brace = css.find('{', position)
+        close = css.find('}', position)
+        semicolon = css.find(';', position)
+
+        if close != -1 and (brace == -1 or close < brace):
+            return nodes, close + 1
+        if brace == -1:
+            break
+
+        prelude = css[position:brace].strip()
+        if prelude.startswith('@') and semicolon != -1 and semicolon < brace:
+            nodes.append({'type': 'statement', 'text': ' '.join(css[position:semicolon + 1].split())})
+            position = semicolon + 1
+            continue
+
+        if prelude.lower().startswith(GROUPING_AT_RULES):
+            rules, position = _parse_block(css, brace + 1)
+            nodes.append({'type': 'group', 'prelude': ' '.join(prelude.split()), 'rules': rules})
+            continue
+
+        end = _matching_brace(css, brace)
+        body = css[brace + 1:end]
+        if prelude.startswith('@'):
+            nodes.append({'type': 'at', 'prelude': ' '.join(prelude.split()), 'body': body})
+        else:
+            selectors = [' '.join(s.split()) for s in prelude.split(',') if s.strip()]
+            nodes.append({'type': 'rule', 'selectors': selectors, 'body': body})
+        position = end + 1
+
+    return nodes, len(css)
+
+
+def selector_requirements(selector):
+    """Compounds of a selector as (tag, classes, ids, attributes) it needs to exist
+
+    Pseudo-classes and pseudo-elements are dropped, so a selector is kept
+    whenever the elements it names appear somewhere, whatever their state.
+    """
+    previous = None
+    while previous != selector:
+        previous, selector = selector, SELECTOR_PSEUDO_ARGS.sub('', selector)
+    selector = PSEUDO.sub('', selector)
+
+    compounds = []
+    for compound in COMBINATORS.split(selector.strip()):
+        if not compound:
+            continue
+        attributes = set(ATTRIBUTE.findall(compound))
+        compound = ATTRIBUTE.sub('', compound)
+        tag, classes, ids = None, set(), set()
+        for prefix, name in COMPOUND_TOKEN.findall(compound):
+            if prefix == '.':
+                classes.add(name)
+            elif prefix == '#':
+                ids.add(name)
+            elif name != '*':
+                tag = name.lower()
+        compounds.append((tag, classes, ids, attributes))
+    return compounds
+
+
+def new_usage():
+    return {'tags': set(), 'classes': set(), 'ids': set(), 'attributes': set(), 'names': set(), 'prefixes': set()}
+
+
+def collect_html_usage(html, usage):
+    soup = BeautifulSoup(html, 'html.parser')
+    for element in soup.find_all(True):
+        usage['tags'].add(element.name)
+        usage['classes'].update(element.get('class', []))
+        if element.get('id'):
+            usage['ids'].add(element['id'])
+        usage['attributes'].update(element.attrs)
+    for script in soup.find_all('script', src=False):
+        collect_script_usage(script.get_text(), usage)
+    return soup
+
+
+def collect_script_usage(js, usage):
+    """Every identifier-like word in a string literal may be a class, id or tag added at runtime"""
+    for match in JS_TOKEN.finditer(js):
+        token = match.group(0)
+        if token.startswith('/'):
+            continue
+        usage['names'].update(JS_NAME.findall(token))
+        usage['prefixes'].update(TEMPLATE_PREFIX.findall(token))
+
+
+def apply_allowlist(usage, allowlist):
+    for entry in allowlist:
+        if entry.endswith('*'):
+            usage['prefixes'].add(entry[:-1])
+        else:
+            usage['names'].add(entry)
+
+
+def page_scripts(soup, root='.'):
+    """Local script files a page loads"""
+    scripts = []
+    for script in soup.find_all('script', src=True):
+        src = script['src']
+        if not src.startswith(('http://', 'https://', '//')):
+            scripts.append(os.path.join(root, src))
+    return scripts
+
+
+def page_usage(page, allowlist=RUNTIME_ALLOWLIST, root='.', script_cache=None):
+    """Everything one page and the scripts it loads can put in the DOM"""
+    script_cache = script_cache if script_cache is not None else {}
+    usage = new_usage()
+    with open(page, 'r', encoding='utf-8') as f:
+        soup = collect_html_usage(f.read(), usage)
+
+    for path in page_scripts(soup, root):
+        if path not in script_cache:
+            script_usage = new_usage()
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    collect_script_usage(f.read(), script_usage)
+            script_cache[path] = script_usage
+        usage['names'] |= script_cache[path]['names']
+        usage['prefixes'] |= script_cache[path]['prefixes']
+
+    apply_allowlist(usage, allowlist)
+    return usage
+
+
+def merge_usage(usages):
+    merged = new_usage()
+    for usage in usages:
+        for key in merged:
+            merged[key] |= usage[key]
+    return merged
+
+
+def _present(name, seen, usage):
+    return name in seen or name in usage['names'] or name.startswith(tuple(usage['prefixes']))
+
+
+def selector_can_match(selector, usage):
+    for tag, classes, ids, attributes in selector_requirements(selector):
+        if tag and not _present(tag, usage['tags'], usage):
+            return False
+        if not all(_present(name, usage['classes'], usage) for name in classes):
+            return False
+        if not all(_present(name, usage['ids'], usage) for name in ids):
+            return False
+        if not all(_present(name, usage['attributes'], usage) for name in attributes):
+            return False
+    return True
+
+
+def animation_names(body):
+    names = set()
+    for value in ANIMATION_PROPERTY.findall(body):
+        names.update(JS_NAME.findall(value))
+    return names
+
+
+def filter_nodes(nodes, keep):
+    """Nodes with the selectors keep() rejects removed; returns (nodes, animation names still used)"""
+    kept = []
+    animations = set()
+    for node in nodes:
+        if node['type'] == 'rule':
+            selectors = [s for s in node['selectors'] if keep(s)]
+            if selectors:
+                kept.append({**node, 'selectors': selectors})
+                animations |= animation_names(node['body'])
+        elif node['type'] == 'group':
+            rules, used = filter_nodes(node['rules'], keep)
+            if rules:
+                kept.append({**node, 'rules': rules})
+                animations |= used
+        else:
+            kept.append(node)
+    return kept, animations
+
+
+def drop_unused_keyframes(nodes, animations):
+    kept = []
+    for node in nodes:
+        if node['type'] == 'at' and node['prelude'].lower().startswith(('@keyframes', '@-webkit-keyframes')):
+            if node['prelude'].split()[-1] not in animations:
+                continue
+        elif node['type'] == 'group':
+            node = {**node, 'rules': drop_unused_keyframes(node['rules'], animations)}
+        kept.append(node)
+    return kept
+
+
+def prune(nodes, usage):
+    nodes, animations = filter_nodes(nodes, lambda selector: selector_can_match(selector, usage))
+    # Scripts may start animations by name through element.style
+    return drop_unused_keyframes(nodes, animations | usage['names'])
+
+
+def _minify_outside_strings(text, pattern):
+    parts = re.split(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')', text)
+    for i in range(0, len(parts), 2):
+        parts[i] = pattern.sub(r'\1', re.sub(r'\s+', ' ', parts[i]))
+    return ''.join(parts).strip()
+
+
+def minify_body(body):
+    body = _minify_outside_strings(body, re.compile(r'\s*([{};:,])\s*'))
+    return body.rstrip(';').replace(';}', '}')
+
+
+def minify_selector(selector):
+    return _minify_outside_strings(selector, re.compile(r'\s*([>+~,])\s*'))
+
+
+def serialize(nodes):
+    """Minified CSS text for a node list"""
+    out = []
+    for node in nodes:
+        if node['type'] == 'rule':
+            out.append(','.join(minify_selector(s) for s in node['selectors']) + '{' + minify_body(node['body']) + '}')
+        elif node['type'] == 'group':
+            out.append(node['prelude'] + '{' + serialize(node['rules']) + '}')
+        elif node['type'] == 'at':
+            out.append(node['prelude'] + '{' + minify_body(node['body']) + '}')
+        else:
+            out.append(node['text'])
+    return ''.join(out)
+
+
+def count_rules(nodes):
+    return sum(count_rules(node['rules']) if node['type'] == 'group' else 1 for node in nodes)
+
+
+def size_entry(css, nodes):
+    data = css.encode('utf-8')
+    return {
+        'rules': count_rules(nodes),
+        'bytes': len(data),
+        'gzip_bytes': len(gzip.compress(data, compresslevel=9, mtime=0))
+    }
+
+
+def write_css(path, css):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(css)
+
+
+def prune_site(stylesheet=STYLESHEET, root='.', output_dir=BUILD_DIR, per_page=False, allowlist=RUNTIME_ALLOWLIST):
+    """Write the pruned site-wide stylesheet (and per-page ones); returns the size report"""
+    with open(os.path.join(root, stylesheet), 'r', encoding='utf-8') as f:
+        source = f.read()
+    nodes = parse_css(source)
+
+    script_cache = {}
+    usages = {
+        os.path.basename(page): page_usage(page, allowlist, root, script_cache)
+        for page in list_pages(root)
+    }
+
+    name = os.path.splitext(os.path.basename(stylesheet))[0]
+    site_nodes = prune(nodes, merge_usage(usages.values()))
+    site_css = serialize(site_nodes)
+    site_path = os.path.join(output_dir, f"{name}.min.css")
+    write_css(site_path, site_css)
+
+    report = {
+        'stylesheet': stylesheet,
+        'allowlist': list(allowlist),
+        'original': size_entry(source, nodes),
+        'minified': size_entry(serialize(nodes), nodes),
+        'site': {'file': site_path, **size_entry(site_css, site_nodes)},
+        'pages': {}
+    }
+
+    if per_page:
+        for page, usage in usages.items():
+            page_nodes = prune(nodes, usage)
+            page_css = serialize(page_nodes)
+            page_path = os.path.join(output_dir, f"{os.path.splitext(page)[0]}.min.css")
+            write_css(page_path, page_css)
+            report['pages'][page] = {'file': page_path, **size_entry(page_css, page_nodes)}
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prune unused rules from styles.css')
+    parser.add_argument('--stylesheet', default=STYLESHEET)
+    parser.add_argument('--root', default='.')
+    parser.add_argument('--output-dir', default=BUILD_DIR)
+    parser.add_argument('--per-page', action='store_true', help='Also write one stylesheet per page')
+    parser.add_argument('--allow', action='append', default=[], help='Extra runtime class to keep (prefix-* for a prefix)')
+    parser.add_argument('--report', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    print("✂️ Pruning Unused CSS")
+    print("=" * 60)
+
+    report = prune_site(
+        args.stylesheet, args.root, args.output_dir, args.per_page,
+        RUNTIME_ALLOWLIST + tuple(args.allow)
+    )
+
+    original = report['original']
+    print(f"📄 {args.stylesheet}: {original['rules']} rules, {original['bytes']} bytes ({original['gzip_bytes']} gzipped)")
+    print(f"   Minified only: {report['minified']['bytes']} bytes")
+    site = report['site']
+    print(f"✅ {site['file']}: {site['rules']} rules, {site['bytes']} bytes ({site['gzip_bytes']} gzipped, "
+          f"-{1 - site['bytes'] / original['bytes']:.1%})")
+    for page, entry in report['pages'].items():
+        print(f"   📄 {page}: {entry['rules']} rules, {entry['bytes']} bytes "
+              f"(-{1 - entry['bytes'] / original['bytes']:.1%})")
+
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"📋 Report saved to: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
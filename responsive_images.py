@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Responsive Images for Amrit Sagar Pages
+Wraps each page image in <picture> with AVIF/WebP sources and a srcset/sizes ladder sized to its
+CSS slot, and gives hero backgrounds an image-set() of the same formats, keeping the original
+JPEG as the fallback everywhere
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bs4 import BeautifulSoup
+from PIL import Image, ImageOps, features
+
+from derive_renditions import JPEG_QUALITY
+from loading_hints import line_offsets, set_attribute
+from placement_solver import (
+    ASPECT_TOLERANCE, IMAGE_DIR, STYLESHEET, URL_PATTERN, VIEWPORT, SlotGeometry, discover_variants, family_of,
+    list_pages, read_image_size
+)
+from streaming_html import function_end, split_top_level
+
+RESPONSIVE_DIR = IMAGE_DIR + '/responsive'
+
+# Content hash of each source with the ladder encoded from it, so a touched but unchanged
+# source keeps its variants and an edited one is re-encoded
+LADDER_MANIFEST = 'responsive_ladders.json'
+
+# Widths generated up to the first one covering the widest slot at MAX_DPR
+LADDER_WIDTHS = (320, 640, 960, 1280, 1600, 1920)
+MAX_DPR = 2
+
+# Modern formats in order of preference: (extension, MIME type, Pillow feature, quality)
+MODERN_FORMATS = (
+    ('avif', 'image/avif', 'avif', 50),
+    ('webp', 'image/webp', 'webp', 75),
+)
+JPEG_TYPE = 'image/jpeg'
+
+# Matches the stylesheet's @media (max-width: 768px) single-column layouts
+MOBILE_BREAKPOINT = 768
+
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg')
+LADDER_NAME = re.compile(r'(?P<stem>.+)-(?P<width>\d+)w\.(?P<ext>\w+)')
+
+PICTURE_MARKER = 'data-responsive'
+PICTURE_BLOCK = re.compile(r'<picture ' + PICTURE_MARKER + r'>(?:<source [^>]*>)*(<img\b[^>]*>)</picture>')
+OWNED_ATTRIBUTES = re.compile(r'\s(?:srcset|sizes)="[^"]*"')
+IMAGE_FUNCTIONS = re.compile(r'(?:url|image-set|-webkit-image-set|(?:repeating-)?(?:linear|radial|conic)-gradient)\(')
+HERO_SELECTOR = re.compile(r'\.hero(?![\w-])')
+
+
+def modern_formats():
+    return [fmt for fmt in MODERN_FORMATS if features.check(fmt[2])]
+
+
+def is_source(url):
+    return bool(url) and url.lower().endswith(SOURCE_EXTENSIONS) and not url.startswith(('http', '//', 'data:'))
+
+
+def ladder_path(source, width, ext):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return f"{RESPONSIVE_DIR}/{stem}-{width}w.{ext}"
+
+
+def ladder_widths(original_width, needed_width):
+    """Ladder steps below the original, stopping at the first that covers needed_width"""
+    widths = []
+    for width in LADDER_WIDTHS:
+        if width >= original_width:
+            break
+        widths.append(width)
+        if width >= needed_width:
+            break
+    return widths
+
+
+def source_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def load_manifest(path=LADDER_MANIFEST):
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return {}
+
+
+def save_manifest(manifest, path=LADDER_MANIFEST):
+    with open(path, 'w') as f:
+        json.dump(dict(sorted(manifest.items())), f, indent=2)
+
+
+def is_current(manifest, source, path, digest=None):
+    """True when path was encoded from the source content recorded in the manifest"""
+    entry = manifest.get(source)
+    if not entry or path not in entry['variants'] or not os.path.exists(path):
+        return False
+    return entry['sha1'] == (digest or source_digest(source))
+
+
+def encode_variant(source, width, path, ext, quality):
+    """Worker job: one resized copy of source in one format"""
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img).convert('RGB')
+        height = round(img.height * width / img.width)
+        resized = img.resize((width, height), Image.LANCZOS)
+    if ext == 'jpg':
+        resized.save(path, 'JPEG', quality=quality, optimize=True, progressive=True)
+    else:
+        resized.save(path, ext.upper(), quality=quality)
+    return path
+
+
+def generate_variants(needs, manifest, workers=None):
+    """Encode the ladder for each {source: widest slot px} entry; returns the files written
+
+    manifest is updated with each source's hash and the variants encoded from it.
+    """
+    jobs = []
+    digests = {}
+    for source, needed in sorted(needs.items()):
+        size = read_image_size(source)
+        if not size:
+            continue
+        digests[source] = source_digest(source)
+        entry = manifest.get(source)
+        if not entry or entry['sha1'] != digests[source]:
+            manifest[source] = {'sha1': digests[source], 'variants': []}
+        formats = [(ext, quality) for ext, _, _, quality in modern_formats()] + [('jpg', JPEG_QUALITY)]
+        # The original itself is the widest JPEG, so modern formats also get an original-width copy
+        widths = ladder_widths(size[0], needed * MAX_DPR)
+        for ext, quality in formats:
+            for width in widths + ([size[0]] if ext != 'jpg' else []):
+                path = ladder_path(source, width, ext)
+                if not is_current(manifest, source, path, digests[source]):
+                    jobs.append((source, width, path, ext, quality))
+
+    if not jobs:
+        return []
+    os.makedirs(RESPONSIVE_DIR, exist_ok=True)
+    written = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(encode_variant, *job): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                written.append(future.result())
+            except Exception as e:
+                print(f"❌ Error encoding {futures[future][2]}: {e}")
+                continue
+            variants = manifest[futures[future][0]]['variants']
+            if written[-1] not in variants:
+                variants.append(written[-1])
+                variants.sort()
+    return sorted(written)
+
+
+def background_layers(value):
+    """The image of each layer of a background value (color, position and size dropped)"""
+    layers = []
+    for _, layer in split_top_level(value, ','):
+        match = IMAGE_FUNCTIONS.search(layer)
+        if match:
+            layers.append(layer[match.start():function_end(layer, match.start())])
+    return layers
+
+
+class ResponsiveImages:
+    """Finds each image's ladder on disk and rewrites markup and CSS to use it"""
+
+    def __init__(self, formats=None):
+        self.formats = modern_formats() if formats is None else formats
+        self.families = discover_variants(IMAGE_DIR)
+        self.needs = {}
+        self.manifest = load_manifest()
+        self.digests = {}
+
+    def need(self, source, width):
+        if width:
+            self.needs[source] = max(self.needs.get(source, 0), round(width))
+
+    def candidates(self, source):
+        """{MIME type: [(width, path), ...]} of the variants available for source, narrowest first"""
+        size = read_image_size(source) if os.path.exists(source) else None
+        if not size:
+            return {}
+        stem = os.path.splitext(os.path.basename(source))[0]
+        found = {}
+        mimes = {'jpg': JPEG_TYPE, **{ext: mime for ext, mime, _, _ in self.formats}}
+        for path in glob.glob(f"{RESPONSIVE_DIR}/{glob.escape(stem)}-*w.*"):
+            match = LADDER_NAME.fullmatch(os.path.basename(path))
+            mime = mimes.get(match.group('ext')) if match and match.group('stem') == stem else None
+            if mime and self.is_current(source, path.replace(os.sep, '/')):
+                found.setdefault(mime, {})[int(match.group('width'))] = path.replace(os.sep, '/')
+
+        # Uncropped renditions of the same family are JPEG steps too
+        aspect = size[0] / size[1]
+        for variant in self.families.get(family_of(source, self.families) or '', []):
+            if abs(variant['width'] / variant['height'] - aspect) / aspect <= ASPECT_TOLERANCE:
+                found.setdefault(JPEG_TYPE, {}).setdefault(variant['width'], variant['src'])
+        found.setdefault(JPEG_TYPE, {})[size[0]] = source
+
+        # A step that came out no smaller than what it stands in for saves nothing: a narrower JPEG
+        # than the original, or a modern encode than the JPEG at its width
+        jpegs = found[JPEG_TYPE]
+        for mime, widths in found.items():
+            for width, path in list(widths.items()):
+                baseline = source if mime == JPEG_TYPE else jpegs.get(width)
+                if baseline and path != baseline and os.path.getsize(path) >= os.path.getsize(baseline):
+                    del widths[width]
+        found = {mime: widths for mime, widths in found.items() if widths}
+
+        if len(found[JPEG_TYPE]) == 1 and len(found) == 1:
+            return {}
+        return {mime: sorted(widths.items()) for mime, widths in found.items()}
+
+    def is_current(self, source, path):
+        if source not in self.digests:
+            self.digests[source] = source_digest(source)
+        return is_current(self.manifest, source, path, self.digests[source])
+
+    def srcset(self, steps):
+        return ', '.join(f"{path} {width}w" for width, path in steps)
+
+    def sizes(self, slot_width):
+        if slot_width >= VIEWPORT[0]:
+            return '100vw'
+        return f"(max-width: {MOBILE_BREAKPOINT}px) 100vw, {round(slot_width)}px"
+
+    def picture(self, img_tag, source, slot_width):
+        """<picture> markup for one <img>, or None when source has no ladder yet"""
+        candidates = self.candidates(source)
+        if not candidates:
+            return None
+        sizes = self.sizes(slot_width)
+        sources = ''.join(
+            f'<source type="{mime}" srcset="{self.srcset(candidates[mime])}" sizes="{sizes}">'
+            for _, mime, _, _ in self.formats if mime in candidates
+        )
+        img_tag = set_attribute(img_tag, 'srcset', self.srcset(candidates[JPEG_TYPE]))
+        img_tag = set_attribute(img_tag, 'sizes', sizes)
+        return f'<picture {PICTURE_MARKER}>{sources}{img_tag}</picture>'
+
+    def resolution_steps(self, steps, slot_width):
+        """1x and 2x picks from a ladder for a fixed-width slot"""
+        picks = []
+        for dpr in (1, MAX_DPR):
+            covering = [(w, p) for w, p in steps if w >= slot_width * dpr]
+            pick = covering[0] if covering else steps[-1]
+            if not picks or pick[0] > picks[-1][1][0]:
+                picks.append((dpr, pick))
+        return picks
+
+    def image_set(self, source, slot_width):
+        """image-set() with every format at 1x and 2x, or None when source has no ladder yet"""
+        candidates = self.candidates(source)
+        if not candidates:
+            return None
+        options = []
+        for mime in [mime for _, mime, _, _ in self.formats if mime in candidates] + [JPEG_TYPE]:
+            for dpr, (_, path) in self.resolution_steps(candidates.get(mime, []), slot_width):
+                options.append(f"url('{path}') type('{mime}') {dpr}x")
+        return f"image-set({', '.join(options)})"
+
+    def with_image_set(self, declarations, slot_width):
+        """Declarations with a background-image image-set() added after the background that loads a JPEG
+
+        The original declaration stays first so browsers without image-set() type() support keep it.
+        Returns (declarations, source) where source is the JPEG found, or None.
+        """
+        parts = split_top_level(declarations, ';')
+        kept = [(start, part) for start, part in parts
+                if not (part.strip().startswith('background-image:') and 'image-set(' in part and 'type(' in part)]
+        for index, (_, part) in enumerate(kept):
+            prop, _, value = part.partition(':')
+            if prop.strip().lower() not in ('background', 'background-image'):
+                continue
+            sources = [url for url in URL_PATTERN.findall(value) if is_source(url)]
+            if not sources:
+                continue
+            source = sources[0]
+            self.need(source, slot_width)
+            image_set = self.image_set(source, slot_width)
+            texts = [p for _, p in kept]
+            if image_set:
+                layers = [image_set if source in layer and layer.startswith(('url(', 'image-set(')) else layer
+                          for layer in background_layers(value)]
+                indent = re.match(r'\s*', part).group(0) or ' '
+                texts.insert(index + 1, f"{indent}background-image: {', '.join(layers)}")
+            return ';'.join(texts), source
+        return ';'.join(p for _, p in kept), None
+
+    def rewrite_page(self, html, geometry):
+        """The page with every JPEG <img> in a <picture> and hero backgrounds in image-set()"""
+        base = PICTURE_BLOCK.sub(lambda m: OWNED_ATTRIBUTES.sub('', m.group(1)), html)
+        soup = BeautifulSoup(base, 'html.parser')
+        offsets = line_offsets(base)
+        edits = []
+
+        for element in soup.find_all(True):
+            offset = offsets[element.sourceline - 1] + element.sourcepos
+            end = base.index('>', offset) + 1
+            tag_html = base[offset:end]
+            if element.name == 'img':
+                src = element.get('src', '')
+                # Hand-written srcset, art direction and no-script copies are left alone
+                if not is_source(src) or element.get('srcset') or element.find_parent(['picture', 'noscript']):
+                    continue
+                width = geometry.image_box(element)[0]
+                self.need(src, width)
+                markup = self.picture(tag_html, src, width)
+                if markup:
+                    edits.append((offset, end, markup))
+            elif element.get('style') and 'background' in element['style']:
+                is_hero = 'hero' in element.get('class', [])
+                width = geometry.hero_box(element)[0] if is_hero else geometry.border_box_width(element)
+                style, _ = self.with_image_set(element['style'], width)
+                if style != element['style']:
+                    edits.append((offset, end, set_attribute(tag_html, 'style', style)))
+
+        for offset, end, markup in reversed(edits):
+            base = base[:offset] + markup + base[end:]
+
+        return base
+
+    def rewrite_stylesheet(self, css):
+        """The stylesheet with an image-set() added to each .hero rule that loads a JPEG"""
+        def rewrite_rule(match):
+            if not HERO_SELECTOR.search(match.group(1)):
+                return match.group(0)
+            body, _ = self.with_image_set(match.group(2), VIEWPORT[0])
+            return match.group(1) + '{' + body + '}'
+
+        return re.sub(r'([^{}]+)\{([^{}]*)\}', rewrite_rule, css)
+
+
+def write_if_changed(path, content):
+    with open(path, 'r', encoding='utf-8') as f:
+        if f.read() == content:
+            return False
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+def rewrite_site(generate=True, workers=None):
+    """Generate missing ladders (optionally) and rewrite the stylesheet and pages; returns a summary"""
+    rewriter = ResponsiveImages()
+    pages = list_pages()
+
+    def run():
+        with open(STYLESHEET, 'r', encoding='utf-8') as f:
+            stylesheet = rewriter.rewrite_stylesheet(f.read())
+        rewritten = {}
+        for page in pages:
+            with open(page, 'r', encoding='utf-8') as f:
+                rewritten[page] = rewriter.rewrite_page(f.read(), SlotGeometry(stylesheet, VIEWPORT))
+        return stylesheet, rewritten
+
+    stylesheet, rewritten = run()
+    written = generate_variants(rewriter.needs, rewriter.manifest, workers) if generate else []
+    if written:
+        save_manifest(rewriter.manifest)
+        # New variants change the candidates, so the markup is rebuilt from them
+        stylesheet, rewritten = run()
+
+    changed = [STYLESHEET] if write_if_changed(STYLESHEET, stylesheet) else []
+    changed += [os.path.basename(page) for page, html in rewritten.items() if write_if_changed(page, html)]
+    laddered = sum(bool(rewriter.candidates(source)) for source in rewriter.needs)
+    return {'sources': len(rewriter.needs), 'laddered': laddered, 'written': written, 'changed': changed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rewrite page images to <picture>/srcset and hero backgrounds to image-set()')
+    parser.add_argument('--no-generate', action='store_true', help='Only use variants already on disk')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print("📐 Rewriting Responsive Images")
+    print("=" * 60)
+    formats = [ext for ext, _, _, _ in modern_formats()]
+    missing = [ext for ext, _, _, _ in MODERN_FORMATS if ext not in formats]
+    if missing:
+        print(f"⚠️ This Pillow build cannot encode {', '.join(missing)}; skipping those sources (pip install -U pillow)")
+
+    summary = rewrite_site(not args.no_generate, args.workers)
+
+    print(f"🖼️ {summary['laddered']}/{summary['sources']} images have a ladder ({', '.join(formats + ['jpg'])})")
+    if summary['written']:
+        print(f"✅ Encoded {len(summary['written'])} variants into {RESPONSIVE_DIR}/")
+    print(f"✅ Updated {len(summary['changed'])} files")
+    for path in summary['changed']:
+        print(f"   📄 {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Declarative Section Extraction Rule Engine for Amrit Sagar Website
+Evaluates every category in section_rules.json in a single traversal per page
+"""
+
+import json
+import re
+import sys
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+
+from image_index import INDEX_FILE, ImageIndex, entries_from_records
+from politeness import PolitenessScheduler
+from site_snapshot import replay_from_argv
+
+RULES_FILE = 'section_rules.json'
+
+
+def load_rules(config_path=RULES_FILE, categories=None):
+    """Load rule config and resolve per-category defaults"""
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+
+    default_tags = config.get('section_tags', ['section', 'div', 'article'])
+
+    # Selected categories pull in the rules they depend on
+    if categories:
+        unknown = set(categories) - set(config['categories'])
+        if unknown:
+            raise ValueError(f"Unknown categories: {', '.join(sorted(unknown))}")
+        selected = set(categories)
+        for name in reversed(list(config['categories'])):
+            if name in selected:
+                rule = config['categories'][name]
+                selected.update(rule.get('requires', []) + rule.get('unless', []))
+        categories = selected
+
+    rules = []
+    seen = set()
+
+    for name, rule in config['categories'].items():
+        if categories and name not in categories:
+            continue
+
+        # requires/unless may only point at rules evaluated earlier
+        for dep in rule.get('requires', []) + rule.get('unless', []):
+            if dep not in seen:
+                raise ValueError(f"Rule '{name}' depends on '{dep}' which must be declared before it")
+
+        rules.append({
+            'name': name,
+            'keywords': [kw.lower() for kw in rule['keywords']],
+            'requires': rule.get('requires', []),
+            'unless': rule.get('unless', []),
+            'pages': rule['pages'],
+            'section_tags': set(rule.get('section_tags', default_tags)),
+            'skip_src_patterns': rule.get('skip_src_patterns', ['logo', 'favicon']),
+            'context_length': rule.get('context_length', 150),
+            'record': rule.get('record', 'image'),
+            'output': rule['output'],
+            'key': rule.get('key')
+        })
+        seen.add(name)
+
+    return config, rules
+
+
+def build_keyword_matcher(rules):
+    """Compile all rule keywords into one pattern so matching cost is flat in rule count"""
+    keywords = sorted({kw for rule in rules for kw in rule['keywords']}, key=len, reverse=True)
+    if not keywords:
+        return lambda text: set()
+
+    # Lookahead finds a match at every offset; longer keywords win at a given
+    # offset, so record which shorter keywords each one also contains
+    pattern = re.compile('(?=(' + '|'.join(re.escape(kw) for kw in keywords) + '))')
+    implied = {kw: {other for other in keywords if other in kw} for kw in keywords}
+
+    def match(text):
+        found = set()
+        for kw in set(pattern.findall(text)):
+            found |= implied[kw]
+        return found
+
+    return match
+
+
+def absolutize(src, page_url):
+    """Convert an image src to an absolute URL"""
+    if src.startswith('//'):
+        return 'https:' + src
+    return urljoin(page_url, src)
+
+
+def truncate(text, length):
+    return text[:length] + '...' if len(text) > length else text
+
+
+def fetch_page(session, url):
+    """Fetch a page and return its HTML"""
+    response = session.get(url, timeout=15)
+    response.raise_for_status()
+    return response.text
+
+
+def evaluate_page(html, page_url, rules, match_keywords):
+    """Walk the page's sections once and apply every active rule to each"""
+    results = {rule['name']: [] for rule in rules}
+    soup = BeautifulSoup(html, 'html.parser')
+    tags = sorted({tag for rule in rules for tag in rule['section_tags']})
+
+    for section in soup.find_all(tags):
+        raw_text = section.get_text()
+        section_text = raw_text.lower()
+        found_keywords = match_keywords(section_text)
+        if not found_keywords:
+            continue
+
+        matched = set()
+        for rule in rules:
+            if section.name not in rule['section_tags']:
+                continue
+            if not found_keywords.intersection(rule['keywords']):
+                continue
+            if not all(dep in matched for dep in rule['requires']):
+                continue
+            if any(dep in matched for dep in rule['unless']):
+                continue
+            matched.add(rule['name'])
+
+        if not matched:
+            continue
+
+        images = [(img.get('src', ''), img.get('alt', '')) for img in section.find_all('img')]
+
+        for rule in rules:
+            if rule['name'] not in matched:
+                continue
+
+            kept = [
+                (absolutize(src, page_url), alt) for src, alt in images
+                if not any(pattern in src.lower() for pattern in rule['skip_src_patterns'])
+            ]
+
+            if rule['record'] == 'section':
+                if kept:
+                    stripped = raw_text.strip()
+                    results[rule['name']].append({
+                        'text': truncate(stripped, rule['context_length']),
+                        'images': [{'src': src, 'alt': alt} for src, alt in kept],
+                        'html_class': section.get('class', []),
+                        'id': section.get('id', ''),
+                        'page': page_url
+                    })
+            else:
+                context = truncate(section_text, rule['context_length'])
+                for src, alt in kept:
+                    results[rule['name']].append({
+                        'src': src,
+                        'alt': alt,
+                        'context': context,
+                        'page': page_url
+                    })
+
+    return results
+
+
+def write_outputs(rules, results):
+    """Write each output file from the categories that target it"""
+    outputs = {}
+    for rule in rules:
+        if rule['key']:
+            outputs.setdefault(rule['output'], {})[rule['key']] = results[rule['name']]
+        else:
+            outputs[rule['output']] = results[rule['name']]
+
+    for output_file, content in outputs.items():
+        with open(output_file, 'w') as f:
+            json.dump(content, f, indent=2)
+        print(f"📁 Saved: {output_file}")
+
+    return outputs
+
+
+def run_rules(categories=None, config_path=RULES_FILE, fetch=fetch_page, index_path=INDEX_FILE, replay=None):
+    """Fetch every page once and evaluate all selected rules against it
+
+    With replay (a SnapshotArchive) pages come from the snapshot instead of the origin.
+    """
+    config, rules = load_rules(config_path, categories)
+    match_keywords = build_keyword_matcher(rules)
+
+    session = requests.Session()
+    session.headers.update({'User-Agent': config['user_agent']})
+    scheduler = replay or PolitenessScheduler(session)
+
+    # Each page is fetched once no matter how many categories read it
+    pages = []
+    for rule in rules:
+        for page in rule['pages']:
+            if page not in pages:
+                pages.append(page)
+
+    results = {rule['name']: [] for rule in rules}
+    index = ImageIndex(index_path) if index_path else None
+
+    for url in pages:
+        page_rules = [rule for rule in rules if url in rule['pages']]
+        try:
+            print(f"🔍 Analyzing: {url} ({len(page_rules)} rules)")
+            html = fetch(scheduler, url)
+            page_results = evaluate_page(html, url, page_rules, match_keywords)
+        except Exception as e:
+            print(f"❌ Error analyzing {url}: {e}")
+            continue
+
+        for name, records in page_results.items():
+            results[name].extend(records)
+            # Only this page's entries for this category are replaced
+            if index is not None:
+                index.update_page(url, name, entries_from_records(records))
+
+    write_outputs(rules, results)
+    if index is not None:
+        index.save()
+
+    for name, records in results.items():
+        print(f"✅ {name}: {len(records)} records")
+
+    return results
+
+
+if __name__ == "__main__":
+    print("🧭 Running Section Extraction Rules")
+    print("=" * 60)
+
+    replay, selected = replay_from_argv(sys.argv[1:])
+    run_rules(selected or None, replay=replay)
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Service Worker Precache for Amrit Sagar Pages
+Crawls the built pages for the shared shell (CSS, JS, logos, fonts) and each page's above-the-fold
+images, and writes a content-hashed precache manifest and a service worker that serves them from
+the device on repeat navigations
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+
+from bs4 import BeautifulSoup
+
+from build_site import HASH_LENGTH, OUTPUT_DIR, resolve
+from critical_css import fold_blocks
+from placement_solver import (
+    URL_PATTERN, VIEWPORT, list_pages, parse_inline_style, parse_simple_selector, parse_stylesheet, selector_matches
+)
+from streaming_html import image_set_spans
+
+SW_FILE = 'sw.js'
+PRECACHE_FILE = 'precache-manifest.json'
+
+# Revisions keyed by mtime and size, so unchanged files are never re-hashed
+HASH_CACHE_FILE = os.path.join('build', 'precache_hashes.json')
+
+# An asset on at least this share of pages is part of the shell and precached at install
+SHELL_MIN_SHARE = 0.5
+# Shared images above this size (hero photos) are left to the pages that show them above the fold
+SHELL_IMAGE_MAX_BYTES = 100 * 1024
+
+FONT_EXTENSIONS = ('.woff2', '.woff', '.ttf', '.otf')
+
+# Of an image-set() or a <picture>, precache what a current browser picks at 1x: the first candidate
+SIZES_SLOT = re.compile(r'(\d+)px\s*$')
+
+REGISTER_MARKER = 'data-sw-register'
+REGISTER_SCRIPT = (
+    f"<script {REGISTER_MARKER}>if('serviceWorker' in navigator){{window.addEventListener('load',function(){{"
+    f"navigator.serviceWorker.register('{SW_FILE}')}})}}</script>"
+)
+REGISTER_BLOCK = re.compile(r'<script ' + REGISTER_MARKER + r'>.*?</script>\n?', re.S)
+
+SW_TEMPLATE = """// Generated by service_worker.py from precache-manifest.json; regenerate rather than edit
+const PRECACHE = __PRECACHE__;
+const CACHE_PREFIX = 'amrit-sagar-';
+const CACHE_NAME = CACHE_PREFIX + PRECACHE.version;
+const REVISIONS_KEY = '__revisions';
+
+const absolute = path => new URL(path, self.registration.scope).href;
+
+// Every URL this version owns (shell, page assets and the pages themselves) with its content hash
+const revisions = {};
+Object.entries(PRECACHE.shell).forEach(([path, revision]) => { revisions[absolute(path)] = revision; });
+Object.entries(PRECACHE.pages).forEach(([page, entry]) => {
+    revisions[absolute(page)] = entry.revision;
+    Object.entries(entry.assets).forEach(([path, revision]) => { revisions[absolute(path)] = revision; });
+});
+
+const pageFor = url => {
+    let pathname = new URL(url).pathname.slice(new URL(self.registration.scope).pathname.length);
+    if (pathname === '' || pathname.endsWith('/')) {
+        pathname += 'index.html';
+    } else if (!/\\.[a-z0-9]+$/i.test(pathname)) {
+        pathname += '.html';
+    }
+    return PRECACHE.pages[pathname] ? pathname : null;
+};
+
+// Entries whose hash is unchanged are copied from the previous version instead of refetched
+const copyUnchanged = async cache => {
+    const copied = new Set();
+    const names = (await caches.keys()).filter(name => name.startsWith(CACHE_PREFIX) && name !== CACHE_NAME);
+    for (const name of names) {
+        const previous = await caches.open(name);
+        const stored = await previous.match(REVISIONS_KEY);
+        const previousRevisions = stored ? await stored.json() : {};
+        for (const [url, revision] of Object.entries(revisions)) {
+            if (copied.has(url) || previousRevisions[url] !== revision) {
+                continue;
+            }
+            const response = await previous.match(url);
+            if (response) {
+                await cache.put(url, response);
+                copied.add(url);
+            }
+        }
+    }
+    return copied;
+};
+
+self.addEventListener('install', event => {
+    event.waitUntil((async () => {
+        const cache = await caches.open(CACHE_NAME);
+        const copied = await copyUnchanged(cache);
+        const shell = Object.keys(PRECACHE.shell).map(absolute).filter(url => !copied.has(url));
+        await Promise.all(shell.map(async url => {
+            const response = await fetch(url, { cache: 'no-cache' });
+            if (!response.ok) {
+                throw new Error(`Precache failed for ${url}: ${response.status}`);
+            }
+            await cache.put(url, response);
+        }));
+        await cache.put(REVISIONS_KEY, new Response(JSON.stringify(revisions)));
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil((async () => {
+        const names = await caches.keys();
+        await Promise.all(names
+            .filter(name => name.startsWith(CACHE_PREFIX) && name !== CACHE_NAME)
+            .map(name => caches.delete(name)));
+        await self.clients.claim();
+    })());
+});
+
+// Hashed shell and page assets never change under the same URL
+const cacheFirst = async (request, url) => {
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(url);
+    if (cached) {
+        return cached;
+    }
+    const response = await fetch(request);
+    if (response.ok) {
+        await cache.put(url, response.clone());
+    }
+    return response;
+};
+
+// A visited page's above-the-fold images are fetched once so the next visit needs no network
+const warmPage = async page => {
+    const cache = await caches.open(CACHE_NAME);
+    await Promise.all(Object.keys(PRECACHE.pages[page].assets).map(absolute).map(async url => {
+        if (!(await cache.match(url))) {
+            const response = await fetch(url);
+            if (response.ok) {
+                await cache.put(url, response);
+            }
+        }
+    }));
+};
+
+// Pages come from the device at once and are refreshed in the background
+const staleWhileRevalidate = async (event, page) => {
+    const url = absolute(page);
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(url);
+    const network = fetch(event.request).then(async response => {
+        if (response.ok) {
+            await cache.put(url, response.clone());
+        }
+        return response;
+    });
+    event.waitUntil(network.then(() => warmPage(page)).catch(() => {}));
+    return cached || network;
+};
+
+self.addEventListener('fetch', event => {
+    const { request } = event;
+    if (request.method !== 'GET' || !request.url.startsWith(self.registration.scope)) {
+        return;
+    }
+    const url = request.url.split('#')[0];
+    if (request.mode === 'navigate') {
+        const page = pageFor(url);
+        if (page) {
+            event.respondWith(staleWhileRevalidate(event, page));
+        }
+    } else if (revisions[url]) {
+        event.respondWith(cacheFirst(request, url));
+    }
+});
+"""
+
+
+class FileHasher:
+    """Content revisions for files under root, re-hashing only files whose mtime or size changed"""
+
+    def __init__(self, root, cache_file=HASH_CACHE_FILE):
+        self.root = root
+        self.cache_file = cache_file
+        self.cache = {}
+        if os.path.exists(cache_file):
+            with open(cache_file, 'r') as f:
+                self.cache = json.load(f)
+        self.hashed = 0
+
+    def revision(self, path):
+        full_path = os.path.join(self.root, path)
+        stat = os.stat(full_path)
+        key = os.path.abspath(full_path)
+        cached = self.cache.get(key)
+        if cached and cached[:2] == [stat.st_mtime_ns, stat.st_size]:
+            return cached[2]
+        with open(full_path, 'rb') as f:
+            revision = hashlib.sha256(f.read()).hexdigest()[:HASH_LENGTH]
+        self.cache[key] = [stat.st_mtime_ns, stat.st_size, revision]
+        self.hashed += 1
+        return revision
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+        with open(self.cache_file, 'w') as f:
+            json.dump(self.cache, f, indent=1, sort_keys=True)
+
+
+def inject_registration(html):
+    html = REGISTER_BLOCK.sub('', html)
+    if '</body>' not in html:
+        return html
+    return html.replace('</body>', REGISTER_SCRIPT + '\n</body>', 1)
+
+
+def local_path(url, base_dir, root):
+    """Root-relative path of a local URL that exists on disk, else None"""
+    target = resolve(url, base_dir) if url else None
+    if target and os.path.isfile(os.path.join(root, target)):
+        return target.replace(os.sep, '/')
+    return None
+
+
+def preferred_urls(value):
+    """URLs a CSS value loads, counting only the first candidate of each image-set()"""
+    spans = [[start, end, False] for start, end in image_set_spans(value)]
+    urls = []
+    for match in URL_PATTERN.finditer(value):
+        span = next((span for span in spans if span[0] <= match.start() < span[1]), None)
+        if span is None or not span[2]:
+            urls.append(match.group(1))
+            if span:
+                span[2] = True
+    return urls
+
+
+def picture_url(img):
+    """URL an <img> loads: in a <picture>, the first <source> candidate covering its slot at 1x"""
+    source = img.parent.find('source', srcset=True) if img.parent and img.parent.name == 'picture' else None
+    if source is None:
+        return img.get('src')
+    slot = SIZES_SLOT.search(source.get('sizes', ''))
+    slot_width = int(slot.group(1)) if slot else VIEWPORT[0]
+    candidates = sorted(
+        (int(parts[1][:-1]), parts[0]) for candidate in source['srcset'].split(',')
+        if len(parts := candidate.split()) == 2 and parts[1].endswith('w')
+    )
+    covering = [url for width, url in candidates if width >= slot_width]
+    return covering[0] if covering else (candidates[-1][1] if candidates else img.get('src'))
+
+
+def background_urls(element, base_rules):
+    """Images of the background that wins for an element: its inline style, else the last matching rule"""
+    urls = []
+    sources = [declarations for parts, declarations in base_rules if selector_matches(element, parts)]
+    for declarations in sources + [parse_inline_style(element.get('style'))]:
+        value = declarations.get('background-image') or declarations.get('background')
+        if value:
+            urls = preferred_urls(value)
+    return urls
+
+
+class SiteCrawler:
+    """What each page loads, with stylesheets parsed once across pages"""
+
+    def __init__(self, root):
+        self.root = root
+        self.stylesheets = {}
+
+    def stylesheet(self, path):
+        """(base rules for fold detection, font files) of one local stylesheet"""
+        if path not in self.stylesheets:
+            with open(os.path.join(self.root, path), 'r', encoding='utf-8') as f:
+                css = f.read()
+            base_rules = [
+                (parts, declarations)
+                for selector, declarations in parse_stylesheet(css)
+                if (parts := parse_simple_selector(selector))
+            ]
+            fonts = [
+                font for url in URL_PATTERN.findall(css)
+                if url.lower().split('?')[0].endswith(FONT_EXTENSIONS)
+                and (font := local_path(url, os.path.dirname(path), self.root))
+            ]
+            self.stylesheets[path] = (base_rules, fonts)
+        return self.stylesheets[path]
+
+    def crawl(self, page):
+        """{'stylesheets', 'scripts', 'fonts', 'images', 'critical'} for one page"""
+        with open(os.path.join(self.root, page), 'r', encoding='utf-8') as f:
+            soup = BeautifulSoup(f.read(), 'html.parser')
+        base_dir = os.path.dirname(page)
+
+        def local(url):
+            return local_path(url, base_dir, self.root)
+
+        resources = {'stylesheets': [], 'scripts': [], 'fonts': [], 'images': [], 'critical': []}
+
+        def add(kind, path):
+            if path and path not in resources[kind]:
+                resources[kind].append(path)
+
+        for link in soup.find_all('link', href=True):
+            rel = [value.lower() for value in link.get('rel', [])]
+            if 'stylesheet' in rel:
+                add('stylesheets', local(link['href']))
+            elif 'icon' in rel or 'apple-touch-icon' in rel:
+                add('images', local(link['href']))
+            elif 'preload' in rel and link.get('as') == 'image':
+                add('critical', local(link['href']))
+        for script in soup.find_all('script', src=True):
+            add('scripts', local(script['src']))
+
+        base_rules = []
+        for stylesheet in resources['stylesheets']:
+            rules, fonts = self.stylesheet(stylesheet)
+            base_rules += rules
+            for font in fonts:
+                add('fonts', font)
+
+        for img in soup.find_all('img', src=True):
+            add('images', local(picture_url(img)))
+        for element in soup.find_all(style=True):
+            for url in preferred_urls(element['style']):
+                add('images', local(url))
+
+        for block in fold_blocks(soup, base_rules, VIEWPORT):
+            for element in [block] + block.find_all(True):
+                if element.name == 'img' and element.get('src'):
+                    add('critical', local(picture_url(element)))
+                for url in background_urls(element, base_rules):
+                    add('critical', local(url))
+
+        resources['images'] += [path for path in resources['critical'] if path not in resources['images']]
+        return resources
+
+
+def precache_manifest(root, hasher):
+    """Shell entries shared by most pages, plus each page's own revision, critical images and assets"""
+    pages = [os.path.relpath(page, root).replace(os.sep, '/') for page in list_pages(root)]
+    crawler = SiteCrawler(root)
+    crawled = {page: crawler.crawl(page) for page in pages}
+
+    uses = {}
+    for resources in crawled.values():
+        for kind in ('stylesheets', 'scripts', 'fonts', 'images'):
+            for path in resources[kind]:
+                uses.setdefault(path, set()).add(kind)
+    counts = {path: sum(path in r['stylesheets'] + r['scripts'] + r['fonts'] + r['images'] for r in crawled.values())
+              for path in uses}
+
+    shell = set()
+    for path, kinds in uses.items():
+        if counts[path] < SHELL_MIN_SHARE * len(pages):
+            continue
+        if kinds == {'images'} and os.path.getsize(os.path.join(root, path)) > SHELL_IMAGE_MAX_BYTES:
+            continue
+        shell.add(path)
+    # A shell stylesheet's fonts are needed wherever it is
+    for resources in crawled.values():
+        if any(stylesheet in shell for stylesheet in resources['stylesheets']):
+            shell.update(resources['fonts'])
+
+    manifest = {'shell': {path: hasher.revision(path) for path in sorted(shell)}, 'pages': {}}
+    for page, resources in crawled.items():
+        own = [path for path in resources['critical'] + resources['stylesheets'] + resources['scripts'] + resources['fonts']
+               if path not in shell]
+        manifest['pages'][page] = {
+            'revision': hasher.revision(page),
+            'assets': {path: hasher.revision(path) for path in sorted(set(own))}
+        }
+
+    digest = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode('utf-8')).hexdigest()
+    return {'version': digest[:HASH_LENGTH], **manifest}
+
+
+def changed_entries(previous, manifest):
+    """URLs whose revision is new or different since the previous manifest"""
+    def entries(m):
+        flat = dict(m.get('shell', {}))
+        for page, entry in m.get('pages', {}).items():
+            flat[page] = entry['revision']
+            flat.update(entry['assets'])
+        return flat
+
+    before, after = entries(previous), entries(manifest)
+    return sorted(url for url, revision in after.items() if before.get(url) != revision)
+
+
+def write_if_changed(path, content):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+def generate_service_worker(root=OUTPUT_DIR, hash_cache=HASH_CACHE_FILE):
+    """Register the worker on every page and write its manifest; returns (manifest, changed URLs, written)"""
+    for page_path in list_pages(root):
+        with open(page_path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        write_if_changed(page_path, inject_registration(html))
+
+    previous = {}
+    manifest_path = os.path.join(root, PRECACHE_FILE)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            previous = json.load(f)
+
+    hasher = FileHasher(root, hash_cache)
+    manifest = precache_manifest(root, hasher)
+    hasher.save()
+
+    # Browsers reinstall a worker only when its bytes change, so an unchanged site keeps its caches
+    worker = SW_TEMPLATE.replace('__PRECACHE__', json.dumps(manifest, sort_keys=True, separators=(',', ':')))
+    written = [
+        name for name, content in (
+            (PRECACHE_FILE, json.dumps(manifest, indent=2, sort_keys=True) + '\n'),
+            (SW_FILE, worker)
+        )
+        if write_if_changed(os.path.join(root, name), content)
+    ]
+    return manifest, changed_entries(previous, manifest), written, hasher.hashed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a precache manifest and service worker for the built site')
+    parser.add_argument('directory', nargs='?', default=OUTPUT_DIR)
+    parser.add_argument('--hash-cache', default=HASH_CACHE_FILE)
+    args = parser.parse_args()
+
+    print("📲 Generating Service Worker Precache")
+    print("=" * 60)
+
+    manifest, changed, written, hashed = generate_service_worker(args.directory, args.hash_cache)
+
+    page_assets = sum(len(entry['assets']) for entry in manifest['pages'].values())
+    print(f"🧱 Shell: {len(manifest['shell'])} entries")
+    for path in manifest['shell']:
+        print(f"   {path}")
+    print(f"📄 {len(manifest['pages'])} pages, {page_assets} page-specific assets")
+
+    if written:
+        print(f"✅ Version {manifest['version']}: {len(changed)} entries changed, wrote {', '.join(written)}")
+        for url in changed[:10]:
+            print(f"   🔄 {url}")
+    else:
+        print(f"♻️ Version {manifest['version']} unchanged; installed workers keep their caches")
+    print(f"📊 {hashed} files hashed, the rest from {args.hash_cache}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Site Snapshot Archive for Amrit Sagar Crawlers
+WARC-style request/response records, compressed one per member, with an offset index so any
+URL can be replayed through mmap without decompressing the rest of the archive
+"""
+
+import argparse
+import gzip
+import json
+import mmap
+import os
+import threading
+import time
+import uuid
+from datetime import timedelta
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Per-record zstd when available, otherwise per-record gzip (the classic .warc.gz layout)
+CODEC = 'zstd' if zstandard else 'gzip'
+SNAPSHOT_FILE = 'site_snapshot.warc.zst' if zstandard else 'site_snapshot.warc.gz'
+ZSTD_LEVEL = 10
+
+# Headers that describe the wire encoding; records hold the decoded body
+WIRE_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length')
+
+
+class NotInSnapshot(Exception):
+    """Raised when a replayed URL was never captured"""
+
+
+def index_path_for(archive_path):
+    return archive_path + '.idx'
+
+
+def lookup_key(url, range_header=None):
+    """Ranged requests are separate captures of the same URL"""
+    return f"{url} {range_header}" if range_header else url
+
+
+def loose_key(key):
+    """Scheme, host case and trailing slash don't distinguish pages on these sites"""
+    url, _, rest = key.partition(' ')
+    parsed = urlparse(url)
+    path = parsed.path.rstrip('/') or '/'
+    loose = parsed.netloc.lower() + path + ('?' + parsed.query if parsed.query else '')
+    return f"{loose} {rest}" if rest else loose
+
+
+def compress(data, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def decompress(data, codec):
+    if codec == 'zstd':
+        if not zstandard:
+            raise RuntimeError("This snapshot is zstd-compressed; install the zstandard package to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def warc_record(record_type, url, block, content_type, concurrent_to=None):
+    record_id = f"<urn:uuid:{uuid.uuid4()}>"
+    headers = [
+        'WARC/1.1',
+        f'WARC-Type: {record_type}',
+        f'WARC-Record-ID: {record_id}',
+        f'WARC-Date: {time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}',
+        f'WARC-Target-URI: {url}',
+        f'Content-Type: {content_type}',
+        f'Content-Length: {len(block)}'
+    ]
+    if concurrent_to:
+        headers.insert(3, f'WARC-Concurrent-To: {concurrent_to}')
+    return ('\r\n'.join(headers) + '\r\n\r\n').encode('utf-8') + block + b'\r\n\r\n', record_id
+
+
+class SnapshotWriter:
+    """Appends request/response record pairs and an index line per capture"""
+
+    def __init__(self, path=SNAPSHOT_FILE, codec=CODEC):
+        self.path = path
+        self.codec = codec
+        self.lock = threading.Lock()
+        self.archive = open(path, 'wb')
+        self.index = open(index_path_for(path), 'w')
+        self.offset = 0
+        self.captures = 0
+        self._write_index({'type': 'header', 'archive': os.path.basename(path), 'codec': codec})
+
+    def _write_index(self, entry):
+        self.index.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        self.index.flush()
+
+    def _append(self, record):
+        member = compress(record, self.codec)
+        offset = self.offset
+        self.archive.write(member)
+        self.offset += len(member)
+        return offset, len(member)
+
+    def record(self, url, response, elapsed=None):
+        """Capture a response; reads the full body if the caller streamed it"""
+        body = response.content
+        request = response.request
+        range_header = request.headers.get('Range') if request is not None else None
+
+        request_lines = [f"GET {urlparse(url).path or '/'} HTTP/1.1", f"Host: {urlparse(url).netloc}"]
+        if request is not None:
+            request_lines += [f"{name}: {value}" for name, value in request.headers.items()]
+        request_block = ('\r\n'.join(request_lines) + '\r\n\r\n').encode('utf-8')
+
+        headers = [(name, value) for name, value in response.headers.items() if name.lower() not in WIRE_HEADERS]
+        headers.append(('Content-Length', str(len(body))))
+        status_line = f"HTTP/1.1 {response.status_code} {response.reason or ''}".rstrip()
+        response_block = (
+            '\r\n'.join([status_line] + [f"{name}: {value}" for name, value in headers]) + '\r\n\r\n'
+        ).encode('latin-1', errors='replace') + body
+
+        response_record, response_id = warc_record(
+            'response', response.url, response_block, 'application/http; msgtype=response'
+        )
+        request_record, _ = warc_record(
+            'request', url, request_block, 'application/http; msgtype=request', concurrent_to=response_id
+        )
+
+        with self.lock:
+            self._append(request_record)
+            offset, length = self._append(response_record)
+            self.archive.flush()
+            entry = {
+                'key': lookup_key(url, range_header),
+                'url': response.url,
+                'offset': offset,
+                'length': length,
+                'status': response.status_code,
+                'content_type': response.headers.get('Content-Type'),
+                'elapsed': elapsed if elapsed is not None else response.elapsed.total_seconds()
+            }
+            self._write_index(entry)
+            self.captures += 1
+
+    def close(self):
+        with self.lock:
+            self.archive.close()
+            self.index.close()
+
+
+def parse_http_response(block):
+    head, _, body = block.partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    _, status, *reason = lines[0].split(' ', 2)
+    headers = CaseInsensitiveDict()
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip()] = value.strip()
+    return int(status), (reason[0] if reason else ''), headers, body
+
+
+class SnapshotArchive:
+    """Read-only replay of a snapshot; get() returns a requests.Response from disk"""
+
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.path = path
+        self.entries = {}
+        self.loose = {}
+        self.codec = CODEC
+
+        with open(index_path_for(path), 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get('type') == 'header':
+                    self.codec = entry['codec']
+                    continue
+                self.entries[entry['key']] = entry
+                self.loose.setdefault(loose_key(entry['key']), entry)
+
+        self.file = open(path, 'rb')
+        # mmap refuses empty files; an archive with no captures has nothing to map
+        if os.path.getsize(path):
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.map = None
+
+    @property
+    def headers(self):
+        return {}
+
+    def __contains__(self, url):
+        return self.find(url) is not None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def find(self, url, range_header=None):
+        key = lookup_key(url, range_header)
+        return self.entries.get(key) or self.loose.get(loose_key(key))
+
+    def read_record(self, entry):
+        """Decompress just this record's member from the mapped file"""
+        record = decompress(self.map[entry['offset']:entry['offset'] + entry['length']], self.codec)
+        _, _, block = record.partition(b'\r\n\r\n')
+        return block[:-4] if block.endswith(b'\r\n\r\n') else block
+
+    def get(self, url, **kwargs):
+        """Replay a capture; raises NotInSnapshot for URLs the crawl never fetched"""
+        range_header = (kwargs.get('headers') or {}).get('Range')
+        entry = self.find(url, range_header)
+        if entry is None:
+            raise NotInSnapshot(f"{url} is not in {self.path}")
+
+        status, reason, headers, body = parse_http_response(self.read_record(entry))
+        response = requests.Response()
+        response.status_code = status
+        response.reason = reason
+        response.headers = headers
+        response.url = entry['url']
+        response.encoding = get_encoding_from_headers(headers)
+        response.elapsed = timedelta(seconds=entry.get('elapsed') or 0)
+        response._content = body
+        response._content_consumed = True
+        return response
+
+    def urls(self):
+        """Captured URLs, leaving out ranged probes"""
+        return [key for key in self.entries if ' ' not in key]
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+
+def replay_from_argv(argv):
+    """Split --from-snapshot PATH out of argv; returns (SnapshotArchive or None, remaining args)"""
+    if '--from-snapshot' not in argv:
+        return None, list(argv)
+    position = argv.index('--from-snapshot')
+    if position + 1 >= len(argv):
+        raise SystemExit("--from-snapshot needs an archive path")
+    path = argv[position + 1]
+    print(f"📼 Replaying from snapshot {path}")
+    return SnapshotArchive(path), argv[:position] + argv[position + 2:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect a site snapshot archive')
+    parser.add_argument('archive', nargs='?', default=SNAPSHOT_FILE)
+    parser.add_argument('--url', help='Print the captured body of one URL')
+    args = parser.parse_args()
+
+    archive = SnapshotArchive(args.archive)
+    if args.url:
+        response = archive.get(args.url)
+        print(f"{response.status_code} {response.headers.get('Content-Type')} ({len(response.content)} bytes)")
+        if 'text' in response.headers.get('Content-Type', ''):
+            print(response.text)
+    else:
+        print(f"📼 {args.archive}: {len(archive)} captures ({archive.codec})")
+        for url in archive.urls():
+            print(f"   {url}")
+    archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Sitemap Discovery for Amrit Sagar Website Crawls
+Seeds page discovery from sitemap.xml / sitemap indexes and tracks lastmod for incremental recrawls
+"""
+
+import gzip
+import json
+import os
+import time
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+CRAWL_STATE_FILE = 'crawl_state.json'
+
+# WordPress core, Yoast and the generic location, in the order they are tried
+SITEMAP_PATHS = ['sitemap.xml', 'wp-sitemap.xml', 'sitemap_index.xml']
+
+
+def canonical_page(url):
+    """Page URL on https, so http links and the https URLs sitemaps list share one key"""
+    parts = urlsplit(url)
+    if parts.scheme == 'http':
+        return urlunsplit(('https',) + tuple(parts[1:]))
+    return url
+
+
+def local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def parse_sitemap(content):
+    """Parse a sitemap or sitemap index into (pages {loc: lastmod}, child sitemaps)"""
+    if content[:2] == b'\x1f\x8b':
+        content = gzip.decompress(content)
+
+    root = ET.fromstring(content)
+    pages = {}
+    children = []
+
+    for entry in root:
+        fields = {local_name(child.tag): (child.text or '').strip() for child in entry}
+        loc = fields.get('loc')
+        if not loc:
+            continue
+        if local_name(root.tag) == 'sitemapindex':
+            children.append(loc)
+        else:
+            pages[canonical_page(loc)] = fields.get('lastmod') or None
+
+    return pages, children
+
+
+def fetch_sitemap_pages(session, base_url, seeds=None, fetch=None, max_sitemaps=200):
+    """Walk sitemap indexes from the first seed that parses; {} if the site has none"""
+    fetch = fetch or (lambda url: _get(session, url))
+    candidates = seeds or [urljoin(base_url, path) for path in SITEMAP_PATHS]
+
+    for seed in candidates:
+        pages = {}
+        queue = [seed]
+        seen = set()
+
+        while queue and len(seen) < max_sitemaps:
+            url = queue.pop(0)
+            if url in seen:
+                continue
+            seen.add(url)
+            try:
+                found, children = parse_sitemap(fetch(url))
+            except Exception as e:
+                print(f"⚠️ Sitemap {url} unavailable: {e}")
+                continue
+            pages.update(found)
+            queue.extend(children)
+
+        if pages:
+            print(f"🗺️ {len(pages)} pages listed in sitemaps from {seed}")
+            return pages
+
+    return {}
+
+
+def _get(session, url):
+    response = session.get(url, timeout=15)
+    response.raise_for_status()
+    return response.content
+
+
+class CrawlState:
+    """Per-page lastmod recorded at the last successful crawl"""
+
+    def __init__(self, path=CRAWL_STATE_FILE):
+        self.path = path
+        self.pages = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.pages = json.load(f).get('pages', {})
+
+    def is_unchanged(self, url, lastmod):
+        """True when the sitemap lastmod matches the last successful crawl"""
+        if not lastmod:
+            return False
+        previous = self.pages.get(canonical_page(url))
+        return bool(previous) and previous.get('lastmod') == lastmod
+
+    def mark_crawled(self, url, lastmod):
+        self.pages[canonical_page(url)] = {
+            'lastmod': lastmod,
+            'crawled_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump({'pages': self.pages}, f, indent=2)
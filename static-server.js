@@ -1,4 +1,5 @@
 const express = require('express');
+const fs = require('fs');
 const path = require('path');
 const cors = require('cors');
 
@@ -17,21 +18,75 @@ app.use(cors({
 app.use(express.json());
 app.use(express.urlencoded({ extended: true }));
 
+// Serve the fingerprinted build from dist/ when build_site.py has produced one
+const manifestPath = path.join(__dirname, 'dist', 'asset-manifest.json');
+const manifest = fs.existsSync(manifestPath) ? JSON.parse(fs.readFileSync(manifestPath, 'utf8')) : null;
+const siteRoot = manifest ? path.join(__dirname, 'dist') : __dirname;
+const fingerprintedAssets = new Set(manifest ? Object.values(manifest.assets) : []);
+
+// The service worker and its manifest keep their names, so browsers must revalidate them like pages
+const unhashedFiles = new Set(['sw.js', 'precache-manifest.json']);
+
+const setCacheHeaders = (res, filePath) => {
+    const relativePath = path.relative(siteRoot, filePath).split(path.sep).join('/');
+    if (fingerprintedAssets.has(relativePath)) {
+        res.setHeader('Cache-Control', manifest.cache_control.assets);
+    } else if (manifest && (filePath.endsWith('.html') || unhashedFiles.has(relativePath))) {
+        res.setHeader('Cache-Control', manifest.cache_control.pages);
+    }
+};
+
+// Send the .br/.gz sibling written by precompress.py when the client accepts it
+const precompressedEncodings = { br: '.br', gzip: '.gz' };
+
+app.use((req, res, next) => {
+    if (!manifest || (req.method !== 'GET' && req.method !== 'HEAD')) {
+        return next();
+    }
+
+    let requestPath = decodeURIComponent(req.path);
+    if (requestPath.endsWith('/')) {
+        requestPath += 'index.html';
+    } else if (!path.extname(requestPath)) {
+        requestPath += '.html';
+    }
+    const filePath = path.join(siteRoot, requestPath);
+    if (!filePath.startsWith(siteRoot + path.sep)) {
+        return next();
+    }
+
+    // Brotli first, then gzip, whichever the client accepts and was worth writing
+    const encoding = Object.keys(precompressedEncodings).find(name =>
+        req.acceptsEncodings(name) === name && fs.existsSync(filePath + precompressedEncodings[name])
+    );
+    res.vary('Accept-Encoding');
+    if (!encoding) {
+        return next();
+    }
+
+    res.setHeader('Content-Encoding', encoding);
+    res.type(path.extname(filePath));
+    setCacheHeaders(res, filePath);
+    res.sendFile(filePath + precompressedEncodings[encoding]);
+});
+
 // Serve static files
-app.use('/images', express.static(path.join(__dirname, 'images')));
-app.use(express.static(path.join(__dirname)));
+app.use('/images', express.static(path.join(siteRoot, 'images'), { setHeaders: setCacheHeaders }));
+app.use(express.static(siteRoot, { setHeaders: setCacheHeaders }));
 
 // Serve HTML files for all routes
 app.get(['/about-aghor-foundation', '/about-bal-ashram', '/about-holistic-farm', '/about-team', 
          '/programs-day-visit', '/programs-retreats', '/programs-yoga', '/programs-treatments',
          '/amenities', '/contact'], (req, res) => {
     const filePath = req.path.slice(1) + '.html';
-    res.sendFile(path.join(__dirname, filePath));
+    setCacheHeaders(res, path.join(siteRoot, filePath));
+    res.sendFile(path.join(siteRoot, filePath));
 });
 
 // Serve homepage
 app.get('/', (req, res) => {
-    res.sendFile(path.join(__dirname, 'index.html'));
+    setCacheHeaders(res, path.join(siteRoot, 'index.html'));
+    res.sendFile(path.join(siteRoot, 'index.html'));
 });
 
 // Health check endpoint
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Streaming HTML URL Extraction for Amrit Sagar Crawlers
+Pulls image, link and style URLs out of HTML in one pass over response chunks, without building a DOM
+"""
+
+import codecs
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+CHUNK_SIZE = 16384
+
+# url(...) in style attributes and <style> blocks
+CSS_URL_PATTERN = re.compile(r'url\(\s*["\']?([^"\')]+?)["\']?\s*\)', re.IGNORECASE)
+
+# image-set() and its prefixed form; the arguments run to the matching parenthesis
+IMAGE_SET_PATTERN = re.compile(r'(?:-webkit-)?image-set\(', re.IGNORECASE)
+
+# Unfinished <style> text kept between chunks, enough for any single url(...)
+STYLE_CARRY = 2048
+
+NON_PAGE_SCHEMES = ('mailto:', 'tel:', 'javascript:', 'data:', '#')
+
+
+def split_top_level(text, separator):
+    """Split on separator outside quotes and parentheses, keeping (start, part) pairs"""
+    parts = []
+    depth = 0
+    quote = None
+    start = 0
+    for i, ch in enumerate(text):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == separator and depth == 0:
+            parts.append((start, text[start:i]))
+            start = i + 1
+    parts.append((start, text[start:]))
+    return parts
+
+
+def function_end(text, start):
+    """Index just past the function call that opens at start"""
+    depth = 0
+    quote = None
+    for i in range(start, len(text)):
+        ch = text[i]
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return len(text)
+
+
+def image_set_spans(css):
+    """(start, end) of the arguments of each image-set() in css"""
+    return [(match.end(), function_end(css, match.start()) - 1) for match in IMAGE_SET_PATTERN.finditer(css)]
+
+
+def absolute_url(url, base_url):
+    """Resolve the way the extractors always have: protocol-relative URLs become https"""
+    url = url.strip()
+    if url.startswith('//'):
+        return 'https:' + url
+    if url.startswith(('http://', 'https://')):
+        return url
+    return urljoin(base_url, url)
+
+
+class StreamingUrlExtractor(HTMLParser):
+    """Incremental tokenizer emitting ('image' | 'link' | 'style', url) events
+
+    Feed it text as it arrives; each feed returns the events completed so far.
+    Only the unparsed tail of the input and a bounded slice of <style> text are
+    held, so memory does not grow with page size.
+    """
+
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.events = []
+        self.in_style = False
+        self.style_text = ''
+
+    def _emit(self, kind, url):
+        if url and not url.lower().startswith(NON_PAGE_SCHEMES):
+            self.events.append((kind, absolute_url(url, self.base_url)))
+
+    def _emit_css(self, css):
+        for match in CSS_URL_PATTERN.finditer(css):
+            self._emit('style', match.group(1))
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'base' and attrs.get('href'):
+            self.base_url = absolute_url(attrs['href'], self.base_url)
+        elif tag == 'img':
+            self._emit('image', attrs.get('src'))
+        elif tag == 'a':
+            self._emit('link', attrs.get('href'))
+        elif tag == 'style':
+            self.in_style = True
+
+        if attrs.get('style'):
+            self._emit_css(attrs['style'])
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_data(self, data):
+        if not self.in_style:
+            return
+        text = self.style_text + data
+        consumed = 0
+        for match in CSS_URL_PATTERN.finditer(text):
+            self._emit('style', match.group(1))
+            consumed = match.end()
+        self.style_text = text[consumed:][-STYLE_CARRY:]
+
+    def handle_endtag(self, tag):
+        if tag == 'style':
+            self.in_style = False
+            self.style_text = ''
+
+    def feed(self, data):
+        super().feed(data)
+        events, self.events = self.events, []
+        return events
+
+    def close(self):
+        super().close()
+        events, self.events = self.events, []
+        return events
+
+
+def iter_urls(chunks, base_url, encoding='utf-8'):
+    """Yield (kind, url) events from an iterable of byte chunks as they arrive"""
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    parser = StreamingUrlExtractor(base_url)
+    for chunk in chunks:
+        yield from parser.feed(decoder.decode(chunk))
+    yield from parser.feed(decoder.decode(b'', final=True))
+    yield from parser.close()
+
+
+def stream_page_urls(session, url, timeout=15):
+    """Fetch a page with stream=True and yield its URL events while it downloads"""
+    response = session.get(url, timeout=timeout, stream=True)
+    try:
+        response.raise_for_status()
+        yield from iter_urls(
+            response.iter_content(chunk_size=CHUNK_SIZE),
+            response.url,
+            response.encoding or 'utf-8'
+        )
+    finally:
+        response.close()
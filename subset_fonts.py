@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Self-Hosted Subset Fonts for Amrit Sagar Pages
+Subsets the vendored Font Awesome, Inter and Playfair Display fonts down to the icons, glyphs
+and weights the pages use, writes local WOFF2 files with a matching fonts.css, and points the
+pages at it instead of cdnjs and Google Fonts
+"""
+
+import argparse
+import os
+import re
+import sys
+
+from bs4 import BeautifulSoup
+
+from placement_solver import STYLESHEET, list_pages
+from prune_css import (
+    JS_TOKEN, RUNTIME_ALLOWLIST, drop_unused_keyframes, filter_nodes, merge_usage,
+    page_usage, parse_css, selector_can_match, serialize
+)
+
+try:
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+    from fontTools.varLib import instancer
+except ImportError:
+    subset = None
+    TTFont = None
+    instancer = None
+
+# fontTools needs brotli to write WOFF2
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Vendored sources, so builds never touch the network:
+#   fonts/src/fontawesome/: css/all.css and webfonts/fa-*.ttf from Font Awesome Free 6.4.0, the
+#     version the pages loaded from cdnjs (PyPI fontawesomefree==6.4.0)
+#   fonts/src/inter/, fonts/src/playfair-display/: the Google Fonts variable fonts
+#     (PyPI fontpkg-inter==4.1.post1, fontpkg-playfair-display==1.203)
+SOURCE_DIR = os.path.join('fonts', 'src')
+FONTAWESOME_CSS = os.path.join('fontawesome', 'css', 'all.css')
+FONTAWESOME_WEBFONTS = os.path.join('fontawesome', 'webfonts')
+WEB_FONTS = {
+    'Inter': os.path.join('inter', 'Inter[opsz,wght].ttf'),
+    'Playfair Display': os.path.join('playfair-display', 'PlayfairDisplay[wght].ttf'),
+}
+
+OUTPUT_DIR = 'fonts'
+FONTS_CSS = 'fonts.css'
+
+# Font Awesome font file needed by each style class; plain .fa is solid
+FONTAWESOME_STYLES = {
+    'fa-solid-900': ('fa', 'fas', 'fa-solid'),
+    'fa-regular-400': ('far', 'fa-regular'),
+    'fa-brands-400': ('fab', 'fa-brands'),
+}
+
+# Links and hints for the third-party font CSS this tool replaces
+REMOTE_FONT_LINE = re.compile(
+    r'^[ \t]*<link [^\n]*(?:fonts\.googleapis\.com|fonts\.gstatic\.com|cdnjs\.cloudflare\.com/ajax/libs/font-awesome)[^\n]*\n',
+    re.MULTILINE
+)
+LOCAL_FONTS_MARKER = 'data-local-fonts'
+
+ICON_CODEPOINT = re.compile(r'(?:content|--fa)\s*:\s*["\']\\([0-9a-fA-F]+)["\']')
+FONT_FACE_SRC = re.compile(r'src\s*:[^;}]*')
+CSS_VAR = re.compile(r'var\(\s*(--[\w-]+)\s*\)')
+BOLD_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'strong', 'b', 'th')
+WEIGHT_KEYWORDS = {'normal': 400, 'bold': 700}
+
+# Always keep printable ASCII so text added later still renders in the right face
+BASE_CODEPOINTS = set(range(0x20, 0x7f))
+
+
+def require_fonttools():
+    if subset is None or brotli is None:
+        raise RuntimeError("Install fonttools and brotli to subset fonts (pip install fonttools brotli)")
+
+
+def subset_font(source, destination, codepoints, weight=None):
+    """Write a WOFF2 of source holding only the given codepoints; returns its size
+
+    With a weight, a variable source is first pinned to that weight and every
+    other axis to its default, giving a static face.
+    """
+    require_fonttools()
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*']
+    # Keep head.modified from the source so unchanged inputs give byte-identical output
+    font = TTFont(source, recalcTimestamp=False)
+    if weight is not None and 'fvar' in font:
+        location = {axis.axisTag: axis.defaultValue for axis in font['fvar'].axes}
+        location['wght'] = weight
+        font = instancer.instantiateVariableFont(font, location)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=sorted(codepoints))
+    subsetter.subset(font)
+    subset.save_font(font, destination, options)
+    font.close()
+    return os.path.getsize(destination)
+
+
+def font_codepoints(source):
+    font = TTFont(source, lazy=True)
+    codepoints = set(font.getBestCmap())
+    font.close()
+    return codepoints
+
+
+def available_weights(source_dir):
+    """Family -> (lightest, heaviest) weight its vendored variable font covers"""
+    weights = {}
+    for family, path in WEB_FONTS.items():
+        font = TTFont(os.path.join(source_dir, path), lazy=True)
+        axis = next((axis for axis in font['fvar'].axes if axis.axisTag == 'wght'), None) if 'fvar' in font else None
+        if axis:
+            weights[family] = (round(axis.minValue), round(axis.maxValue))
+        else:
+            weight = font['OS/2'].usWeightClass
+            weights[family] = (weight, weight)
+        font.close()
+    return weights
+
+
+def _declarations(body):
+    declarations = {}
+    for decl in body.split(';'):
+        if ':' in decl:
+            prop, value = decl.split(':', 1)
+            declarations[prop.strip().lower()] = value.strip()
+    return declarations
+
+
+def _rules(nodes):
+    for node in nodes:
+        if node['type'] == 'rule':
+            yield node['selectors'], _declarations(node['body'])
+        elif node['type'] == 'group':
+            yield from _rules(node['rules'])
+
+
+def _first_family(value, variables):
+    value = CSS_VAR.sub(lambda match: variables.get(match.group(1), ''), value)
+    return value.split(',')[0].strip().strip('\'"')
+
+
+def _weight(value):
+    value = value.replace('!important', '').strip()
+    return WEIGHT_KEYWORDS.get(value) or (int(value) if value.isdigit() else None)
+
+
+def used_weights(nodes, bold_in_markup=False):
+    """(family, weight) pairs styles.css can render, approximating inheritance from body"""
+    rules = list(_rules(nodes))
+    variables = {}
+    for _, declarations in rules:
+        variables.update({prop: value for prop, value in declarations.items() if prop.startswith('--')})
+
+    body_family = None
+    for selectors, declarations in rules:
+        if 'body' in selectors and 'font-family' in declarations:
+            body_family = _first_family(declarations['font-family'], variables)
+
+    used = set()
+    for selectors, declarations in rules:
+        weight = _weight(declarations.get('font-weight', ''))
+        if 'font-family' in declarations:
+            family = _first_family(declarations['font-family'], variables)
+            if weight is None:
+                bold = any(selector.split()[-1].split(':')[0] in BOLD_TAGS for selector in selectors)
+                weight = 700 if bold else 400
+            used.add((family, weight))
+        elif weight is not None and body_family:
+            used.add((body_family, weight))
+
+    if body_family:
+        used.add((body_family, 400))
+        if bold_in_markup:
+            used.add((body_family, 700))
+    return used
+
+
+def nearest_weight(weight, available):
+    """The weight within the (lightest, heaviest) range a browser would fall back to"""
+    return min(max(weight, available[0]), available[1])
+
+
+def text_codepoints(pages, scripts):
+    """Every character the pages and their scripts can put on screen"""
+    codepoints = set(BASE_CODEPOINTS)
+    for page in pages:
+        with open(page, 'r', encoding='utf-8') as f:
+            soup = BeautifulSoup(f.read(), 'html.parser')
+        for tag in soup(['script', 'style']):
+            tag.decompose()
+        codepoints.update(ord(ch) for ch in soup.get_text())
+        for element in soup.find_all(attrs={'placeholder': True}):
+            codepoints.update(ord(ch) for ch in element['placeholder'])
+    for script in scripts:
+        with open(script, 'r', encoding='utf-8') as f:
+            for match in JS_TOKEN.finditer(f.read()):
+                if not match.group(0).startswith('/'):
+                    codepoints.update(ord(ch) for ch in match.group(0)[1:-1])
+    return {codepoint for codepoint in codepoints if codepoint >= 0x20}
+
+
+def script_files(pages):
+    scripts = set()
+    for page in pages:
+        with open(page, 'r', encoding='utf-8') as f:
+            soup = BeautifulSoup(f.read(), 'html.parser')
+        for script in soup.find_all('script', src=True):
+            path = os.path.join(os.path.dirname(page), script['src'])
+            if os.path.exists(path):
+                scripts.add(path)
+    return sorted(scripts)
+
+
+def webfont_faces(weights, codepoints, source_dir, output_dir):
+    """Subset each used family/weight; returns (@font-face CSS, {file: bytes})"""
+    faces, files = [], {}
+    for family, family_weights in sorted(weights.items()):
+        for weight in sorted(family_weights):
+            source = os.path.join(source_dir, WEB_FONTS[family])
+            name = f"{family.lower().replace(' ', '-')}-{weight}.woff2"
+            files[name] = subset_font(source, os.path.join(output_dir, name), codepoints, weight)
+            faces.append(
+                f"@font-face{{font-family:'{family}';font-style:normal;font-weight:{weight};"
+                f"font-display:swap;src:url({name}) format(\"woff2\")}}"
+            )
+    return ''.join(faces), files
+
+
+def fontawesome_css(usage, source_dir, output_dir):
+    """The vendored Font Awesome CSS pruned to the used icons, with subset local fonts"""
+    with open(os.path.join(source_dir, FONTAWESOME_CSS), 'r', encoding='utf-8') as f:
+        nodes = parse_css(f.read())
+
+    kept, animations = filter_nodes(nodes, lambda selector: selector_can_match(selector, usage))
+    kept = drop_unused_keyframes(kept, animations)
+    icon_codepoints = {int(code, 16) for code in ICON_CODEPOINT.findall(serialize(kept))}
+
+    used_classes = usage['classes'] | usage['names']
+    needed = {stem for stem, classes in FONTAWESOME_STYLES.items() if used_classes & set(classes)}
+
+    files = {}
+    nodes = []
+    for node in kept:
+        if node['type'] == 'at' and node['prelude'].lower() == '@font-face':
+            stems = set(re.findall(r'url\(\s*["\']?[^)]*?(fa-[\w-]+)\.\w+["\']?\s*\)', node['body']))
+            stem = next(iter(stems & needed), None)
+            if stem is None:
+                continue
+            source = os.path.join(source_dir, FONTAWESOME_WEBFONTS, f"{stem}.ttf")
+            name = f"{stem}.woff2"
+            if name not in files:
+                codepoints = icon_codepoints & font_codepoints(source)
+                files[name] = subset_font(source, os.path.join(output_dir, name), codepoints)
+            body = FONT_FACE_SRC.sub(f'src:url({stem}.woff2) format("woff2")', node['body'])
+            node = {**node, 'body': body}
+        nodes.append(node)
+
+    return serialize(nodes), files, len(icon_codepoints)
+
+
+def use_local_fonts(html, href):
+    """Swap the remote font links and preconnects for the local stylesheet"""
+    local = f'<link rel="stylesheet" href="{href}" {LOCAL_FONTS_MARKER}>'
+    match = REMOTE_FONT_LINE.search(html)
+    if not match or LOCAL_FONTS_MARKER in html:
+        return REMOTE_FONT_LINE.sub('', html)
+    indent = re.match(r'[ \t]*', match.group(0)).group(0)
+    html = html[:match.start()] + f"{indent}{local}\n" + html[match.start():]
+    return REMOTE_FONT_LINE.sub('', html)
+
+
+def missing_sources(source_dir):
+    """Vendored files the build needs that are not on disk"""
+    needed = [FONTAWESOME_CSS] + list(WEB_FONTS.values())
+    needed += [os.path.join(FONTAWESOME_WEBFONTS, f"{stem}.ttf") for stem in FONTAWESOME_STYLES]
+    return [path for path in needed if not os.path.isfile(os.path.join(source_dir, path))]
+
+
+def build_fonts(root='.', source_dir=SOURCE_DIR, output_dir=OUTPUT_DIR, stylesheet=STYLESHEET,
+                allowlist=RUNTIME_ALLOWLIST, rewrite=True):
+    require_fonttools()
+    source_dir = os.path.join(root, source_dir)
+    output_dir = os.path.join(root, output_dir)
+    missing = missing_sources(source_dir)
+    if missing:
+        raise FileNotFoundError(f"Missing vendored font sources in {source_dir}: {', '.join(missing)}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    pages = list_pages(root)
+    script_cache = {}
+    usage = merge_usage(page_usage(page, allowlist, root, script_cache) for page in pages)
+
+    with open(os.path.join(root, stylesheet), 'r', encoding='utf-8') as f:
+        nodes = parse_css(f.read())
+    bold_in_markup = bool(usage['tags'] & {'strong', 'b'})
+    available = available_weights(source_dir)
+    weights = {}
+    for family, weight in used_weights(nodes, bold_in_markup):
+        if available.get(family):
+            weights.setdefault(family, set()).add(nearest_weight(weight, available[family]))
+
+    codepoints = text_codepoints(pages, script_files(pages))
+    faces_css, files = webfont_faces(weights, codepoints, source_dir, output_dir)
+    icons_css, icon_files, icon_count = fontawesome_css(usage, source_dir, output_dir)
+    files.update(icon_files)
+
+    css_path = os.path.join(output_dir, FONTS_CSS)
+    with open(css_path, 'w', encoding='utf-8') as f:
+        f.write(faces_css + icons_css)
+
+    changed = []
+    if rewrite:
+        href = os.path.relpath(css_path, root).replace(os.sep, '/')
+        for page in pages:
+            with open(page, 'r', encoding='utf-8') as f:
+                html = f.read()
+            updated = use_local_fonts(html, href)
+            if updated != html:
+                with open(page, 'w', encoding='utf-8') as f:
+                    f.write(updated)
+                changed.append(os.path.basename(page))
+
+    return {
+        'css': css_path,
+        'css_bytes': os.path.getsize(css_path),
+        'files': files,
+        'weights': {family: sorted(values) for family, values in weights.items()},
+        'glyphs': len(codepoints),
+        'icons': icon_count,
+        'pages_changed': changed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Subset vendored fonts and self-host them')
+    parser.add_argument('--root', default='.')
+    parser.add_argument('--source-dir', default=SOURCE_DIR)
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--allow', action='append', default=[], help='Extra runtime class to keep (prefix-* for a prefix)')
+    parser.add_argument('--no-rewrite', action='store_true', help='Build the fonts without editing the pages')
+    args = parser.parse_args()
+
+    print("🔤 Subsetting Self-Hosted Fonts")
+    print("=" * 60)
+
+    try:
+        result = build_fonts(
+            args.root, args.source_dir, args.output_dir,
+            allowlist=RUNTIME_ALLOWLIST + tuple(args.allow), rewrite=not args.no_rewrite
+        )
+    except (RuntimeError, FileNotFoundError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    for family, weights in result['weights'].items():
+        print(f"   🅰️ {family}: {', '.join(map(str, weights))}")
+    print(f"   🔣 {result['glyphs']} text glyphs, {result['icons']} icons")
+    for name, size in sorted(result['files'].items()):
+        print(f"   ✅ {name}: {size} bytes")
+    total = sum(result['files'].values()) + result['css_bytes']
+    print(f"\n📊 {len(result['files'])} font files + {result['css']} ({result['css_bytes']} bytes), {total} bytes total")
+    print(f"✅ Updated {len(result['pages_changed'])} pages")
+    for page in result['pages_changed']:
+        print(f"   📄 {page}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Disk-Backed URL Frontier for Amrit Sagar Crawlers
+SQLite-backed crawl queue and seen-sets fronted by a Bloom filter, so memory stays
+bounded on sites with millions of URLs
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import resource
+import sqlite3
+import tempfile
+import threading
+import time
+import tracemalloc
+
+FRONTIER_FILE = 'crawl_frontier.db'
+
+# Bloom sizing; past the expected count the false-positive rate rises but
+# answers stay exact because every possible hit is confirmed on disk
+EXPECTED_URLS = 2_000_000
+FALSE_POSITIVE_RATE = 0.01
+
+# Pages SQLite may keep in memory (negative means KiB)
+SQLITE_CACHE_KIB = 8192
+COMMIT_EVERY = 5000
+
+
+class BloomFilter:
+    """Fixed-size bit array; no false negatives, tunable false-positive rate"""
+
+    def __init__(self, capacity=EXPECTED_URLS, error_rate=FALSE_POSITIVE_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    @property
+    def memory_bytes(self):
+        return len(self.bits)
+
+
+class SeenSet:
+    """Set of URLs in a SQLite table; the Bloom filter answers most misses in memory"""
+
+    def __init__(self, db, table, capacity=EXPECTED_URLS):
+        self.db = db
+        self.table = table
+        self.bloom = BloomFilter(capacity)
+        self.count = 0
+        self.exact_checks = 0
+        db.execute(f"CREATE TABLE IF NOT EXISTS {table} (url TEXT PRIMARY KEY) WITHOUT ROWID")
+        for (url,) in db.execute(f"SELECT url FROM {table}"):
+            self.bloom.add(url)
+            self.count += 1
+
+    def _on_disk(self, url):
+        self.exact_checks += 1
+        return self.db.execute(f"SELECT 1 FROM {self.table} WHERE url = ?", (url,)).fetchone() is not None
+
+    def __contains__(self, url):
+        return url in self.bloom and self._on_disk(url)
+
+    def add(self, url):
+        """Record a URL; False if it was already present"""
+        if url in self.bloom and self._on_disk(url):
+            return False
+        self.db.execute(f"INSERT INTO {self.table} (url) VALUES (?)", (url,))
+        self.bloom.add(url)
+        self.count += 1
+        return True
+
+    def __len__(self):
+        return self.count
+
+
+class UrlFrontier:
+    """FIFO crawl queue on disk with O(1) enqueue and dedupe
+
+    Every URL ever enqueued stays in the table, so the frontier doubles as the
+    record of discovered pages; popping only marks a row as taken.
+    """
+
+    def __init__(self, path=FRONTIER_FILE, reset=True, capacity=EXPECTED_URLS):
+        if reset and path != ':memory:' and os.path.exists(path):
+            os.remove(path)
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=OFF')
+        self.db.execute(f'PRAGMA cache_size=-{SQLITE_CACHE_KIB}')
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS frontier ("
+            "id INTEGER PRIMARY KEY, url TEXT NOT NULL, taken INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS frontier_pending ON frontier (taken, id)")
+        self.lock = threading.RLock()
+        self.pending_writes = 0
+        self.seen = SeenSet(self.db, 'frontier_seen', capacity)
+
+    def seen_set(self, name, capacity=EXPECTED_URLS):
+        """Another named seen-set in the same database (e.g. downloaded images)"""
+        return LockedSeenSet(self, SeenSet(self.db, name, capacity))
+
+    def _wrote(self):
+        self.pending_writes += 1
+        if self.pending_writes >= COMMIT_EVERY:
+            self.db.commit()
+            self.pending_writes = 0
+
+    def add(self, url):
+        """Enqueue a URL unless it was seen before; True if it was new"""
+        with self.lock:
+            if not self.seen.add(url):
+                return False
+            self.db.execute("INSERT INTO frontier (url) VALUES (?)", (url,))
+            self._wrote()
+            return True
+
+    def __contains__(self, url):
+        with self.lock:
+            return url in self.seen
+
+    def pop(self):
+        """Oldest URL not yet taken, or None when the queue is drained"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT id, url FROM frontier WHERE taken = 0 ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE frontier SET taken = 1 WHERE id = ?", (row[0],))
+            self._wrote()
+            return row[1]
+
+    def __len__(self):
+        return len(self.seen)
+
+    def pending(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM frontier WHERE taken = 0").fetchone()[0]
+
+    def urls(self):
+        """Every URL enqueued so far, in discovery order"""
+        with self.lock:
+            return [url for (url,) in self.db.execute("SELECT url FROM frontier ORDER BY id")]
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+
+class LockedSeenSet:
+    """A SeenSet sharing the frontier's connection and lock"""
+
+    def __init__(self, frontier, seen):
+        self.frontier = frontier
+        self.seen = seen
+
+    def add(self, url):
+        with self.frontier.lock:
+            added = self.seen.add(url)
+            if added:
+                self.frontier._wrote()
+            return added
+
+    def __contains__(self, url):
+        with self.frontier.lock:
+            return url in self.seen
+
+    def __len__(self):
+        return len(self.seen)
+
+
+def benchmark(count, duplicate_every=4):
+    """Enqueue count URLs (with re-adds) and report memory per URL against a plain set"""
+    urls = (f"https://example.org/wp-content/uploads/2023/{i % 12 + 1:02d}/photo-{i}.jpg" for i in range(count))
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    with tempfile.TemporaryDirectory() as directory:
+        tracemalloc.start()
+        started = time.perf_counter()
+        frontier = UrlFrontier(os.path.join(directory, 'bench.db'), capacity=count)
+        for i, url in enumerate(urls):
+            frontier.add(url)
+            if i % duplicate_every == 0:
+                frontier.add(url)
+        frontier.db.commit()
+        elapsed = time.perf_counter() - started
+        _, frontier_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        exact_checks = frontier.seen.exact_checks
+        frontier.close()
+        disk = os.path.getsize(frontier.path)
+        # tracemalloc misses SQLite's own page cache; peak RSS covers it
+        rss_after_frontier = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    tracemalloc.start()
+    baseline = set()
+    for i in range(count):
+        baseline.add(f"https://example.org/wp-content/uploads/2023/{i % 12 + 1:02d}/photo-{i}.jpg")
+    _, set_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'urls': count,
+        'seconds': round(elapsed, 2),
+        'urls_per_second': round(count / elapsed),
+        'frontier_peak_bytes': frontier_peak,
+        'frontier_bytes_per_url': round(frontier_peak / count, 2),
+        'frontier_rss_growth_bytes': rss_after_frontier - rss_before,
+        'bloom_bytes': frontier.seen.bloom.memory_bytes,
+        'disk_bytes': disk,
+        'exact_checks': exact_checks,
+        'set_peak_bytes': set_peak,
+        'set_bytes_per_url': round(set_peak / count, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the disk-backed URL frontier')
+    parser.add_argument('--urls', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"📏 Enqueueing {args.urls} URLs")
+    result = benchmark(args.urls)
+    print(f"   ⏱️ {result['seconds']}s ({result['urls_per_second']} URLs/s)")
+    print(f"   🧠 Frontier peak memory: {result['frontier_peak_bytes'] / 1e6:.1f} MB "
+          f"({result['frontier_bytes_per_url']} bytes/URL, Bloom filter {result['bloom_bytes'] / 1e6:.1f} MB)")
+    print(f"   📈 Peak RSS growth: {result['frontier_rss_growth_bytes'] / 1e6:.1f} MB")
+    print(f"   💾 On disk: {result['disk_bytes'] / 1e6:.1f} MB, exact lookups: {result['exact_checks']}")
+    print(f"   🐍 In-memory set: {result['set_peak_bytes'] / 1e6:.1f} MB ({result['set_bytes_per_url']} bytes/URL)")
+
+
+if __name__ == "__main__":
+    main()
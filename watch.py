@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Watch Mode for the Amrit Sagar Asset Pipeline
+Watches images/, the pages, styles.css and image_placement_map.json and, for each burst of
+edits, re-runs only the stages the changed files affect: renditions, placeholders, the page
+build into dist/ (hints, critical CSS, minification) and precompression
+"""
+
+import argparse
+import fnmatch
+import glob
+import json
+import os
+import shutil
+import time
+
+from asset_graph import AssetGraph
+from build_site import MANIFEST_FILE, OUTPUT_DIR, SiteBuilder, page_stages
+from derive_renditions import RENDITION_SIZES, derive_all, find_originals
+from placement_solver import IMAGE_DIR, OUTPUT_FILE as PLACEMENT_FILE, STYLESHEET, list_pages, solve_placements
+from precompress import TEXT_EXTENSIONS, compress_file, encodings, precompress
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+WATCH_PATTERNS = ('*.html', STYLESHEET, PLACEMENT_FILE, IMAGE_DIR + '/*')
+
+# An editor save is several events; a batch closes after this much quiet, or MAX_BATCH_WAIT at most
+DEBOUNCE = 0.15
+MAX_BATCH_WAIT = 1.0
+POLL_INTERVAL = 0.25
+
+
+def is_watched(path):
+    return any(fnmatch.fnmatch(path, pattern) for pattern in WATCH_PATTERNS) and not path.endswith('~')
+
+
+def signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def snapshot():
+    paths = set()
+    for pattern in WATCH_PATTERNS:
+        paths.update(path for path in glob.glob(pattern) if os.path.isfile(path))
+    return {path: signature(path) for path in sorted(paths)}
+
+
+class PollingWatcher:
+    """Fallback that diffs mtimes and sizes of the watched files"""
+
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.last = snapshot()
+
+    def wait(self, timeout=None):
+        """Paths that changed, waiting up to timeout seconds (forever if None) for the first change"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = snapshot()
+            changed = {path for path in set(current) | set(self.last) if current.get(path) != self.last.get(path)}
+            self.last = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval if deadline is None else min(self.interval, max(deadline - time.monotonic(), 0)))
+
+
+class InotifyWatcher:
+    """Kernel change notifications for the site root and images/"""
+
+    def __init__(self):
+        flags = inotify_simple.flags
+        mask = flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM | flags.CREATE | flags.DELETE
+        self.inotify = inotify_simple.INotify()
+        self.directories = {}
+        for directory in ('.', IMAGE_DIR):
+            if os.path.isdir(directory):
+                self.directories[self.inotify.add_watch(directory, mask)] = directory
+
+    def wait(self, timeout=None):
+        events = self.inotify.read(timeout=None if timeout is None else int(timeout * 1000))
+        changed = set()
+        for event in events:
+            directory = self.directories.get(event.wd)
+            if directory is not None and event.name:
+                path = os.path.normpath(os.path.join(directory, event.name))
+                if is_watched(path):
+                    changed.add(path)
+        return changed
+
+
+class Pipeline:
+    """Keeps the build state in memory so each batch only redoes the work its changes affect"""
+
+    def __init__(self, output_dir=OUTPUT_DIR, solve=False, workers=None):
+        self.output_dir = output_dir
+        self.solve = solve
+        self.workers = workers
+        self.graph = AssetGraph()
+        self.signatures = {}
+        self.placement_map = self.load_placement_map()
+
+    def load_placement_map(self):
+        if not os.path.exists(PLACEMENT_FILE):
+            return {}
+        with open(PLACEMENT_FILE, 'r') as f:
+            return json.load(f)
+
+    def full_build(self):
+        """Same output as build_site.py followed by precompress.py"""
+        if os.path.isdir(self.output_dir):
+            shutil.rmtree(self.output_dir)
+        os.makedirs(self.output_dir)
+        self.pages = [os.path.relpath(page) for page in list_pages()]
+        self.hints, self.critical = page_stages('.', self.pages, workers=self.workers)
+        self.builder = SiteBuilder('.', self.output_dir, stages=(self.hints, self.critical))
+        for page in self.pages:
+            self.builder.build_page(page)
+        self.save_stages()
+        self.builder.write_manifest(self.pages)
+        precompress(self.output_dir, workers=self.workers)
+        self.graph.update()
+        self.signatures = snapshot()
+
+    def changes(self, paths):
+        """The paths whose content really changed (drops our own writes and repeated events)"""
+        changed = set()
+        for path in paths:
+            current = signature(path)
+            if current != self.signatures.get(path):
+                changed.add(path)
+                self.signatures[path] = current
+        return changed
+
+    def save_stages(self):
+        for stage in self.builder.stages:
+            stage.save()
+
+    def record_writes(self, paths):
+        for path in paths:
+            self.signatures[path] = signature(path)
+
+    def derive_variants(self, images):
+        """Renditions for every changed original; returns the renditions written"""
+        originals = set(find_originals(IMAGE_DIR)) if os.path.isdir(IMAGE_DIR) else set()
+        changed = sorted(path for path in images if path in originals and os.path.exists(path))
+        if not changed:
+            return []
+        results = derive_all(changed, RENDITION_SIZES, overwrite=True, workers=self.workers)
+        written = [os.path.normpath(result['rendition']) for result in results if result['written']]
+        self.record_writes(written)
+        print(f"   🖼️ Variants: {len(written)} renditions from {len(changed)} originals")
+        return written
+
+    def solve_placements(self):
+        solve_placements()
+        self.record_writes([PLACEMENT_FILE])
+
+    def apply_placements(self, pages, images, map_changed):
+        """Pages whose hints need rebuilding: changed, using a changed image or with a new map entry"""
+        if map_changed:
+            previous = self.placement_map
+            self.placement_map = self.load_placement_map()
+            self.hints.load_map()
+            pages = pages | {page for page, entry in self.placement_map.items() if previous.get(page) != entry}
+        for image in images:
+            pages |= {path for path, _ in self.graph.referrers(image) if path.endswith('.html')}
+        pages = {page for page in pages if page in self.placement_map and os.path.exists(page)}
+        if not pages:
+            return []
+        fresh = self.hints.prepare(pages)
+        print(f"   📌 Placement apply: {len(pages)} pages, {len(fresh)} placeholders regenerated")
+        return sorted(pages)
+
+    def dependents(self, assets):
+        """Assets (such as stylesheets) that embed the hashed names of assets, transitively, and their pages"""
+        stale = set(assets)
+        queue = list(assets)
+        while queue:
+            for path, _ in self.graph.referrers(queue.pop()):
+                if path not in stale and self.graph.files[path]['kind'] in ('html', 'css'):
+                    stale.add(path)
+                    if path.endswith('.css'):
+                        queue.append(path)
+        return stale
+
+    def remove_output(self, relative_path):
+        path = os.path.join(self.output_dir, relative_path)
+        for candidate in [path] + [path + ext for ext, _ in encodings()]:
+            if os.path.exists(candidate):
+                os.remove(candidate)
+
+    def minify(self, pages, assets):
+        """Rebuild the changed pages and assets into the output dir; returns the files written"""
+        self.pages = [os.path.relpath(page) for page in list_pages()]
+        stale = self.dependents(assets)
+        previous = {path: self.builder.manifest.pop(path) for path in stale if path in self.builder.manifest}
+        kept = set(self.builder.manifest)
+
+        rebuild = sorted(path for path in set(pages) | stale if path.endswith('.html'))
+        written = []
+        for page in rebuild:
+            if page in self.pages:
+                self.builder.build_page(page)
+                written.append(page)
+            else:
+                self.remove_output(page)
+
+        built = {path: hashed for path, hashed in self.builder.manifest.items() if path not in kept}
+        for path, hashed in previous.items():
+            if built.get(path) != hashed:
+                self.remove_output(hashed)
+        written += built.values()
+        self.save_stages()
+        self.builder.write_manifest(self.pages)
+        written.append(MANIFEST_FILE)
+        print(f"   🏗️ Minify: {len(written) - len(built) - 1} pages, {len(built)} assets")
+        return written
+
+    def compress(self, written):
+        paths = [os.path.join(self.output_dir, path) for path in written if path.lower().endswith(TEXT_EXTENSIONS)]
+        for path in paths:
+            if os.path.exists(path):
+                compress_file(path)
+        print(f"   🗜️ Compress: {len(paths)} files")
+
+    def run(self, paths):
+        changed = self.changes(paths)
+        if not changed:
+            return False
+        started = time.perf_counter()
+        print(f"\n🔄 {len(changed)} changed: {', '.join(sorted(changed)[:5])}{' ...' if len(changed) > 5 else ''}")
+
+        images = {path for path in changed if path.startswith(IMAGE_DIR + os.sep)}
+        images |= set(self.derive_variants(images))
+        map_changed = PLACEMENT_FILE in changed
+        if self.solve and images:
+            self.solve_placements()
+            map_changed = True
+
+        self.graph.update()
+        pages = {path for path in changed if path.endswith('.html')}
+        pages |= set(self.apply_placements(set(pages), images, map_changed))
+        self.graph.update()
+
+        assets = images | ({STYLESHEET} & changed)
+        written = self.minify(pages, assets)
+        self.compress(written)
+        print(f"✅ Done in {time.perf_counter() - started:.2f} s")
+        return True
+
+
+def watch(watcher, pipeline):
+    pending = set()
+    first_event = None
+    while True:
+        paths = watcher.wait(DEBOUNCE if pending else None)
+        if paths:
+            pending |= paths
+            first_event = first_event or time.monotonic()
+            if time.monotonic() - first_event < MAX_BATCH_WAIT:
+                continue
+        if pending:
+            try:
+                pipeline.run(pending)
+            except Exception as e:
+                print(f"❌ Pipeline failed: {e}")
+            pending = set()
+            first_event = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-run the affected asset pipeline stages when files change')
+    parser.add_argument('--root', default='.')
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--poll', action='store_true', help='Poll for changes even when inotify is available')
+    parser.add_argument('--solve', action='store_true',
+                        help='Re-solve image_placement_map.json when images change (overwrites hand edits)')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    output_dir = os.path.abspath(args.output_dir)
+    os.chdir(args.root)
+
+    print("👀 Watching the Asset Pipeline")
+    print("=" * 60)
+
+    pipeline = Pipeline(output_dir, args.solve, args.workers)
+    started = time.perf_counter()
+    pipeline.full_build()
+    print(f"✅ Initial build of {len(pipeline.pages)} pages into {args.output_dir}/ in {time.perf_counter() - started:.2f} s")
+
+    if inotify_simple and not args.poll:
+        watcher = InotifyWatcher()
+        print("📡 Using inotify")
+    else:
+        watcher = PollingWatcher()
+        reason = '' if args.poll else ' (pip install inotify_simple for inotify)'
+        print(f"⏱️ Polling every {POLL_INTERVAL} s{reason}")
+    print(f"   {', '.join(WATCH_PATTERNS)}")
+
+    try:
+        watch(watcher, pipeline)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+
+
+if __name__ == "__main__":
+    main()